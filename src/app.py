@@ -5,7 +5,7 @@ from system.scene import SceneManager
 
 if __name__ == "__main__":
     from qasync import QEventLoop
-    from system import MainWindow
+    from system.main_window import MainWindow
     from scenes import scenes
 
     app = QApplication(sys.argv)
@@ -17,4 +17,5 @@ if __name__ == "__main__":
             manager.register_scene(scene)
         mainWindow = MainWindow(manager)
         mainWindow.show()
+        manager.start_services()
         loop.run_forever()
@@ -0,0 +1,91 @@
+# Local Art-Net receiver standing in for a DMX node: records every ArtDmx
+# frame with its arrival time, reports frame timing and sequence gaps, and
+# checks the channel values a fixture received.
+#
+# Runs on its own for pointing the app at it from settings.artnet_settings:
+#
+#   cd src && python -m benchmarks.artnet_listener [port]
+
+import asyncio
+import sys
+import time
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+from system.services.artnet import ARTNET_PORT, Fixture, parse_artdmx
+
+
+@dataclass
+class DmxFrame:
+    at: float
+    universe: int
+    sequence: int
+    data: bytes
+
+
+@dataclass
+class ArtNetListener(asyncio.DatagramProtocol):
+    frames: List[DmxFrame] = field(default_factory=list)
+    # datagrams that were not ArtDmx
+    ignored: int = 0
+
+    def __post_init__(self):
+        self._transport: Optional[asyncio.DatagramTransport] = None
+
+    async def start(self, host: str = "127.0.0.1", port: int = 0) -> str:
+        self._transport, _ = await asyncio.get_event_loop().create_datagram_endpoint(
+            lambda: self, local_addr=(host, port))
+        host, port = self._transport.get_extra_info("sockname")[:2]
+        return f"{host}:{port}"
+
+    def close(self) -> None:
+        if self._transport is not None:
+            self._transport.close()
+
+    def datagram_received(self, data: bytes, addr: Tuple[str, int]) -> None:
+        packet = parse_artdmx(data)
+        if packet is None:
+            self.ignored += 1
+        else:
+            self.frames.append(DmxFrame(time.perf_counter(), *packet))
+
+    def universe(self, universe: int) -> List[DmxFrame]:
+        return [frame for frame in self.frames if frame.universe == universe]
+
+    def intervals(self, universe: int) -> List[float]:
+        frames = self.universe(universe)
+        return [(later.at - earlier.at) * 1000 for earlier, later in zip(frames, frames[1:])]
+
+    def sequence_gaps(self, universe: int) -> int:
+        # sequence numbers run 1-255 and wrap around, 0 is unsequenced
+        frames = self.universe(universe)
+        return sum(1 for earlier, later in zip(frames, frames[1:])
+                   if later.sequence != earlier.sequence % 255 + 1)
+
+    def channels(self, fixture: Fixture, frame: Optional[DmxFrame] = None) -> List[int]:
+        # what the fixture shows in a frame, the last one by default
+        frame = frame if frame is not None else self.universe(fixture.universe)[-1]
+        start = fixture.address - 1
+        return list(frame.data[start:start + len(fixture.channels())])
+
+
+async def listen(port: int) -> None:
+    listener = ArtNetListener()
+    print(f"Art-Net listener on {await listener.start('0.0.0.0', port)}")
+    reported: Dict[int, int] = dict()
+    try:
+        while True:
+            await asyncio.sleep(1.0)
+            for universe in sorted({frame.universe for frame in listener.frames}):
+                frames = listener.universe(universe)
+                intervals = listener.intervals(universe)[reported.get(universe, 0):]
+                reported[universe] = len(frames) - 1
+                if intervals:
+                    print(f"universe {universe}: {len(intervals)} frames/s, interval max={max(intervals):.1f} ms, "
+                          f"gaps={listener.sequence_gaps(universe)}, first channels={list(frames[-1].data[:8])}")
+    finally:
+        listener.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(listen(int(sys.argv[1]) if len(sys.argv) > 1 else ARTNET_PORT))
@@ -0,0 +1,68 @@
+# ArtNetLighting against the local Art-Net listener: frame timing and
+# sequence gaps at the configured frame rate while an effect plays through a
+# LightingGroup, and the channel values every fixture profile received for
+# static states.
+#
+#   cd src && python -m benchmarks.artnet_timing [frame_rate] [seconds]
+
+import asyncio
+import statistics
+import sys
+
+from benchmarks.artnet_listener import ArtNetListener
+from benchmarks.lighting_throughput import percentile
+from system.services.artnet import ArtNetLighting, Fixture
+from system.services.lighting import Light
+from system.services.lighting_effects import cycle
+from system.services.lighting_group import LightingGroup
+
+FIXTURES = [
+    Fixture("par", universe=0, address=1, profile="drgb"),
+    Fixture("bar", universe=0, address=5, profile="rgbw"),
+    Fixture("wash", universe=1, address=101, profile="drgbw"),
+]
+CHECKED = [
+    Light(Light.Type.COLOR, hue=0, saturation=100, brightness=100),
+    Light(Light.Type.COLOR, hue=180, saturation=50, brightness=40),
+    Light(Light.Type.TEMP, temperature=3620, brightness=100),
+    Light(Light.Type.TEMP, temperature=6500, brightness=10),
+]
+
+
+async def main(frame_rate: float, seconds: float) -> None:
+    listener = ArtNetListener()
+    node = ArtNetLighting(await listener.start(), FIXTURES, frame_rate)
+    group = LightingGroup({"stage": node})
+    group.start()
+    await group.wait_online()
+
+    await group.play(cycle([0, 120, 240], seconds, count=1))
+    report = group.effect_reports["stage"]
+    expected = 1000 / frame_rate
+    for universe in [0, 1]:
+        intervals = listener.intervals(universe)
+        print(f"universe {universe}: {len(intervals) + 1} frames, interval mean={statistics.mean(intervals):.2f} ms "
+              f"(expected {expected:.2f}) p50={percentile(intervals, 0.5):.2f} p99={percentile(intervals, 0.99):.2f} "
+              f"max={max(intervals):.2f} ms, jitter={statistics.pstdev(intervals):.2f} ms, "
+              f"sequence gaps={listener.sequence_gaps(universe)}")
+    print(f"effect {report}")
+
+    mismatches = 0
+    for light in CHECKED:
+        await group.set(light)
+        await asyncio.sleep(2 / frame_rate)
+        for fixture in FIXTURES:
+            received, rendered = listener.channels(fixture), fixture.render(light)
+            if received != rendered:
+                mismatches += 1
+                print(f"  {fixture.name} {light}: received {received}, expected {rendered}")
+    print(f"channel values: {len(CHECKED) * len(FIXTURES) - mismatches}/{len(CHECKED) * len(FIXTURES)} "
+          f"fixture states match, set to wire {node.latency}")
+
+    group.close()
+    listener.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main(float(sys.argv[1]) if len(sys.argv) > 1 else 40,
+                     float(sys.argv[2]) if len(sys.argv) > 2 else 3))
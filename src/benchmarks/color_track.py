@@ -0,0 +1,105 @@
+# Ambient color tracks on synthetic video with known scene colors (textured
+# scenes with specks of other colors, a dark grey scene and a hue wrapping
+# around 0): hue error per scene, analysis time, lighting updates per second
+# of the track vs one per sampled frame, and the CPU the replay costs at show
+# time against a running projector clock.
+#
+#   cd src && python -m benchmarks.color_track [scene_seconds] [replay_seconds]
+
+import asyncio
+import sys
+import time
+from typing import List, Tuple
+
+import numpy as np
+
+from system.services.color_analysis import SAMPLE_FPS, SAMPLE_HEIGHT, SAMPLE_WIDTH, build_track, frame_colors
+from system.services.color_tracks import follow
+from system.services.lighting import Light
+from system.services.projector.cues import PlayerClock
+
+# hue, saturation, value of every scene, None hue for grey
+SCENES = [(0, 0.9, 0.9), (30, 0.8, 0.7), (220, 0.9, 0.6), (120, 0.6, 0.8), (350, 0.9, 0.8), (None, 0.0, 0.2),
+          (280, 0.7, 0.9)]
+
+
+def synthesize(scene_seconds: float) -> np.ndarray:
+    rng = np.random.default_rng(1)
+    frames = []
+    for hue, saturation, value in SCENES:
+        for _ in range(int(scene_seconds * SAMPLE_FPS)):
+            hues = np.full((SAMPLE_HEIGHT, SAMPLE_WIDTH), 0.0 if hue is None else float(hue))
+            hues += rng.normal(0, 6, hues.shape)
+            # a fifth of the picture is something else
+            specks = rng.random(hues.shape) < 0.2
+            hues[specks] = rng.uniform(0, 360, specks.sum())
+            values = np.clip(value + rng.normal(0, 0.1, hues.shape), 0, 1)
+            frames.append(_hsv_to_rgb(hues % 360, np.full(hues.shape, saturation), values))
+    return np.stack(frames)
+
+
+def _hsv_to_rgb(hue: np.ndarray, saturation: np.ndarray, value: np.ndarray) -> np.ndarray:
+    sector = hue / 60
+    chroma = value * saturation
+    x = chroma * (1 - np.abs(sector % 2 - 1))
+    zero = np.zeros_like(hue)
+    index = sector.astype(int) % 6
+    options = [(chroma, x, zero), (x, chroma, zero), (zero, chroma, x), (zero, x, chroma), (x, zero, chroma),
+               (chroma, zero, x)]
+    rgb = np.zeros(hue.shape + (3,))
+    for i, (red, green, blue) in enumerate(options):
+        mask = index == i
+        rgb[mask] = np.stack([red[mask], green[mask], blue[mask]], axis=1)
+    return ((rgb + (value - chroma)[..., None]) * 255).astype(np.uint8)
+
+
+class SimulatedDisplay:
+    def __init__(self):
+        self.clock = PlayerClock()
+        self.clock.set_running(True)
+
+    def get_position(self) -> int:
+        return int(self.clock.now())
+
+
+class RecordingLighting:
+    def __init__(self):
+        self.commands: List[Tuple[float, Light]] = []
+
+    def set(self, light: Light) -> None:
+        self.commands.append((time.perf_counter(), light))
+
+
+async def replay(track, seconds: float) -> Tuple[float, int]:
+    display, lighting = SimulatedDisplay(), RecordingLighting()
+    started = time.process_time()
+    task = asyncio.get_event_loop().create_task(follow(track, display, lighting))
+    await asyncio.sleep(seconds)
+    task.cancel()
+    return (time.process_time() - started) / seconds * 100, len(lighting.commands)
+
+
+def main(scene_seconds: float, replay_seconds: float) -> None:
+    frames = synthesize(scene_seconds)
+    started = time.perf_counter()
+    colors = frame_colors(frames)
+    track = build_track(colors)
+    analysis = time.perf_counter() - started
+    duration = len(frames) / SAMPLE_FPS
+    print(f"{duration:g} s of video, {len(frames)} sampled frames analysed in {analysis * 1000:.0f} ms")
+
+    for i, (hue, saturation, value) in enumerate(SCENES):
+        middle = int((i + 0.5) * scene_seconds * 1000)
+        light = track.at(middle)
+        error = "-" if hue is None else f"{abs((light.hue - hue + 180) % 360 - 180)}°"
+        print(f"  scene {hue if hue is not None else 'grey'}: track hue={light.hue} saturation={light.saturation} "
+              f"brightness={light.brightness}, hue error {error}")
+    print(f"updates: {len(track.positions) / duration:.2f}/s from the track vs {SAMPLE_FPS}/s one per frame")
+
+    cpu, commands = asyncio.run(replay(track, replay_seconds))
+    print(f"replay of {replay_seconds:g} s: {commands} lighting commands, {cpu:.2f}% of one core")
+
+
+if __name__ == "__main__":
+    main(float(sys.argv[1]) if len(sys.argv) > 1 else 10,
+         float(sys.argv[2]) if len(sys.argv) > 2 else 20)
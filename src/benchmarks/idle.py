@@ -0,0 +1,53 @@
+# Stop-to-placeholder latency and idle CPU load of VlcProjector. Run on two
+# revisions to compare placeholder implementations.
+#
+#   cd src && python -m benchmarks.idle D:/Background/Bubbles.mp4 ...
+
+import asyncio
+import statistics
+import sys
+import time
+
+from PyQt6.QtWidgets import QApplication
+
+from system.services.projector import Media, VlcProjector
+
+CLIP_SECONDS = 2
+IDLE_SECONDS = 10
+
+
+async def stop_latency(projector: VlcProjector, media: Media) -> float:
+    playback = asyncio.create_task(projector.play(media))
+    await asyncio.sleep(CLIP_SECONDS)
+    started = time.perf_counter()
+    projector.stop()
+    # the placeholder is on screen once the pending paint events are handled
+    QApplication.processEvents()
+    elapsed = (time.perf_counter() - started) * 1000
+    await playback
+    return elapsed
+
+
+async def idle_cpu() -> float:
+    cpu, wall = time.process_time(), time.perf_counter()
+    await asyncio.sleep(IDLE_SECONDS)
+    return (time.process_time() - cpu) / (time.perf_counter() - wall) * 100
+
+
+async def main(files: list[str]) -> None:
+    projector = VlcProjector()
+    projector.placeholder()
+    samples = [await stop_latency(projector, Media(path)) for path in files]
+    print(f"stop to placeholder: n={len(samples)} mean={statistics.mean(samples):.1f} ms "
+          f"max={max(samples):.1f} ms")
+    print(f"idle cpu: {await idle_cpu():.1f}% over {IDLE_SECONDS} s")
+
+
+if __name__ == "__main__":
+    from qasync import QEventLoop
+
+    app = QApplication(sys.argv)
+    loop = QEventLoop(app)
+    asyncio.set_event_loop(loop)
+    with loop:
+        loop.run_until_complete(main(sys.argv[1:]))
@@ -0,0 +1,58 @@
+# Effects on a room of Tapo stand-ins, the last bulb answering slower than
+# the rest: a color cycle requested at more frames per second than the bulbs
+# take, achieved vs requested rate per bulb and whether every bulb still
+# ends on time, then a looping pulse awaited by an action that is
+# interrupted, and how long the bulbs keep changing after that.
+#
+#   cd src && python -m benchmarks.lighting_effects [rate] [latency_ms] [straggler_ms]
+
+import asyncio
+import sys
+import time
+
+from benchmarks.tapo_standin import StandInBulb
+from system.services.lighting import Light, Lighting
+from system.services.lighting_effects import cycle, pulse
+from system.services.lighting_group import LightingGroup
+
+CYCLE_SECONDS = 3.0
+RED = Light(Light.Type.COLOR, hue=0, saturation=100, brightness=100)
+
+
+async def main(rate: float, latency_ms: float, straggler_ms: float) -> None:
+    bulbs = {f"bulb{i}": StandInBulb(latency_ms=latency)
+             for i, latency in enumerate([latency_ms, latency_ms, straggler_ms])}
+    group = LightingGroup({name: Lighting(await bulb.start(), "user@example.com", "password", max_rate=10)
+                           for name, bulb in bulbs.items()})
+    group.start()
+    await group.wait_online()
+
+    started = time.perf_counter()
+    await group.play(cycle([0, 120, 240], CYCLE_SECONDS, count=1), rate=rate)
+    print(f"cycle of {CYCLE_SECONDS:g} s at {rate:g} frames/s took {time.perf_counter() - started:.2f} s, "
+          f"final hues {[bulb.state['hue'] for bulb in bulbs.values()]}")
+    for report in group.effect_reports.values():
+        print(f"  {report}")
+
+    async def interrupted_action() -> None:
+        await group.play(pulse(RED, period=1.0))
+
+    action = asyncio.get_event_loop().create_task(interrupted_action())
+    await asyncio.sleep(2.0)
+    action.cancel()
+    interrupted = time.perf_counter()
+    await asyncio.sleep(1.0)
+    last_change = max(bulb.changes[-1][0] for bulb in bulbs.values())
+    print(f"pulse interrupted, bulbs settled {max(0.0, last_change - interrupted) * 1000:.0f} ms later")
+    for report in group.effect_reports.values():
+        print(f"  {report}")
+
+    group.close()
+    for bulb in bulbs.values():
+        await bulb.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main(float(sys.argv[1]) if len(sys.argv) > 1 else 20,
+                     float(sys.argv[2]) if len(sys.argv) > 2 else 20,
+                     float(sys.argv[3]) if len(sys.argv) > 3 else 150))
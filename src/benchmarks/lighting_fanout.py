@@ -0,0 +1,62 @@
+# A room of Tapo stand-ins changing color: each bulb set one after another
+# vs a LightingGroup fanning the state out to all of them at once. The wave
+# is the time between the first and the last bulb showing a state, the last
+# bulb answers slower than the rest and should be reported as the straggler.
+#
+#   cd src && python -m benchmarks.lighting_fanout [commands] [bulbs] [latency_ms] [straggler_ms]
+
+import asyncio
+import statistics
+import sys
+import time
+from typing import List
+
+from benchmarks.tapo_latency import STATES, shown
+from benchmarks.tapo_standin import StandInBulb
+from system.services.lighting import Light, Lighting
+from system.services.lighting_group import LightingGroup
+
+
+async def measure(title: str, commands: int, latencies: List[float], fan_out: bool) -> None:
+    bulbs = {f"bulb{i}": StandInBulb(latency_ms=latency) for i, latency in enumerate(latencies)}
+    devices = {name: Lighting(await bulb.start(), "user@example.com", "password", max_rate=1000)
+               for name, bulb in bulbs.items()}
+    group = LightingGroup(devices)
+    group.start()
+    await group.wait_online()
+
+    waves, totals = [], []
+    for i in range(commands):
+        light: Light = STATES[i % len(STATES)]
+        visible = [bulb.wait_state(shown(light)) for bulb in bulbs.values()]
+        started = time.perf_counter()
+        if fan_out:
+            await group.set(light)
+        else:
+            for device in devices.values():
+                await device.set(light)
+        shown_at = await asyncio.gather(*visible)
+        waves.append((max(shown_at) - min(shown_at)) * 1000)
+        totals.append((max(shown_at) - started) * 1000)
+
+    group.close()
+    for bulb in bulbs.values():
+        await bulb.close()
+    print(f"{title}: n={commands} wave mean={statistics.mean(waves):.1f} ms max={max(waves):.1f} ms, "
+          f"all bulbs changed after mean={statistics.mean(totals):.1f} ms")
+    if fan_out:
+        for line in group.report():
+            print(f"  {line}")
+
+
+async def main(commands: int, bulbs: int, latency_ms: float, straggler_ms: float) -> None:
+    latencies = [latency_ms] * (bulbs - 1) + [straggler_ms]
+    await measure("sequential", commands, latencies, fan_out=False)
+    await measure("group", commands, latencies, fan_out=True)
+
+
+if __name__ == "__main__":
+    asyncio.run(main(int(sys.argv[1]) if len(sys.argv) > 1 else 30,
+                     int(sys.argv[2]) if len(sys.argv) > 2 else 4,
+                     float(sys.argv[3]) if len(sys.argv) > 3 else 20,
+                     float(sys.argv[4]) if len(sys.argv) > 4 else 150))
@@ -0,0 +1,61 @@
+# Event loop lag while hammering the first bulb from settings.bulb_settings:
+# PyL530 called directly on the loop vs the Lighting worker thread.
+#
+#   cd src && python -m benchmarks.lighting_lag [commands]
+
+import asyncio
+import statistics
+import sys
+import time
+
+from PyP100 import PyL530
+
+from settings import bulb_settings
+from system.misc.loop_lag import LoopLagMonitor
+from system.services.lighting import Light, Lighting
+
+COLORS = [Light(Light.Type.COLOR, hue=hue, saturation=100, brightness=100) for hue in (0, 120, 240)]
+
+
+async def blocking(commands: int) -> list[float]:
+    settings = bulb_settings[0]
+    bulb = PyL530.L530(settings["ip"], settings["login"], settings["password"])
+    bulb.handshake()
+    bulb.login()
+    latencies = []
+    for i in range(commands):
+        light = COLORS[i % len(COLORS)]
+        started = time.perf_counter()
+        bulb.setColor(light.hue, light.saturation)
+        bulb.setBrightness(light.brightness)
+        latencies.append((time.perf_counter() - started) * 1000)
+        await asyncio.sleep(0)
+    return latencies
+
+
+async def worker(commands: int) -> list[float]:
+    settings = bulb_settings[0]
+    lighting = Lighting(settings["ip"], settings["login"], settings["password"])
+    lighting.start()
+    await lighting.wait_online()
+    latencies = []
+    for i in range(commands):
+        started = time.perf_counter()
+        await lighting.set(COLORS[i % len(COLORS)])
+        latencies.append((time.perf_counter() - started) * 1000)
+    lighting.close()
+    return latencies
+
+
+async def main(commands: int) -> None:
+    for title, run in [("blocking", blocking), ("worker", worker)]:
+        monitor = LoopLagMonitor()
+        monitor.start()
+        latencies = await run(commands)
+        monitor.stop()
+        print(f"{title}: command mean={statistics.mean(latencies):.1f} ms max={max(latencies):.1f} ms, "
+              f"{monitor.summary()}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main(int(sys.argv[1]) if len(sys.argv) > 1 else 50))
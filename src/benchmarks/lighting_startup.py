@@ -0,0 +1,70 @@
+# Lighting startup on the local Tapo stand-in and on an unreachable
+# address: how long the caller is blocked and how long until commands go
+# through, for a blocking PyL530 login and for the background session of
+# Lighting, fresh and restored from the session cache.
+#
+#   cd src && python -m benchmarks.lighting_startup [unreachable ip]
+
+import asyncio
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from PyP100 import PyL530
+
+from benchmarks.tapo_standin import StandInBulb
+from system.services.lighting import Light, Lighting
+
+LOGIN = ("user@example.com", "password")
+RED = Light(Light.Type.COLOR, hue=0, saturation=100, brightness=100)
+
+
+def blocking_login(address: str) -> None:
+    bulb = PyL530.L530(address, *LOGIN)
+    bulb.handshake()
+    bulb.login()
+
+
+async def legacy(address: str) -> str:
+    # run off the loop only so the stand-in can answer, the time is what
+    # SceneManager.__init__ would have been blocked for
+    started = time.perf_counter()
+    try:
+        await asyncio.get_event_loop().run_in_executor(None, blocking_login, address)
+        outcome = "connected"
+    except Exception as error:
+        outcome = f"failed ({type(error).__name__})"
+    return f"blocked {(time.perf_counter() - started) * 1000:.0f} ms, {outcome}"
+
+
+async def background(address: str, session_cache: str, wait: bool) -> str:
+    started = time.perf_counter()
+    lighting = Lighting(address, *LOGIN, session_cache=session_cache)
+    lighting.start()
+    blocked = (time.perf_counter() - started) * 1000
+    if wait:
+        await lighting.wait_online()
+        result = f"online after {(time.perf_counter() - started) * 1000:.0f} ms"
+    else:
+        command = time.perf_counter()
+        done = await lighting.set(RED)
+        result = f"set() -> {done} after {(time.perf_counter() - command) * 1000:.1f} ms"
+    lighting.close()
+    return f"blocked {blocked:.1f} ms, {result}"
+
+
+async def main(unreachable: str) -> None:
+    bulb = StandInBulb()
+    address = await bulb.start()
+    session_cache = str(Path(tempfile.mkdtemp()) / "tapo_session.json")
+    print(f"reachable, blocking login: {await legacy(address)}")
+    print(f"reachable, fresh session: {await background(address, session_cache, True)}")
+    print(f"reachable, cached session: {await background(address, session_cache, True)}")
+    print(f"unreachable, blocking login: {await legacy(unreachable)}")
+    print(f"unreachable, background: {await background(unreachable, session_cache, False)}")
+    await bulb.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main(sys.argv[1] if len(sys.argv) > 1 else "10.255.255.1"))
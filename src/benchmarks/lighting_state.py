@@ -0,0 +1,52 @@
+# Reading the bulb state on the Tapo stand-in: a get_device_info round-trip
+# per read (refresh(), what state() used to do) vs the shadow state, and how
+# long a change made outside the app (Tapo app, wall switch) takes to show
+# up in the shadow through the background poll.
+#
+#   cd src && python -m benchmarks.lighting_state [reads] [latency_ms] [poll_interval]
+
+import asyncio
+import statistics
+import sys
+import time
+
+from benchmarks.tapo_standin import StandInBulb
+from system.services.lighting import Light, Lighting
+
+
+async def main(reads: int, latency_ms: float, poll_interval: float) -> None:
+    bulb = StandInBulb(latency_ms=latency_ms)
+    lighting = Lighting(await bulb.start(), "user@example.com", "password", poll_interval=poll_interval)
+    lighting.start()
+    await lighting.wait_online()
+    await lighting.set(Light(Light.Type.TEMP, temperature=3620, brightness=80))
+
+    for title, read in [("refresh", lighting.refresh), ("shadow", None)]:
+        requests, latencies = bulb.requests, []
+        for _ in range(reads):
+            started = time.perf_counter()
+            if read is not None:
+                await read()
+            else:
+                lighting.state()
+            latencies.append((time.perf_counter() - started) * 1000)
+        print(f"{title}: n={reads} mean={statistics.mean(latencies):.3f} ms max={max(latencies):.3f} ms, "
+              f"bulb requests={bulb.requests - requests}")
+    print(f"shadow: {lighting.shadow.light} from {lighting.shadow.source}, age={lighting.shadow.age():.2f} s")
+
+    # changed behind the app's back, only the poll can notice
+    bulb.state.update(color_temp=0, hue=120, saturation=100, brightness=40)
+    changed = time.perf_counter()
+    while lighting.state() is None or lighting.state().type is not Light.Type.COLOR:
+        await asyncio.sleep(0.01)
+    print(f"external change seen after {time.perf_counter() - changed:.2f} s "
+          f"(poll interval {poll_interval:g} s): {lighting.state()}")
+
+    lighting.close()
+    await bulb.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main(int(sys.argv[1]) if len(sys.argv) > 1 else 50,
+                     float(sys.argv[2]) if len(sys.argv) > 2 else 20,
+                     float(sys.argv[3]) if len(sys.argv) > 3 else 2.0))
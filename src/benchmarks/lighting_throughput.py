@@ -0,0 +1,64 @@
+# Command throughput and latency percentiles of Lighting against the Tapo
+# stand-in on a clean network, with jitter, with requests lost on the way and
+# with sessions expiring under load. Commands are sent back to back, the
+# rate limit is lifted so the bulb protocol is the bottleneck; the time
+# spent reconnecting after a lost request or an expired session counts.
+#
+#   cd src && python -m benchmarks.lighting_throughput [commands] [latency_ms]
+
+import asyncio
+import sys
+import time
+from typing import Any, Dict, List
+
+from benchmarks.tapo_latency import STATES
+from benchmarks.tapo_standin import StandInBulb
+from system.services.lighting import Lighting
+
+
+def percentile(samples: List[float], fraction: float) -> float:
+    ordered = sorted(samples)
+    if not ordered:
+        return 0.0
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+async def measure(title: str, commands: int, **network: Any) -> None:
+    bulb = StandInBulb(seed=1, **network)
+    lighting = Lighting(await bulb.start(), "user@example.com", "password", max_rate=1000, command_timeout=2.0)
+    lighting.start()
+    await lighting.wait_online()
+
+    latencies, failed = [], 0
+    started = time.perf_counter()
+    for i in range(commands):
+        if not lighting.online():
+            await lighting.wait_online()
+        sent = time.perf_counter()
+        if await lighting.set(STATES[i % len(STATES)]):
+            latencies.append((time.perf_counter() - sent) * 1000)
+        else:
+            failed += 1
+    elapsed = time.perf_counter() - started
+
+    lighting.close()
+    await bulb.close()
+    print(f"{title}: {len(latencies) / elapsed:.1f} commands/s, p50={percentile(latencies, 0.5):.1f} ms "
+          f"p95={percentile(latencies, 0.95):.1f} ms p99={percentile(latencies, 0.99):.1f} ms, "
+          f"failed={failed}, lost={bulb.lost} expired={bulb.expired}")
+
+
+async def main(commands: int, latency_ms: float) -> None:
+    scenarios: Dict[str, Dict[str, Any]] = {
+        "clean": dict(),
+        "jitter": dict(jitter_ms=latency_ms * 2),
+        "loss 2%": dict(loss=0.02),
+        "session expiry 1 s": dict(session_lifetime=1.0),
+    }
+    for title, network in scenarios.items():
+        await measure(title, commands, latency_ms=latency_ms, **network)
+
+
+if __name__ == "__main__":
+    asyncio.run(main(int(sys.argv[1]) if len(sys.argv) > 1 else 200,
+                     float(sys.argv[2]) if len(sys.argv) > 2 else 10))
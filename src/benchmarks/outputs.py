@@ -0,0 +1,46 @@
+# Inter-output skew of synchronized VlcProjector outputs over a long clip.
+# Skew is sampled by OutputGroup itself, once per sync interval, from the
+# interpolated player clocks.
+#
+#   cd src && python -m benchmarks.outputs D:/Background/NeonTunnel.mp4 [outputs] [seconds]
+
+import asyncio
+import statistics
+import sys
+
+from PyQt6.QtWidgets import QApplication
+
+from system.services.projector import MAIN_OUTPUT, Media, OutputGroup, VlcProjector
+from system.services.projector.outputs import FRAME_MS
+
+
+def percentile(samples: list[float], fraction: float) -> float:
+    return samples[min(len(samples) - 1, int(len(samples) * fraction))]
+
+
+async def main(path: str, count: int, seconds: int) -> None:
+    names = [MAIN_OUTPUT] + [f"side{i}" for i in range(1, count)]
+    group = OutputGroup({name: VlcProjector() for name in names})
+    group.placeholder()
+    playback = asyncio.create_task(group.play(Media(path)))
+    await asyncio.sleep(seconds)
+    group.stop()
+    await playback
+
+    for name in names[1:]:
+        skews = sorted(abs(sample.skew_ms) for sample in group.skew if sample.output == name)
+        within = sum(skew <= FRAME_MS for skew in skews) / len(skews)
+        print(f"{name}: n={len(skews)} mean={statistics.mean(skews):.1f} ms p50={percentile(skews, 0.5):.1f} ms "
+              f"p95={percentile(skews, 0.95):.1f} ms max={skews[-1]:.1f} ms, within one frame {within:.1%}")
+
+
+if __name__ == "__main__":
+    from qasync import QEventLoop
+
+    app = QApplication(sys.argv)
+    loop = QEventLoop(app)
+    asyncio.set_event_loop(loop)
+    with loop:
+        loop.run_until_complete(main(sys.argv[1],
+                                     int(sys.argv[2]) if len(sys.argv) > 2 else 2,
+                                     int(sys.argv[3]) if len(sys.argv) > 3 else 600))
@@ -0,0 +1,64 @@
+# VLC vs GStreamer projector backends: time-to-first-frame, process CPU
+# while playing a (1080p) stream and seek latency.
+#
+#   cd src && python -m benchmarks.projectors D:/Background/InkWater.mp4 [backend ...]
+
+import asyncio
+import statistics
+import sys
+import time
+
+from PyQt6.QtWidgets import QApplication
+
+from system.services.projector import Media, Projector, create_projector
+
+PLAY_SECONDS = 10
+SEEK_TARGETS = [30000, 5000, 60000, 15000, 45000]
+SEEK_TOLERANCE = 100
+POLL_SECONDS = 0.005
+
+
+async def measure_cpu(projector: Projector, media: Media) -> tuple[float, float]:
+    playback = asyncio.create_task(projector.play(media))
+    await asyncio.sleep(1)
+    wall, cpu = time.perf_counter(), time.process_time()
+    await asyncio.sleep(PLAY_SECONDS)
+    usage = (time.process_time() - cpu) / (time.perf_counter() - wall) * 100
+    playback.cancel()
+    return projector.timings[-1].time_to_first_frame(), usage
+
+
+async def measure_seek(projector: Projector, target: int) -> float:
+    started = time.perf_counter()
+    projector.set_position(target)
+    while abs(projector.get_position() - target) > SEEK_TOLERANCE:
+        await asyncio.sleep(POLL_SECONDS)
+    return (time.perf_counter() - started) * 1000
+
+
+async def run(backend: str, media: Media) -> None:
+    projector = create_projector(backend)
+    projector.placeholder()
+    ttff, cpu = await measure_cpu(projector, media)
+    playback = asyncio.create_task(projector.play(media))
+    await asyncio.sleep(1)
+    seeks = [await measure_seek(projector, target) for target in SEEK_TARGETS]
+    playback.cancel()
+    projector.stop()
+    print(f"{backend}: time-to-first-frame={ttff:.1f} ms cpu={cpu:.1f} % "
+          f"seek mean={statistics.mean(seeks):.1f} ms max={max(seeks):.1f} ms")
+
+
+async def main(path: str, backends: list[str]) -> None:
+    for backend in backends or ["vlc", "gst"]:
+        await run(backend, Media(path))
+
+
+if __name__ == "__main__":
+    from qasync import QEventLoop
+
+    app = QApplication(sys.argv)
+    loop = QEventLoop(app)
+    asyncio.set_event_loop(loop)
+    with loop:
+        loop.run_until_complete(main(sys.argv[1], sys.argv[2:]))
@@ -0,0 +1,85 @@
+# CPU load and seek latency of VlcProjector playing the original files vs
+# their transcoded proxies. Proxies missing from the cache are transcoded
+# first, which can take a while for long clips.
+#
+#   cd src && python -m benchmarks.proxies D:/Background/NeonTunnel.mp4 ...
+
+import asyncio
+import statistics
+import sys
+import time
+from pathlib import Path
+
+from PyQt6.QtWidgets import QApplication
+
+from settings import cache_directory, ffmpeg, ffprobe
+from system.misc.workers import process_pool, shutdown_process_pool
+from system.services.media_probe import probe
+from system.services.projector import Media, VlcProjector
+from system.services.transcode import ProxyProfile, transcode
+
+CLIP_SECONDS = 5
+SEEK_FRACTIONS = [0.2, 0.4, 0.6, 0.8]
+POLL_SECONDS = 0.005
+
+
+async def cpu_percent(projector: VlcProjector, media: Media) -> float:
+    # VLC decodes on threads of this process, so process time covers it
+    playback = asyncio.create_task(projector.play(media))
+    await asyncio.sleep(1)
+    cpu, wall = time.process_time(), time.perf_counter()
+    await asyncio.sleep(CLIP_SECONDS)
+    load = (time.process_time() - cpu) / (time.perf_counter() - wall) * 100
+    playback.cancel()
+    return load
+
+
+async def seek_latency(projector: VlcProjector, media: Media, position: int) -> float:
+    playback = asyncio.create_task(projector.play(media, start_ms=position))
+    while projector.get_position() < position:
+        await asyncio.sleep(POLL_SECONDS)
+    await asyncio.sleep(0.5)
+    playback.cancel()
+    return projector.timings[-1].time_to_correct_frame()
+
+
+async def measure(projector: VlcProjector, source: str, duration_ms: int) -> tuple[float, list[float]]:
+    media = Media(source)
+    load = await cpu_percent(projector, media)
+    seeks = [await seek_latency(projector, media, int(duration_ms * fraction)) for fraction in SEEK_FRACTIONS]
+    return load, [seek for seek in seeks if seek is not None]
+
+
+def report(title: str, loads: list[float], seeks: list[float]) -> None:
+    print(f"{title}: cpu mean={statistics.mean(loads):.0f}% max={max(loads):.0f}%, "
+          f"seek n={len(seeks)} mean={statistics.mean(seeks):.1f} ms max={max(seeks):.1f} ms")
+
+
+async def main(files: list[str]) -> None:
+    loop = asyncio.get_event_loop()
+    directory = str(Path(cache_directory) / "proxies")
+    projector = VlcProjector()
+    projector.placeholder()
+    results = {"original": ([], []), "proxy": ([], [])}
+    for path in files:
+        info = await loop.run_in_executor(process_pool(), probe, path, ffprobe)
+        proxy = await loop.run_in_executor(process_pool(), transcode, path, directory, ProxyProfile(), ffmpeg)
+        for title, source in [("original", path), ("proxy", proxy)]:
+            load, seeks = await measure(projector, source, info.duration_ms)
+            print(f"{Path(path).name} {title}: cpu={load:.0f}% seek={statistics.mean(seeks):.1f} ms")
+            results[title][0].append(load)
+            results[title][1].extend(seeks)
+    for title, (loads, seeks) in results.items():
+        report(title, loads, seeks)
+    projector.stop()
+    shutdown_process_pool()
+
+
+if __name__ == "__main__":
+    from qasync import QEventLoop
+
+    app = QApplication(sys.argv)
+    loop = QEventLoop(app)
+    asyncio.set_event_loop(loop)
+    with loop:
+        loop.run_until_complete(main(sys.argv[1:]))
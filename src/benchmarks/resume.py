@@ -0,0 +1,64 @@
+# Resume-to-first-correct-frame latency of VlcProjector: the old
+# play + sleep(0.3) + set_position pattern vs opening at start_ms.
+#
+#   cd src && python -m benchmarks.resume 120000 D:/Background/Bubbles.mp4 ...
+
+import asyncio
+import statistics
+import sys
+import time
+
+from PyQt6.QtWidgets import QApplication
+
+from system.services.projector import Media, VlcProjector
+
+POLL_SECONDS = 0.005
+CLIP_SECONDS = 2
+
+
+async def wait_reached(projector: VlcProjector, position: int) -> None:
+    while projector.get_position() < position:
+        await asyncio.sleep(POLL_SECONDS)
+
+
+async def seek_after_sleep(projector: VlcProjector, media: Media, position: int) -> float:
+    started = time.perf_counter()
+    playback = asyncio.create_task(projector.play(media))
+    await asyncio.sleep(0.3)
+    projector.set_position(position)
+    await wait_reached(projector, position)
+    elapsed = (time.perf_counter() - started) * 1000
+    await asyncio.sleep(CLIP_SECONDS)
+    playback.cancel()
+    return elapsed
+
+
+async def start_at_offset(projector: VlcProjector, media: Media, position: int) -> float:
+    playback = asyncio.create_task(projector.play(media, start_ms=position))
+    await wait_reached(projector, position)
+    await asyncio.sleep(CLIP_SECONDS)
+    playback.cancel()
+    return projector.timings[-1].time_to_correct_frame()
+
+
+def report(title: str, samples: list[float]) -> None:
+    print(f"{title}: n={len(samples)} mean={statistics.mean(samples):.1f} ms "
+          f"min={min(samples):.1f} ms max={max(samples):.1f} ms")
+
+
+async def main(position: int, files: list[str]) -> None:
+    projector = VlcProjector()
+    projector.placeholder()
+    report("seek after sleep", [await seek_after_sleep(projector, Media(f), position) for f in files])
+    report("start offset", [await start_at_offset(projector, Media(f), position) for f in files])
+    projector.stop()
+
+
+if __name__ == "__main__":
+    from qasync import QEventLoop
+
+    app = QApplication(sys.argv)
+    loop = QEventLoop(app)
+    asyncio.set_event_loop(loop)
+    with loop:
+        loop.run_until_complete(main(int(sys.argv[1]), sys.argv[2:]))
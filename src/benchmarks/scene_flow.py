@@ -0,0 +1,57 @@
+# Runs the ActiveChallenge game flow through SceneManager and the action
+# executor on a NullProjector, without a display, VLC or media files.
+#
+#   cd src && QT_QPA_PLATFORM=offscreen python -m benchmarks.scene_flow [runs]
+
+import asyncio
+import statistics
+import sys
+import time
+
+from PyQt6.QtWidgets import QApplication
+
+from scenes import ActiveChallenge
+from system.scene import Scene, SceneManager
+from system.services.projector import NullProjector
+
+
+async def run_game(manager: SceneManager, scene_id: int, scene: ActiveChallenge) -> float:
+    finished = asyncio.get_event_loop().create_future()
+
+    def state_changed(changed_id: int) -> None:
+        state = manager.get_scene_description(changed_id).state
+        if changed_id == scene_id and state == Scene.State.Idle and not finished.done():
+            finished.set_result(None)
+
+    manager.scene_state_changed.connect(state_changed)
+    started = time.perf_counter()
+    scene.run_action(scene.game_in_progress())
+    await finished
+    manager.scene_state_changed.disconnect(state_changed)
+    return (time.perf_counter() - started) * 1000
+
+
+async def main(runs: int) -> None:
+    display = NullProjector(autorun=True, default_duration=70000)
+    manager = SceneManager(display)
+    manager.register_scene(ActiveChallenge)
+    scene_id, = [it.id for it in manager.get_registered_scenes()]
+    manager.start_scene(scene_id)
+    scene = manager._get_scene(scene_id).scene
+    scene.ui.cb_timeout.setChecked(False)
+
+    samples = [await run_game(manager, scene_id, scene) for _ in range(runs)]
+    errors = [report.error() for report in display.cues.reports]
+    print(f"game_in_progress: n={runs} mean={statistics.mean(samples):.1f} ms "
+          f"max={max(samples):.1f} ms, cue error max={max(errors)} ms")
+    manager.teardown()
+
+
+if __name__ == "__main__":
+    from qasync import QEventLoop
+
+    app = QApplication(sys.argv)
+    loop = QEventLoop(app)
+    asyncio.set_event_loop(loop)
+    with loop:
+        loop.run_until_complete(main(int(sys.argv[1]) if len(sys.argv) > 1 else 10))
@@ -0,0 +1,58 @@
+# Command-to-visible latency of Lighting on the local Tapo stand-in: one
+# composite set_device_info per state vs firmware that needs a request per
+# field, and how many intermediate states the bulb shows on the way.
+#
+#   cd src && python -m benchmarks.tapo_latency [commands] [latency_ms]
+
+import asyncio
+import statistics
+import sys
+import time
+from typing import Any, Callable, Dict
+
+from benchmarks.tapo_standin import StandInBulb
+from system.services.lighting import Light, Lighting
+
+STATES = [
+    Light(Light.Type.COLOR, hue=180, saturation=100, brightness=100),
+    Light(Light.Type.TEMP, temperature=3620, brightness=60),
+    Light(Light.Type.COLOR, hue=0, saturation=100, brightness=30),
+]
+
+
+def shown(light: Light) -> Callable[[Dict[str, Any]], bool]:
+    if light.type is Light.Type.TEMP:
+        return lambda state: (state["color_temp"], state["brightness"]) == (light.temperature, light.brightness)
+    return lambda state: (state["color_temp"], state["hue"], state["saturation"], state["brightness"]) \
+        == (0, light.hue, light.saturation, light.brightness)
+
+
+async def measure(composite: bool, commands: int, latency_ms: float) -> None:
+    bulb = StandInBulb(latency_ms=latency_ms, composite=composite)
+    lighting = Lighting(await bulb.start(), "user@example.com", "password", max_rate=1000)
+    lighting.start()
+    await lighting.wait_online()
+    latencies, intermediate = [], 0
+    for i in range(commands):
+        light = STATES[i % len(STATES)]
+        visible = bulb.wait_state(shown(light))
+        changes = len(bulb.changes)
+        started = time.perf_counter()
+        await lighting.set(light)
+        latencies.append((await visible - started) * 1000)
+        intermediate += len(bulb.changes) - changes - 1
+    lighting.close()
+    await bulb.close()
+    print(f"{'composite' if composite else 'per field'}: n={commands} mean={statistics.mean(latencies):.1f} ms "
+          f"max={max(latencies):.1f} ms, round-trips={lighting.stats.requests}, "
+          f"intermediate states={intermediate}")
+
+
+async def main(commands: int, latency_ms: float) -> None:
+    await measure(True, commands, latency_ms)
+    await measure(False, commands, latency_ms)
+
+
+if __name__ == "__main__":
+    asyncio.run(main(int(sys.argv[1]) if len(sys.argv) > 1 else 10,
+                     float(sys.argv[2]) if len(sys.argv) > 2 else 10))
@@ -0,0 +1,207 @@
+# Local stand-in for a Tapo L530: the handshake, login_device and
+# securePassthrough requests of the bulb's HTTP protocol over asyncio, with
+# a configurable response latency and jitter, requests lost on the network
+# (the connection drops without an answer) and sessions expiring after
+# session_lifetime seconds. Devices that reject combined set_device_info
+# fields can be emulated with composite=False.
+#
+# Runs on its own for pointing the app at it from settings.bulb_settings:
+#
+#   cd src && python -m benchmarks.tapo_standin [port] [latency_ms] [jitter_ms] [loss]
+
+import asyncio
+import json
+import random
+import secrets
+import sys
+import time
+from base64 import b64decode, b64encode
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from Crypto.Cipher import AES, PKCS1_v1_5
+from Crypto.PublicKey import RSA
+from Crypto.Util.Padding import pad, unpad
+
+from system.services.tapo import COOKIE_NAME
+
+INVALID_PARAMS = -1008
+SESSION_EXPIRED = 9999
+
+
+@dataclass
+class _Session:
+    key: bytes
+    iv: bytes
+    token: Optional[str] = None
+    created_at: float = field(default_factory=time.monotonic)
+
+    def encrypt(self, data: str) -> str:
+        cipher = AES.new(self.key, AES.MODE_CBC, self.iv)
+        return b64encode(cipher.encrypt(pad(data.encode(), AES.block_size))).decode()
+
+    def decrypt(self, data: str) -> str:
+        # PyP100 leaves block-aligned requests unpadded, the bulb accepts them
+        cipher = AES.new(self.key, AES.MODE_CBC, self.iv)
+        text = cipher.decrypt(b64decode(data))
+        try:
+            return unpad(text, AES.block_size).decode()
+        except ValueError:
+            return text.decode()
+
+
+@dataclass
+class StandInBulb:
+    latency_ms: float = 20.0
+    # extra delay drawn uniformly from [0, jitter_ms] for every request
+    jitter_ms: float = 0.0
+    # fraction of requests lost on the way
+    loss: float = 0.0
+    session_lifetime: Optional[float] = None
+    composite: bool = True
+    seed: Optional[int] = None
+    state: Dict[str, Any] = field(default_factory=lambda: {
+        "device_on": True, "brightness": 100, "hue": 0, "saturation": 100, "color_temp": 3620})
+    # (perf_counter, state) after every accepted set_device_info
+    changes: List[Tuple[float, Dict[str, Any]]] = field(default_factory=list)
+    requests: int = 0
+    lost: int = 0
+    expired: int = 0
+
+    def __post_init__(self):
+        self._random = random.Random(self.seed)
+        self._sessions: Dict[str, _Session] = dict()
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._connections: List[asyncio.Task] = []
+        self._watchers: List[Tuple[Callable[[Dict[str, Any]], bool], asyncio.Future]] = []
+
+    async def start(self, host: str = "127.0.0.1", port: int = 0) -> str:
+        self._server = await asyncio.start_server(self._serve, host, port)
+        host, port = self._server.sockets[0].getsockname()[:2]
+        return f"{host}:{port}"
+
+    async def close(self) -> None:
+        if self._server is not None:
+            self._server.close()
+        for connection in self._connections:
+            connection.cancel()
+        await asyncio.gather(*self._connections, return_exceptions=True)
+
+    def wait_state(self, matches: Callable[[Dict[str, Any]], bool]) -> asyncio.Future:
+        # resolves with the time the bulb showed a matching state
+        future = asyncio.get_event_loop().create_future()
+        if matches(self.state):
+            future.set_result(time.perf_counter())
+        else:
+            self._watchers.append((matches, future))
+        return future
+
+    def expire_sessions(self) -> None:
+        # like the bulb forgetting its sessions after a power cycle
+        self._sessions.clear()
+
+    # ===== HTTP =====
+
+    async def _serve(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        self._connections.append(asyncio.current_task())
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                path = request_line.split()[1].decode()
+                headers = dict()
+                while (line := await reader.readline()) not in (b"\r\n", b""):
+                    name, value = line.decode().split(":", 1)
+                    headers[name.strip().lower()] = value.strip()
+                body = json.loads(await reader.readexactly(int(headers.get("content-length", 0))))
+                await asyncio.sleep((self.latency_ms + self._random.uniform(0, self.jitter_ms)) / 1000)
+                if self._random.random() < self.loss:
+                    self.lost += 1
+                    break
+                response, cookie = self._handle(path, headers.get("cookie", ""), body)
+                self._write(writer, response, cookie)
+                await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError, asyncio.CancelledError):
+            pass
+        finally:
+            writer.close()
+            self._connections.remove(asyncio.current_task())
+
+    @staticmethod
+    def _write(writer: asyncio.StreamWriter, response: Dict[str, Any], cookie: Optional[str]) -> None:
+        content = json.dumps(response).encode()
+        head = ["HTTP/1.1 200 OK", "Content-Type: application/json", f"Content-Length: {len(content)}"]
+        if cookie is not None:
+            head.append(f"Set-Cookie: {COOKIE_NAME}={cookie};TIMEOUT=86400")
+        writer.write(("\r\n".join(head) + "\r\n\r\n").encode() + content)
+
+    # ===== Tapo protocol =====
+
+    def _handle(self, path: str, cookie: str, body: Dict[str, Any]) -> Tuple[Dict[str, Any], Optional[str]]:
+        self.requests += 1
+        if body["method"] == "handshake":
+            session_id = secrets.token_hex(16)
+            session = _Session(secrets.token_bytes(16), secrets.token_bytes(16))
+            self._sessions[session_id] = session
+            client_key = PKCS1_v1_5.new(RSA.importKey(body["params"]["key"]))
+            key = b64encode(client_key.encrypt(session.key + session.iv)).decode()
+            return {"error_code": 0, "result": {"key": key}}, session_id
+
+        session = self._sessions.get(cookie.partition("=")[2])
+        if session is not None and self.session_lifetime is not None \
+                and time.monotonic() - session.created_at > self.session_lifetime:
+            self.expired += 1
+            self._sessions.pop(cookie.partition("=")[2])
+            session = None
+        if body["method"] != "securePassthrough" or session is None:
+            return {"error_code": SESSION_EXPIRED}, None
+        request = json.loads(session.decrypt(body["params"]["request"]))
+        if request["method"] != "login_device" and f"token={session.token}" not in path:
+            return {"error_code": SESSION_EXPIRED}, None
+        result = self._call(session, request["method"], request.get("params", {}))
+        return {"error_code": 0, "result": {"response": session.encrypt(json.dumps(result))}}, None
+
+    def _call(self, session: _Session, method: str, params: Dict[str, Any]) -> Dict[str, Any]:
+        if method == "login_device":
+            session.token = secrets.token_hex(16)
+            return {"error_code": 0, "result": {"token": session.token}}
+        if method == "get_device_info":
+            return {"error_code": 0, "result": dict(self.state)}
+        if method == "set_device_info":
+            combined = len(params) > 1 and ("device_on" in params or "brightness" in params)
+            if combined and not self.composite:
+                return {"error_code": INVALID_PARAMS}
+            self.state.update(params)
+            self._changed()
+            return {"error_code": 0}
+        return {"error_code": INVALID_PARAMS}
+
+    def _changed(self) -> None:
+        at = time.perf_counter()
+        self.changes.append((at, dict(self.state)))
+        waiting = []
+        for matches, future in self._watchers:
+            if future.done():
+                continue
+            if matches(self.state):
+                future.set_result(at)
+            else:
+                waiting.append((matches, future))
+        self._watchers = waiting
+
+
+async def serve(port: int, latency_ms: float, jitter_ms: float, loss: float) -> None:
+    bulb = StandInBulb(latency_ms=latency_ms, jitter_ms=jitter_ms, loss=loss)
+    print(f"Tapo stand-in listening on {await bulb.start('0.0.0.0', port)}, any login and password")
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await bulb.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(serve(int(sys.argv[1]) if len(sys.argv) > 1 else 8080,
+                      float(sys.argv[2]) if len(sys.argv) > 2 else 20,
+                      float(sys.argv[3]) if len(sys.argv) > 3 else 0,
+                      float(sys.argv[4]) if len(sys.argv) > 4 else 0))
@@ -0,0 +1,52 @@
+# Time-to-first-frame of VlcProjector cuts, cold vs prerolled.
+#
+#   cd src && python -m benchmarks.ttff D:/NotGames/Неигры.mp4 D:/Background/Bubbles.mp4 ...
+
+import asyncio
+import statistics
+import sys
+
+from PyQt6.QtWidgets import QApplication
+
+from system.services.projector import Media, VlcProjector
+
+CLIP_SECONDS = 3
+
+
+async def run_cuts(projector: VlcProjector, files: list[str], preroll: bool) -> list[float]:
+    for i, path in enumerate(files):
+        playback = asyncio.create_task(projector.play(Media(path)))
+        await asyncio.sleep(0.5)
+        if preroll and i + 1 < len(files):
+            await projector.preroll(Media(files[i + 1]))
+        await asyncio.sleep(CLIP_SECONDS)
+        playback.cancel()
+    timings = list(projector.timings)[-len(files):]
+    return [t.time_to_first_frame() for t in timings
+            if t.prerolled == preroll and t.time_to_first_frame() is not None]
+
+
+def report(title: str, samples: list[float]) -> None:
+    if not samples:
+        print(f"{title}: no samples")
+        return
+    print(f"{title}: n={len(samples)} mean={statistics.mean(samples):.1f} ms "
+          f"min={min(samples):.1f} ms max={max(samples):.1f} ms")
+
+
+async def main(files: list[str]) -> None:
+    projector = VlcProjector()
+    projector.placeholder()
+    report("cold", await run_cuts(projector, files, preroll=False))
+    report("preroll", await run_cuts(projector, files, preroll=True))
+    projector.stop()
+
+
+if __name__ == "__main__":
+    from qasync import QEventLoop
+
+    app = QApplication(sys.argv)
+    loop = QEventLoop(app)
+    asyncio.set_event_loop(loop)
+    with loop:
+        loop.run_until_complete(main(sys.argv[1:]))
@@ -1,10 +1,13 @@
 import asyncio
+from typing import Optional
 
 from PyQt6.QtWidgets import QDialog
 
 from system.scene import Scene, action
+from system.services.cue_sheet import Timeline, load_cue_sheet
 from system.services.lighting import Light
-from system.services.projector import Media, VlcProjector
+from system.services.lighting_effects import pulse
+from system.services.projector import Media
 from .active_challenge_ui import Ui_ActiveChallenge
 
 USUAL_GAME = Media("D:/NotGames/Обычное испытание.mp4")
@@ -14,14 +17,20 @@ SUCCESS = Media("D:/NotGames/Выполнено 0.wav")
 
 # neutral white
 DEFAULT_LIGHT = Light(Light.Type.TEMP, temperature=3620, brightness=100)
+# red, pulsing until the action that started it finishes
+FAILURE_PULSE = pulse(Light(Light.Type.COLOR, hue=0, saturation=100, brightness=100), period=1.5, low=20)
 
 
 class ActiveChallenge(Scene, QDialog):
     NAME = "Испытание"
+    SOUNDS = [FAILURE, SUCCESS]
 
     def __init__(self):
         Scene.__init__(self)
         QDialog.__init__(self)
+        self._timeline: Optional[Timeline] = None
+        self._playing: Optional[asyncio.Task] = None
+        self._pulse: Optional[asyncio.Task] = None
         self.ui = Ui_ActiveChallenge()
         self.ui.setupUi(self)
 
@@ -70,6 +79,16 @@ class ActiveChallenge(Scene, QDialog):
         self.ui.btn_stop.setEnabled(False)
         self.ui.btn_fail.setEnabled(False)
         self.ui.btn_success.setEnabled(False)
+        if self._playing is not None:
+            self._playing.cancel()
+            self._playing = None
+        if self._timeline is not None:
+            self._timeline.cancel()
+            self._timeline = None
+        # the pulse ends with the action, also when the action is interrupted
+        if self._pulse is not None:
+            self._pulse.cancel()
+            self._pulse = None
         stage.lighting.set(DEFAULT_LIGHT)
         stage.display.reset()
 
@@ -81,36 +100,26 @@ class ActiveChallenge(Scene, QDialog):
         final = self.ui.cb_final.isChecked()
         timeout = self.ui.cb_timeout.isChecked()
 
-        stage.lighting.set(Light(  # pre-game color: turquoise
-            Light.Type.COLOR, hue=180, saturation=100, brightness=100))
-
-        if final:
-            asyncio.create_task(stage.display.play(FINAL_GAME))
-            await stage.display.wait_position(6200)
-        else:
-            asyncio.create_task(stage.display.play(USUAL_GAME))
-            await stage.display.wait_position(5050)
+        # lighting and game events are timed by the cue sheet of the media
+        media = FINAL_GAME if final else USUAL_GAME
+        self._timeline = Timeline(load_cue_sheet(media), stage.display, stage.lighting,
+                                  telemetry=self.context.manager.get_telemetry())
+        self._playing = await self._timeline.play(media)
 
+        await self._timeline.wait("game_started")
         self.ui.btn_fail.setEnabled(True)
         self.ui.btn_success.setEnabled(True)
 
-        stage.lighting.set(Light(  # game color: neutral white
-            Light.Type.TEMP, temperature=3620, brightness=100))
-
-        if final:
-            await stage.display.wait_position(68500)
-        else:
-            await stage.display.wait_position(67500)
+        await self._timeline.wait("game_over")
 
         self.ui.btn_stop.setEnabled(False)
         self.ui.btn_fail.setEnabled(False)
         self.ui.btn_success.setEnabled(False)
 
         if not final and timeout:
-            asyncio.create_task(VlcProjector().play(FAILURE))
+            stage.sfx.play(FAILURE)
             await asyncio.sleep(1)
-            stage.lighting.set(Light(  # failure: red
-                Light.Type.COLOR, hue=0, saturation=100, brightness=100))
+            self._pulse = stage.lighting.play(FAILURE_PULSE)
             await asyncio.sleep(5)
 
     @action(game_finished)
@@ -119,16 +128,15 @@ class ActiveChallenge(Scene, QDialog):
         stage.display.pause()
         stage.lighting.set(Light(  # success: gold
             Light.Type.COLOR, hue=41, saturation=27, brightness=100))
-        await asyncio.create_task(VlcProjector().play(SUCCESS))
+        await stage.sfx.play(SUCCESS)
         await asyncio.sleep(8)
 
     @action(game_finished)
     async def game_failed(self):
         stage = self.context.get_stage()
         stage.display.pause()
-        asyncio.create_task(VlcProjector().play(FAILURE))
-        stage.lighting.set(Light(  # failure: red
-            Light.Type.COLOR, hue=0, saturation=100, brightness=100))
+        stage.sfx.play(FAILURE)
+        self._pulse = stage.lighting.play(FAILURE_PULSE)
         await asyncio.sleep(8)
 
     @action()
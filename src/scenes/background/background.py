@@ -1,36 +1,60 @@
 import asyncio
 from dataclasses import dataclass, asdict
+from pathlib import Path
 from typing import Optional
 
-from PyQt6.QtCore import QItemSelection, pyqtSlot
+from PyQt6.QtCore import QItemSelection, QSize, pyqtSlot
 from PyQt6.QtWidgets import QDialog, QHeaderView
 
-from system.qt import AnyDictTableModel, SimpleColumn
+from settings import background_directory, default_light
+from system.qt import AnyDictTableModel, SimpleColumn, ThumbnailColumn
 from system.scene import Scene, action
+from system.services.beat_grids import beat_cue_sheet
+from system.services.catalog import MediaCatalog, normalize_path
+from system.services.color_tracks import follow
+from system.services.cue_sheet import Timeline
+from system.services.lighting import Light
 from system.services.projector import Media
 from .background_ui import Ui_Background
 
 
+# How the room lighting follows a video: pulses on the beat of its music
+# or the dominant color of the picture
+BEATS = "beats"
+AMBILIGHT = "ambilight"
+
+
 @dataclass
 class VideoItem:
     name: str
     file: Media
+    lighting: str = AMBILIGHT
     time: int = 0
     id: int = -1
 
 
+# Every video the catalog finds in background_directory is listed, the ones
+# in LIBRARY first under their own name and lighting, wherever they are kept
 LIBRARY = [
-    VideoItem("Лавовая лампа", Media("D:/Background/Bubbles.mp4")),
-    VideoItem("Лазер", Media("D:/Background/NeonTunnel.mp4")),
+    VideoItem("Лавовая лампа", Media("D:/Background/Bubbles.mp4"), BEATS),
+    VideoItem("Лазер", Media("D:/Background/NeonTunnel.mp4"), BEATS),
     VideoItem("Облака в воде", Media("D:/Background/InkWater.mp4")),
     VideoItem("Пираты карибского моря", Media("D:/NotGames/src/pirates.mp4"))
 ]
 
+# pulses on the beat of the music, violet
+BEAT_LIGHT = Light(Light.Type.COLOR, hue=280, saturation=100, brightness=100)
+
 
 class Background(Scene, QDialog):
     NAME = "Окружение"
+    MEDIA = [item.file for item in LIBRARY]
     _items: dict[int, VideoItem] = dict()
     _current_item: Optional[int] = None
+    _listed: set[str] = set()
+    _catalog: Optional[MediaCatalog] = None
+    _timeline: Optional[Timeline] = None
+    _ambilight: Optional[asyncio.Task] = None
 
     def __init__(self):
         Scene.__init__(self)
@@ -39,29 +63,57 @@ class Background(Scene, QDialog):
         self.ui.setupUi(self)
 
         self.model = AnyDictTableModel()
+        self._thumbnail_column = ThumbnailColumn("path", "")
+        self.model.registerColumn(self._thumbnail_column)
         self.model.registerColumn(SimpleColumn("name", "Название"))
+        self.model.registerColumn(SimpleColumn("duration", "Длительность"))
         self.model.registerColumn(SimpleColumn("time", "Время"))
         self.model.setIdColumn("id")
         self.ui.tbl_fragments.setModel(self.model)
 
-        auto_inc = 0
-        for item in LIBRARY:
-            auto_inc += 1
-            item.id = auto_inc
-            self._items[auto_inc] = item
-        self.model.replaceRows([asdict(it) for it in self._items.values()])
-
+        self.ui.tbl_fragments.setIconSize(QSize(96, 54))
+        self.ui.tbl_fragments.verticalHeader().setDefaultSectionSize(58)
         headerView = self.ui.tbl_fragments.horizontalHeader()
-        headerView.setSectionResizeMode(0, QHeaderView.ResizeMode.Stretch)
+        headerView.setSectionResizeMode(0, QHeaderView.ResizeMode.ResizeToContents)
+        headerView.setSectionResizeMode(1, QHeaderView.ResizeMode.Stretch)
         headerView.setMinimumSectionSize(100)
 
         self.ui.tbl_fragments.selectionModel().selectionChanged.connect(self.on_item_selected)
         self.ui.btn_start.clicked.connect(self.on_start_click)
         self.ui.btn_stop.clicked.connect(self.on_stop_click)
 
+    def _add_item(self, item: VideoItem) -> None:
+        item.id = len(self._items) + 1
+        self._items[item.id] = item
+        self._listed.add(normalize_path(item.file.path))
+
+    def _row(self, item: VideoItem) -> dict:
+        row = asdict(item)
+        row["path"] = item.file.path
+        row["duration"] = "" if self._catalog is None else self._catalog.describe(item.file.path)
+        return row
+
     def on_start(self):
+        self._catalog = self.context.manager.get_catalog()
+        self._catalog.entries_changed.connect(self.on_catalog_changed)
+        self._thumbnail_column.setThumbnails(self.context.manager.get_thumbnails())
+        self.on_catalog_changed()
         self.show()
 
+    @pyqtSlot()
+    def on_catalog_changed(self) -> None:
+        library = {normalize_path(item.file.path): item for item in LIBRARY}
+        entries = [self._catalog.get(path) for path in library] + self._catalog.query(background_directory)
+        found = [entry for entry in entries if entry is not None and entry.path not in self._listed
+                 and entry.error is None and entry.width is not None]
+        for entry in found:
+            if entry.path not in self._listed:
+                self._add_item(library.get(entry.path) or VideoItem(Path(entry.path).stem, Media(entry.path)))
+        if found:
+            self.model.replaceRows([self._row(it) for it in self._items.values()])
+        else:
+            self.model.updateRecords([self._row(it) for it in self._items.values()])
+
     def get_selected_item(self) -> Optional[int]:
         selection = self.ui.tbl_fragments.selectionModel().selection()
         if selection.isEmpty():
@@ -85,6 +137,7 @@ class Background(Scene, QDialog):
         self.run_action(self.stop_playing())
 
     def on_stop(self):
+        self._catalog.entries_changed.disconnect(self.on_catalog_changed)
         self.hide()
 
     def reject(self) -> None:
@@ -95,7 +148,15 @@ class Background(Scene, QDialog):
         item = self._items[self._current_item]
         item.time = stage.display.get_position()
         if reason != Scene.StopReason.LocalIntercept:
-            stage.display.stop()
+            stage.outputs.stop()
+        if self._timeline is not None or self._ambilight is not None:
+            if self._timeline is not None:
+                self._timeline.cancel()
+                self._timeline = None
+            if self._ambilight is not None:
+                self._ambilight.cancel()
+                self._ambilight = None
+            stage.lighting.set(default_light)
         self.model.updateRecord(asdict(item))
         self.ui.btn_stop.setEnabled(False)
 
@@ -104,9 +165,24 @@ class Background(Scene, QDialog):
         stage = self.context.get_stage()
         self._current_item = item_id
         item = self._items[item_id]
-        task = asyncio.create_task(stage.display.play(item.file))
-        await asyncio.sleep(0.3)
-        stage.display.set_position(item.time)
+        # lighting follows the video once it is analysed
+        grid = self.context.manager.get_beat_grids().get(item.file.path)
+        track = self.context.manager.get_color_tracks().get(item.file.path)
+        if item.lighting == BEATS and grid is not None and grid.beats:
+            self._timeline = Timeline(beat_cue_sheet(grid, BEAT_LIGHT, start_ms=item.time),
+                                      stage.display, stage.lighting, telemetry=self.context.manager.get_telemetry())
+            task = await self._timeline.play(item.file, start_ms=item.time, outputs=stage.outputs)
+        elif item.lighting == AMBILIGHT and track is not None and track.positions:
+            # follow the track once play() has reset the clock, like the beat cues
+            reset = stage.display.clock.next_reset()
+            task = asyncio.create_task(stage.outputs.play(item.file, start_ms=item.time))
+            await asyncio.wait([reset, task], return_when=asyncio.FIRST_COMPLETED)
+            if reset.done() and not task.done():
+                self._ambilight = asyncio.create_task(follow(track, stage.display, stage.lighting))
+            else:  # play() failed or was stopped before the media started
+                reset.cancel()
+        else:
+            task = asyncio.create_task(stage.outputs.play(item.file, start_ms=item.time))
         self.ui.btn_stop.setEnabled(True)
         await task
         self.ui.btn_stop.setEnabled(False)
@@ -114,4 +190,4 @@ class Background(Scene, QDialog):
     @action()
     async def stop_playing(self):
         stage = self.context.get_stage()
-        stage.display.stop()
+        stage.outputs.stop()
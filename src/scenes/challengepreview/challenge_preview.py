@@ -1,12 +1,15 @@
 import asyncio
 from dataclasses import dataclass, asdict
+from pathlib import Path
 from typing import Optional
 
-from PyQt6.QtCore import QItemSelection, pyqtSlot
+from PyQt6.QtCore import QItemSelection, QSize, pyqtSlot
 from PyQt6.QtWidgets import QDialog, QHeaderView
 
-from system.qt import AnyDictTableModel, SimpleColumn
+from settings import challenge_directory
+from system.qt import AnyDictTableModel, SimpleColumn, ThumbnailColumn
 from system.scene import Scene, action
+from system.services.catalog import MediaCatalog, normalize_path
 from system.services.lighting import Light
 from system.services.projector import Media
 from .challenge_preview_ui import Ui_ChallengePreview
@@ -26,13 +29,19 @@ class VideoItem:
 
 from .settings import LIBRARY
 
+# Every video the catalog finds in these folders is listed, the ones in
+# LIBRARY first under their own name
+DIRECTORIES = [f"{challenge_directory}/Одиночные", f"{challenge_directory}/Совместные"]
 OPENING = Media("D:/NotGames/Неигры.mp4")
 
 
 class ChallengePreview(Scene, QDialog):
     NAME = "Демонстрация"
+    MEDIA = [OPENING] + [item.file for item in LIBRARY]
     _items: dict[int, VideoItem] = dict()
     _current_item: Optional[int] = None
+    _listed: set[str] = set()
+    _catalog: Optional[MediaCatalog] = None
 
     def __init__(self):
         Scene.__init__(self)
@@ -41,19 +50,18 @@ class ChallengePreview(Scene, QDialog):
         self.ui.setupUi(self)
 
         self.model = AnyDictTableModel()
+        self._thumbnail_column = ThumbnailColumn("path", "")
+        self.model.registerColumn(self._thumbnail_column)
         self.model.registerColumn(SimpleColumn("name", "Название"))
+        self.model.registerColumn(SimpleColumn("duration", "Длительность"))
         self.model.setIdColumn("id")
         self.ui.tbl_challenges.setModel(self.model)
 
-        auto_inc = 0
-        for item in LIBRARY:
-            auto_inc += 1
-            item.id = auto_inc
-            self._items[auto_inc] = item
-        self.model.replaceRows([asdict(it) for it in self._items.values()])
-
+        self.ui.tbl_challenges.setIconSize(QSize(96, 54))
+        self.ui.tbl_challenges.verticalHeader().setDefaultSectionSize(58)
         headerView = self.ui.tbl_challenges.horizontalHeader()
-        headerView.setSectionResizeMode(0, QHeaderView.ResizeMode.Stretch)
+        headerView.setSectionResizeMode(0, QHeaderView.ResizeMode.ResizeToContents)
+        headerView.setSectionResizeMode(1, QHeaderView.ResizeMode.Stretch)
         headerView.setMinimumSectionSize(100)
 
         self.ui.tbl_challenges.selectionModel().selectionChanged.connect(self.on_item_selected)
@@ -61,9 +69,40 @@ class ChallengePreview(Scene, QDialog):
         self.ui.btn_pause.clicked.connect(self.on_pause_click)
         self.ui.btn_stop.clicked.connect(self.on_stop_click)
 
+    def _add_item(self, item: VideoItem) -> None:
+        item.id = len(self._items) + 1
+        self._items[item.id] = item
+        self._listed.add(normalize_path(item.file.path))
+
+    def _row(self, item: VideoItem) -> dict:
+        row = asdict(item)
+        row["path"] = item.file.path
+        row["duration"] = "" if self._catalog is None else self._catalog.describe(item.file.path)
+        return row
+
     def on_start(self):
+        self._catalog = self.context.manager.get_catalog()
+        self._catalog.entries_changed.connect(self.on_catalog_changed)
+        self._thumbnail_column.setThumbnails(self.context.manager.get_thumbnails())
+        self.on_catalog_changed()
         self.show()
 
+    @pyqtSlot()
+    def on_catalog_changed(self) -> None:
+        library = {normalize_path(item.file.path): item for item in LIBRARY}
+        entries = [self._catalog.get(path) for path in library]
+        for directory in DIRECTORIES:
+            entries += self._catalog.query(directory)
+        found = [entry for entry in entries if entry is not None and entry.path not in self._listed
+                 and entry.error is None and entry.width is not None]
+        for entry in found:
+            if entry.path not in self._listed:
+                self._add_item(library.get(entry.path) or VideoItem(Path(entry.path).stem, Media(entry.path)))
+        if found:
+            self.model.replaceRows([self._row(it) for it in self._items.values()])
+        else:
+            self.model.updateRecords([self._row(it) for it in self._items.values()])
+
     def get_selected_item(self) -> Optional[int]:
         selection = self.ui.tbl_challenges.selectionModel().selection()
         if selection.isEmpty():
@@ -90,6 +129,7 @@ class ChallengePreview(Scene, QDialog):
         self.run_action(self.stop_playing())
 
     def on_stop(self):
+        self._catalog.entries_changed.disconnect(self.on_catalog_changed)
         self.hide()
 
     def reject(self) -> None:
@@ -104,16 +144,16 @@ class ChallengePreview(Scene, QDialog):
     @action(on_stop_playing)
     async def play_item(self, item_id: int):
         stage = self.context.get_stage()
-        await stage.display.play(OPENING)
+        item = self._items[item_id]
+        start_ms = item.time if item.pause else 0
+        opening = asyncio.create_task(stage.display.play(OPENING))
+        await stage.display.preroll(item.file, start_ms=start_ms)
+        await opening
         stage.lighting.set(Light(  # color: turquoise
             Light.Type.COLOR, hue=180, saturation=100, brightness=100))
         self._current_item = item_id
-        item = self._items[item_id]
-        task = asyncio.create_task(stage.display.play(item.file))
-        if item.pause:
-            await asyncio.sleep(0.3)
-            stage.display.set_position(item.time)
-            item.pause = False
+        task = asyncio.create_task(stage.display.play(item.file, start_ms=start_ms))
+        item.pause = False
         self.ui.btn_pause.setEnabled(True)
         self.ui.btn_stop.setEnabled(True)
         await task
@@ -1,11 +1,37 @@
 from system.services.lighting import Light
 
-# TP-Link Tapo L530E
-bulb_settings = {
-    "ip": "",
-    "login": "",
-    "password": "",
-}
+# Media library scanned by the catalog, cache files are kept under cache_directory.
+# The scenes list the videos the catalog finds in their directory
+background_directory = "D:/Background"
+challenge_directory = "D:/NotGames"
+media_directories = [background_directory, challenge_directory]
+cache_directory = "cache"
+ffprobe = "ffprobe"
+ffmpeg = "ffmpeg"
+# Play transcoded proxies (one codec, 720p, dense keyframes) once they are ready
+use_proxies = True
+
+# "vlc", "gst" (GStreamer playbin3) or "null" (headless, simulated time)
+projector_backend = "vlc"
+# Projector outputs by name and the screen index each one is shown on,
+# side screens play in sync with "main", e.g. {"main": 1, "left": 2}
+projector_outputs = {"main": 0}
+
+# TP-Link Tapo L530E bulbs by name, every lighting state is sent to all of them
+bulb_settings = [
+    {
+        "name": "main",
+        "ip": "",
+        "login": "",
+        "password": "",
+    },
+]
+
+# Art-Net (DMX over UDP) nodes by name, driven together with the bulbs.
+# Fixture profiles are listed in system/services/artnet.py, e.g.
+# {"name": "stage", "target": "192.168.1.50", "frame_rate": 40,
+#  "fixtures": [{"name": "par1", "universe": 0, "address": 1, "profile": "drgb"}]}
+artnet_settings = []
 
 default_light = Light(
     type=Light.Type.TEMP, temperature=3620, brightness=100)
@@ -1 +0,0 @@
-from .main_window import MainWindow
\ No newline at end of file
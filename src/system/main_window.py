@@ -8,6 +8,7 @@ from system.qt import AnyDictTableModel
 from system.qt import SimpleColumn
 from system.scene import SceneManager
 from system.scene import Scene
+from .telemetry_panel import TelemetryPanel
 
 
 class MainWindow(QMainWindow):
@@ -33,6 +34,8 @@ class MainWindow(QMainWindow):
         self.ui.tbl_scenes.selectionModel().selectionChanged.connect(self.on_scene_selected)
         self.ui.btn_start.clicked.connect(self.start_selected_scene)
         self.ui.btn_stop.clicked.connect(self.stop_selected_scene)
+        self.ui.btn_telemetry.clicked.connect(self.show_telemetry)
+        self.telemetry_panel = TelemetryPanel(self.manager.get_telemetry())
         self.manager.scene_state_changed.connect(self.scene_state_changed)
 
     def get_selected_scene(self) -> Optional[int]:
@@ -73,6 +76,11 @@ class MainWindow(QMainWindow):
         if scene_id is not None:
             self.manager.stop_scene(scene_id)
 
+    @pyqtSlot()
+    def show_telemetry(self) -> None:
+        self.telemetry_panel.show()
+        self.telemetry_panel.raise_()
+
     @pyqtSlot(int)
     def scene_state_changed(self, scene_id: int) -> None:
         scene_description = asdict(self.manager.get_scene_description(scene_id))
@@ -45,6 +45,9 @@ class Ui_ScenesWindow(object):
         self.scenes_layout.addWidget(self.btn_stop)
         spacerItem = QtWidgets.QSpacerItem(40, 20, QtWidgets.QSizePolicy.Policy.Expanding, QtWidgets.QSizePolicy.Policy.Minimum)
         self.scenes_layout.addItem(spacerItem)
+        self.btn_telemetry = QtWidgets.QPushButton(self.scenes_group)
+        self.btn_telemetry.setObjectName("btn_telemetry")
+        self.scenes_layout.addWidget(self.btn_telemetry)
         self.verticalLayout.addLayout(self.scenes_layout)
         self.gridLayout.addWidget(self.scenes_group, 0, 0, 1, 1)
         ScenesWindow.setCentralWidget(self.centralwidget)
@@ -58,6 +61,7 @@ class Ui_ScenesWindow(object):
         self.scenes_group.setTitle(_translate("ScenesWindow", "Управление сценами"))
         self.btn_start.setText(_translate("ScenesWindow", "Запустить"))
         self.btn_stop.setText(_translate("ScenesWindow", "Остановить"))
+        self.btn_telemetry.setText(_translate("ScenesWindow", "Телеметрия"))
 
 
 if __name__ == "__main__":
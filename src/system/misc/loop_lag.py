@@ -0,0 +1,39 @@
+import asyncio
+import time
+from collections import deque
+from typing import Deque, Optional
+
+
+class LoopLagMonitor:
+    # Sleeps for `interval` over and over and records how late the loop woke
+    # up: anything blocking the loop (and the Qt UI with it) shows up as lag.
+
+    def __init__(self, interval: float = 0.01, history: int = 10000):
+        self._interval = interval
+        self._task: Optional[asyncio.Task] = None
+        self.samples: Deque[float] = deque(maxlen=history)
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.get_event_loop().create_task(self._run())
+
+    def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    async def _run(self) -> None:
+        while True:
+            expected = time.perf_counter() + self._interval
+            await asyncio.sleep(self._interval)
+            self.samples.append(max(0.0, (time.perf_counter() - expected) * 1000))
+
+    def percentile(self, fraction: float) -> float:
+        ordered = sorted(self.samples)
+        if not ordered:
+            return 0.0
+        return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+    def summary(self) -> str:
+        return (f"loop lag n={len(self.samples)} p50={self.percentile(0.5):.1f} ms "
+                f"p99={self.percentile(0.99):.1f} ms max={max(self.samples, default=0.0):.1f} ms")
@@ -0,0 +1,33 @@
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional
+
+_pool: Optional[ProcessPoolExecutor] = None
+
+
+def lower_priority() -> None:
+    if sys.platform == "win32":
+        import ctypes
+        below_normal_priority_class = 0x4000
+        kernel32 = ctypes.windll.kernel32
+        kernel32.SetPriorityClass(kernel32.GetCurrentProcess(), below_normal_priority_class)
+    else:
+        os.nice(10)
+
+
+def process_pool() -> ProcessPoolExecutor:
+    # Shared by the background media jobs, workers run below normal priority
+    # so they never compete with the projector for CPU.
+    global _pool
+    if _pool is None:
+        workers = max(1, (os.cpu_count() or 2) - 1)
+        _pool = ProcessPoolExecutor(max_workers=workers, initializer=lower_priority)
+    return _pool
+
+
+def shutdown_process_pool() -> None:
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(wait=False, cancel_futures=True)
+        _pool = None
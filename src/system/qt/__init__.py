@@ -1,2 +1,3 @@
 from .any_dict_table_model import AnyDictTableModel, AbstractColumn
 from .simple_column import SimpleColumn
+from .thumbnail_column import ThumbnailColumn
@@ -112,6 +112,9 @@ class AnyDictTableModel(QAbstractTableModel):
         else:
             return -1
 
+    def findRows(self, columnKey: str, value: Any) -> List[int]:
+        return [i for i in range(len(self._rows)) if self._rows[i].get(columnKey) == value]
+
     def getIdByRow(self, rowIndex: int) -> int:
         if rowIndex < 0 or rowIndex >= len(self._rows):
             raise RuntimeError(f"Row index is out of bounds: "
@@ -0,0 +1,35 @@
+from typing import Any, Optional
+from PyQt6.QtCore import Qt, QModelIndex, QVariant, pyqtSlot
+
+from system.services.thumbnails import ThumbnailCache
+from .any_dict_table_model import AbstractColumn
+
+
+class ThumbnailColumn(AbstractColumn):
+    _thumbnails: Optional[ThumbnailCache] = None
+
+    def setThumbnails(self, thumbnails: ThumbnailCache) -> None:
+        if self._thumbnails is not None:
+            self._thumbnails.thumbnail_ready.disconnect(self.thumbnailReady)
+        self._thumbnails = thumbnails
+        thumbnails.thumbnail_ready.connect(self.thumbnailReady)
+
+    @pyqtSlot(str)
+    def thumbnailReady(self, path: str) -> None:
+        model = self.parent()
+        for row in model.findRows(self.getKey(), path):
+            model.updateRow(row, {})
+
+    def colData(self, rowData: dict[str, Any], role: int = ...) -> Any:
+        # Views only ask decorations of visible rows, so only those get rendered
+        if role == Qt.ItemDataRole.DecorationRole and self._thumbnails is not None:
+            pixmap = self._thumbnails.get(rowData[self.getKey()])
+            if pixmap is not None:
+                return pixmap
+        return QVariant()
+
+    def setData(self, index: QModelIndex, value: Any, role: int = ...) -> bool:
+        return False
+
+    def flags(self, index: QModelIndex) -> Qt.ItemFlag:
+        return Qt.ItemFlag.ItemIsSelectable | Qt.ItemFlag.ItemIsEnabled
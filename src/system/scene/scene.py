@@ -2,13 +2,14 @@ from __future__ import annotations
 from typing import TYPE_CHECKING
 from dataclasses import dataclass
 from enum import Enum
-from typing import Optional
+from typing import List, Optional
 from system.misc.exceptions import IllegalState
 
 
 if TYPE_CHECKING:
     from .scene_context import SceneContext
     from .action_task import ActionTask
+    from system.services.projector import Media
 
 
 class Scene:
@@ -35,6 +36,8 @@ class Scene:
         state: "Scene.State"
 
     NAME: str = "Unnamed Scene"
+    SOUNDS: List["Media"] = []
+    MEDIA: List["Media"] = []
     context: Optional["SceneContext"] = None
 
     def on_start(self):
@@ -1,11 +1,21 @@
 from __future__ import annotations
 import asyncio
-from typing import Type, List, TYPE_CHECKING
+from pathlib import Path
+from typing import Type, List, Optional, TYPE_CHECKING
 from PyQt6.QtCore import QObject, pyqtSignal
-from settings import bulb_settings
-from system.services.projector import VlcProjector
+from settings import artnet_settings, bulb_settings, projector_backend, projector_outputs, media_directories, cache_directory, ffprobe, ffmpeg, use_proxies
+from system.misc.workers import shutdown_process_pool
+from system.services.beat_grids import BeatGridLibrary
+from system.services.catalog import MediaCatalog
+from system.services.color_tracks import ColorTrackLibrary
+from system.services.proxies import ProxyLibrary
+from system.services.thumbnails import ThumbnailCache
+from system.services.projector import MAIN_OUTPUT, OutputGroup, PlaybackTelemetry, Projector, create_projector
 from system.misc.exceptions import IllegalState
+from system.services.artnet import DEFAULT_FRAME_RATE, ArtNetLighting, Fixture
 from system.services.lighting import Lighting
+from system.services.lighting_group import LightingGroup
+from system.services.sound_effects import SoundEffects
 from .action_executor import ActionExecutor
 from .scene_context import SceneContext
 from .scene import Scene
@@ -20,20 +30,71 @@ class SceneManager(QObject):
     _auto_inc: int = 0
     _scenes: dict[int, SceneContext] = dict()
     _action_executor: ActionExecutor
-    _display: VlcProjector
-    _lighting: Lighting
+    _display: Projector
+    _outputs: OutputGroup
+    _lighting: LightingGroup
+    _sfx: SoundEffects
+    _catalog: MediaCatalog
+    _thumbnails: ThumbnailCache
+    _proxies: ProxyLibrary
+    _beat_grids: BeatGridLibrary
+    _color_tracks: ColorTrackLibrary
+    _telemetry: PlaybackTelemetry
 
     scene_state_changed: pyqtSignal = pyqtSignal(int)
 
-    def __init__(self):
+    def __init__(self, display: Optional[Projector] = None):
         super().__init__()
         self._action_executor = ActionExecutor(self)
-        self._display = VlcProjector()
-        self._lighting = Lighting(**bulb_settings)
-        self._display.placeholder()
+        self._display = display if display is not None else create_projector(projector_backend)
+        self._outputs = OutputGroup({name: self._display if name == MAIN_OUTPUT else create_projector(projector_backend)
+                                     for name in projector_outputs})
+        session_cache = str(Path(cache_directory) / "tapo_session.json")
+        devices = {bulb["name"]: Lighting(bulb["ip"], bulb["login"], bulb["password"], session_cache=session_cache)
+                   for bulb in bulb_settings}
+        devices.update({node["name"]: ArtNetLighting(node["target"], [Fixture(**fixture) for fixture in node["fixtures"]],
+                                                     node.get("frame_rate", DEFAULT_FRAME_RATE))
+                        for node in artnet_settings})
+        self._lighting = LightingGroup(devices)
+        self._sfx = SoundEffects()
+        self._catalog = MediaCatalog(str(Path(cache_directory) / "catalog.sqlite"), media_directories, ffprobe)
+        self._thumbnails = ThumbnailCache(self._catalog, str(Path(cache_directory) / "thumbnails"), ffmpeg=ffmpeg)
+        self._proxies = ProxyLibrary(self._catalog, str(Path(cache_directory) / "proxies"), ffmpeg=ffmpeg)
+        self._beat_grids = BeatGridLibrary(self._catalog, str(Path(cache_directory) / "beats"), ffmpeg=ffmpeg)
+        self._color_tracks = ColorTrackLibrary(self._catalog, str(Path(cache_directory) / "colors"), ffmpeg=ffmpeg)
+        if use_proxies:
+            for output in self._outputs.outputs.values():
+                output.set_source_resolver(self._proxies.resolve)
+        self._telemetry = PlaybackTelemetry(str(Path(cache_directory) / "telemetry.jsonl"))
+        self._display.set_telemetry(self._telemetry)
+        self._outputs.placeholder()
+        self._outputs.place(projector_outputs)
 
     def get_stage(self):
-        return Stage(self._display, self._lighting)
+        return Stage(self._display, self._outputs, self._lighting, self._sfx)
+
+    def get_catalog(self) -> MediaCatalog:
+        return self._catalog
+
+    def get_thumbnails(self) -> ThumbnailCache:
+        return self._thumbnails
+
+    def get_telemetry(self) -> PlaybackTelemetry:
+        return self._telemetry
+
+    def get_beat_grids(self) -> BeatGridLibrary:
+        return self._beat_grids
+
+    def get_color_tracks(self) -> ColorTrackLibrary:
+        return self._color_tracks
+
+    def start_services(self) -> None:
+        self._lighting.start()
+        self._catalog.start_scan()
+        self._beat_grids.start()
+        self._color_tracks.start()
+        if use_proxies:
+            self._proxies.start()
 
     def notify_state_change(self, scene: SceneContext):
         self.scene_state_changed.emit(scene.id)
@@ -53,6 +114,8 @@ class SceneManager(QObject):
             manager=self
         )
         context.scene.set_context(context)
+        self._sfx.preload(scene.SOUNDS)
+        self._catalog.track(media.path for media in scene.MEDIA)
         self._scenes[self._auto_inc] = context
 
     def get_registered_scenes(self) -> List[Scene.Description]:
@@ -84,3 +147,5 @@ class SceneManager(QObject):
     def teardown(self):
         for scene_context in self._scenes.values():
             scene_context.scene.stop()
+        self._lighting.close()
+        shutdown_process_pool()
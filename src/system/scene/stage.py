@@ -1,11 +1,14 @@
 from dataclasses import dataclass
 
-from system.services.projector import VlcProjector
-from system.services.lighting import Lighting
+from system.services.projector import OutputGroup, Projector
+from system.services.lighting_group import LightingGroup
+from system.services.sound_effects import SoundEffects
 from .resource import Resource
 
 
 @dataclass
 class Stage(Resource):
-    display: VlcProjector
-    lighting: Lighting
+    display: Projector
+    outputs: OutputGroup
+    lighting: LightingGroup
+    sfx: SoundEffects
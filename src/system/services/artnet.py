@@ -0,0 +1,218 @@
+import asyncio
+import colorsys
+import logging
+import math
+import struct
+import time
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+from .lighting import LatencyHistogram, Light, LightingStats, ShadowState
+
+_log = logging.getLogger(__name__)
+
+ARTNET_PORT = 6454
+ARTNET_HEADER = b"Art-Net\x00"
+OP_DMX = 0x5000
+PROTOCOL_VERSION = 14
+DMX_CHANNELS = 512
+# A full 512-channel universe takes ~23 ms on the DMX wire, fixtures are
+# refreshed at a fixed rate inside what the wire carries
+MIN_FRAME_RATE = 30.0
+MAX_FRAME_RATE = 44.0
+DEFAULT_FRAME_RATE = 40.0
+
+# Channel layouts by profile name, "dimmer" is the master intensity
+PROFILES: Dict[str, List[str]] = {
+    "rgb": ["red", "green", "blue"],
+    "drgb": ["dimmer", "red", "green", "blue"],
+    "rgbw": ["red", "green", "blue", "white"],
+    "drgbw": ["dimmer", "red", "green", "blue", "white"],
+    "dimmer": ["dimmer"],
+}
+
+
+def artdmx_packet(universe: int, sequence: int, data: bytes) -> bytes:
+    # ArtDmx: 15-bit port address split into SubUni and Net, even data length
+    if len(data) % 2:
+        data += b"\x00"
+    return ARTNET_HEADER + struct.pack("<H", OP_DMX) + struct.pack(
+        ">HBBBBH", PROTOCOL_VERSION, sequence, 0, universe & 0xFF, (universe >> 8) & 0x7F, len(data)) + data
+
+
+def parse_artdmx(packet: bytes) -> Optional[Tuple[int, int, bytes]]:
+    # (universe, sequence, data) of an ArtDmx packet, None for anything else
+    if len(packet) < 18 or not packet.startswith(ARTNET_HEADER) \
+            or struct.unpack_from("<H", packet, 8)[0] != OP_DMX:
+        return None
+    _, sequence, _, sub_uni, net, length = struct.unpack_from(">HBBBBH", packet, 10)
+    return (net << 8) | sub_uni, sequence, packet[18:18 + length]
+
+
+def kelvin_to_rgb(kelvin: int) -> Tuple[float, float, float]:
+    # Tanner Helland's fit of the black body colour, 1000-40000 K
+    temperature = max(1000, min(40000, kelvin)) / 100
+    if temperature <= 66:
+        red = 255.0
+        green = 99.4708025861 * math.log(temperature) - 161.1195681661
+        blue = 0.0 if temperature <= 19 else 138.5177312231 * math.log(temperature - 10) - 305.0447927307
+    else:
+        red = 329.698727446 * (temperature - 60) ** -0.1332047592
+        green = 288.1221695283 * (temperature - 60) ** -0.0755148492
+        blue = 255.0
+    return tuple(max(0.0, min(255.0, value)) / 255 for value in (red, green, blue))
+
+
+@dataclass
+class Fixture:
+    name: str
+    universe: int
+    # first DMX channel of the fixture, 1-based like on the fixture's display
+    address: int
+    profile: str = "drgb"
+
+    def channels(self) -> List[str]:
+        if self.profile not in PROFILES:
+            raise RuntimeError(f"Unknown fixture profile '{self.profile}' of '{self.name}'")
+        return PROFILES[self.profile]
+
+    def render(self, light: Light) -> List[int]:
+        # DMX values of the fixture's channels showing the light
+        channels = self.channels()
+        intensity = light.brightness / 100
+        if light.type is Light.Type.TEMP:
+            red, green, blue = kelvin_to_rgb(light.temperature)
+        else:
+            red, green, blue = colorsys.hsv_to_rgb(light.hue / 360, light.saturation / 100, 1.0)
+        white = 0.0
+        if "white" in channels:
+            # the common part of the colour goes to the white emitter
+            white = min(red, green, blue)
+            red, green, blue = red - white, green - white, blue - white
+        if "dimmer" in channels:
+            levels = dict(dimmer=intensity, red=red, green=green, blue=blue, white=white)
+        else:
+            levels = dict(red=red * intensity, green=green * intensity, blue=blue * intensity,
+                          white=white * intensity)
+        return [round(levels[channel] * 255) for channel in channels]
+
+
+class _Sender(asyncio.DatagramProtocol):
+
+    def error_received(self, exc: Exception) -> None:
+        _log.warning("Art-Net send failed: %s", exc)
+
+
+class ArtNetLighting:
+    # Fixtures on an Art-Net node showing one lighting state, a drop-in for a
+    # Tapo bulb in a LightingGroup. set() renders the state into the back
+    # buffer of every universe, a frame timer swaps the buffers and sends
+    # the front ones at a fixed frame rate, so a frame never carries half a
+    # state and the fixtures keep being refreshed while nothing changes.
+
+    def __init__(self, target: str, fixtures: List[Fixture], frame_rate: float = DEFAULT_FRAME_RATE):
+        if not MIN_FRAME_RATE <= frame_rate <= MAX_FRAME_RATE:
+            raise RuntimeError(f"Art-Net frame rate must be within {MIN_FRAME_RATE:g}-{MAX_FRAME_RATE:g} Hz")
+        host, _, port = target.partition(":")
+        self._address = (host, int(port) if port else ARTNET_PORT)
+        self.fixtures = fixtures
+        self.max_rate = frame_rate
+        self._loop = asyncio.get_event_loop()
+        self._front: Dict[int, bytearray] = {fixture.universe: bytearray(DMX_CHANNELS) for fixture in fixtures}
+        self._back: Dict[int, bytearray] = {universe: bytearray(DMX_CHANNELS) for universe in self._front}
+        self._dirty = False
+        self._sequence = 0
+        self._transport: Optional[asyncio.DatagramTransport] = None
+        self._timer: Optional[asyncio.Task] = None
+        self._online = asyncio.Event()
+        # resolved with the frame that carries their state
+        self._waiters: List[Tuple[float, asyncio.Future]] = []
+        self.shadow = ShadowState()
+        self.stats = LightingStats()
+        # set() to the frame carrying it on the wire
+        self.latency = LatencyHistogram()
+        self.frames = 0
+        # frames skipped because the timer woke up more than a frame late
+        self.late_frames = 0
+        for fixture in fixtures:
+            if fixture.address < 1 or fixture.address - 1 + len(fixture.channels()) > DMX_CHANNELS:
+                raise RuntimeError(f"Fixture '{fixture.name}' does not fit into a DMX universe")
+
+    def start(self) -> None:
+        if self._timer is None:
+            self._timer = self._loop.create_task(self._run())
+
+    def online(self) -> bool:
+        return self._online.is_set()
+
+    async def wait_online(self) -> None:
+        await self._online.wait()
+
+    def set(self, light: Light) -> asyncio.Future:
+        self.stats.requested += 1
+        waiter = self._loop.create_future()
+        if self._dirty:
+            self.stats.coalesced += 1
+        for fixture in self.fixtures:
+            start = fixture.address - 1
+            values = fixture.render(light)
+            self._back[fixture.universe][start:start + len(values)] = bytes(values)
+        self._dirty = True
+        self._waiters.append((time.perf_counter(), waiter))
+        self.shadow = ShadowState(light, time.monotonic(), "command")
+        return waiter
+
+    def state(self) -> Optional[Light]:
+        return self.shadow.light
+
+    async def refresh(self) -> Optional[Light]:
+        # DMX is one-way, what was sent last is all there is to know
+        return self.shadow.light
+
+    def close(self) -> None:
+        _log.info("Art-Net %s:%d: %d frames, %d late, %s, set to wire: %s",
+                  *self._address, self.frames, self.late_frames, self.stats, self.latency)
+        if self._timer is not None:
+            self._timer.cancel()
+        if self._transport is not None:
+            self._transport.close()
+        for _, waiter in self._waiters:
+            if not waiter.done():
+                waiter.set_result(False)
+
+    async def _run(self) -> None:
+        self._transport, _ = await self._loop.create_datagram_endpoint(_Sender, remote_addr=self._address)
+        self._online.set()
+        interval = 1 / self.max_rate
+        deadline = self._loop.time()
+        while True:
+            self._send_frame()
+            deadline += interval
+            delay = deadline - self._loop.time()
+            if delay < -interval:
+                # the loop was blocked, restart the cadence rather than bursting
+                self.late_frames += int(-delay / interval)
+                deadline = self._loop.time()
+                delay = 0
+            await asyncio.sleep(max(0.0, delay))
+
+    def _send_frame(self) -> None:
+        waiters = []
+        if self._dirty:
+            for universe in self._front:
+                self._front[universe], self._back[universe] = self._back[universe], self._front[universe]
+                self._back[universe][:] = self._front[universe]
+            self._dirty = False
+            waiters, self._waiters = self._waiters, []
+        # sequence 0 means unsequenced to the receivers
+        self._sequence = self._sequence % 255 + 1
+        for universe, data in self._front.items():
+            self._transport.sendto(artdmx_packet(universe, self._sequence, bytes(data)))
+        self.frames += 1
+        sent = time.perf_counter()
+        if waiters:
+            self.stats.sent += 1
+        for queued, waiter in waiters:
+            self.latency.add((sent - queued) * 1000)
+            if not waiter.done():
+                waiter.set_result(True)
@@ -0,0 +1,172 @@
+import json
+import subprocess
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import List
+
+import numpy as np
+
+from .thumbnail_render import content_key
+
+DECODE_TIMEOUT = 300
+# Bump when the analysis changes, older cached grids are recomputed
+ANALYSIS_VERSION = 1
+SAMPLE_RATE = 22050
+FRAME_SIZE = 2048
+HOP_SIZE = 512
+# STFT frames transformed at once
+STFT_BLOCK = 512
+BANDS = 48
+MIN_BPM = 60
+MAX_BPM = 180
+# Beats the phase of the grid is chosen from
+PHASE_BEATS = 32
+# Envelope peaks below this, relative to the strongest one, are not onsets
+ONSET_THRESHOLD = 0.2
+# Tempo octave errors are resolved toward this tempo
+PREFERRED_BPM = 120
+
+
+@dataclass
+class BeatGrid:
+    tempo_bpm: float
+    # media positions in ms
+    beats: List[int]
+    # loudness of every beat relative to the loudest one, 0-1
+    energy: List[float]
+    onsets: List[int]
+
+    @staticmethod
+    def load(path: str) -> "BeatGrid":
+        with open(path, encoding="utf-8") as file:
+            return BeatGrid(**json.load(file))
+
+
+def decode_audio(path: str, ffmpeg: str = "ffmpeg", sample_rate: int = SAMPLE_RATE) -> np.ndarray:
+    # first audio track, mixed down to mono float samples
+    output = subprocess.run([ffmpeg, "-v", "error", "-i", path, "-map", "0:a:0", "-ac", "1", "-ar", str(sample_rate),
+                             "-f", "f32le", "-"], capture_output=True, check=True, timeout=DECODE_TIMEOUT).stdout
+    return np.frombuffer(output, dtype=np.float32)
+
+
+def onset_envelope(samples: np.ndarray) -> np.ndarray:
+    # Spectral flux of a log-magnitude STFT: how much energy appeared in any
+    # band since the previous frame, one value per hop
+    if len(samples) < FRAME_SIZE:
+        return np.zeros(0, dtype=np.float32)
+    frames = np.lib.stride_tricks.sliding_window_view(samples, FRAME_SIZE)[::HOP_SIZE]
+    window = np.hanning(FRAME_SIZE).astype(np.float32)
+    # log-spaced bands, so the few bins of a kick drum count as much as the
+    # hundreds of bins of a hi-hat
+    edges = np.unique(np.geomspace(1, FRAME_SIZE // 2 + 1, BANDS + 1).astype(int)[:-1])
+    flux, previous = [], None
+    # a few seconds of frames at a time, the spectrum of a whole clip would
+    # take hundreds of megabytes
+    for start in range(0, len(frames), STFT_BLOCK):
+        magnitude = np.abs(np.fft.rfft(frames[start:start + STFT_BLOCK] * window, axis=1))
+        bands = np.add.reduceat(magnitude, edges, axis=1) / np.diff(np.append(edges, magnitude.shape[1]))
+        spectrum = np.log1p(100 * bands)
+        if previous is not None:
+            spectrum = np.vstack([previous, spectrum])
+        flux.append(np.maximum(0.0, np.diff(spectrum, axis=0)).sum(axis=1))
+        previous = spectrum[-1:]
+    flux = np.concatenate(flux)
+    # remove the slowly changing part, what is left are the attacks
+    baseline = np.convolve(flux, np.ones(16) / 16, mode="same")
+    envelope = np.maximum(0.0, flux - baseline)
+    peak = envelope.max(initial=0.0)
+    return np.concatenate([[0.0], envelope / peak if peak > 0 else envelope])
+
+
+def estimate_period(envelope: np.ndarray, frame_rate: float) -> float:
+    # beat period in frames: the autocorrelation peak within the tempo range,
+    # weighted toward the preferred tempo
+    size = 1 << int(np.ceil(np.log2(2 * len(envelope))))
+    spectrum = np.fft.rfft(envelope - envelope.mean(), size)
+    autocorrelation = np.fft.irfft(spectrum * np.conj(spectrum), size)[:len(envelope)]
+    # onsets are a frame or two wide, a period between two whole lags
+    # would otherwise lose to its multiples
+    autocorrelation = np.convolve(autocorrelation, [0.25, 0.5, 0.25], mode="same")
+    lags = np.arange(int(frame_rate * 60 / MAX_BPM), int(frame_rate * 60 / MIN_BPM) + 1)
+    lags = lags[(lags > 0) & (lags < len(autocorrelation) - 1)]
+    if len(lags) == 0:
+        return frame_rate * 60 / PREFERRED_BPM
+    bpm = frame_rate * 60 / lags
+    weight = np.exp(-0.5 * (np.log2(bpm / PREFERRED_BPM) / 0.9) ** 2)
+    lag = int(lags[np.argmax(autocorrelation[lags] * weight)])
+    # the peak between whole lags, a whole-lag period drifts off the music
+    # within a minute
+    before, peak, after = autocorrelation[lag - 1:lag + 2]
+    curvature = before - 2 * peak + after
+    return lag + (0.5 * (before - after) / curvature if curvature < 0 else 0.0)
+
+
+def track_beats(envelope: np.ndarray, period: float) -> np.ndarray:
+    # The first beat is the grid phase with the most onset energy on its
+    # beats. Every next beat is the strongest onset near one period after the
+    # previous one, so the grid follows the music rather than drifting off it
+    phases = np.arange(max(1, int(period)))
+    # the first bars only, over a whole clip a slight tempo error smears the phase
+    span = min(len(envelope), int(PHASE_BEATS * period))
+    positions = np.round(phases[:, None] + np.arange(0, span, period)[None, :]).astype(int)
+    positions = np.minimum(positions, len(envelope) - 1)
+    beats = [int(phases[np.argmax(envelope[positions].sum(axis=1))])]
+    reach = max(1, int(period / 8))
+    # onsets far from the expected beat count for less
+    closeness = np.exp(-0.5 * (np.arange(-reach, reach + 1) / reach) ** 2)
+    while beats[-1] + period + reach < len(envelope):
+        expected = int(round(beats[-1] + period))
+        window = envelope[expected - reach:expected + reach + 1] * closeness
+        beats.append(expected - reach + int(np.argmax(window)) if window.max() > ONSET_THRESHOLD else expected)
+    return np.array(beats)
+
+
+def pick_onsets(envelope: np.ndarray, threshold: float = ONSET_THRESHOLD) -> np.ndarray:
+    # local maxima of the envelope above the threshold
+    if len(envelope) < 3:
+        return np.zeros(0, dtype=int)
+    neighbours = np.lib.stride_tricks.sliding_window_view(np.pad(envelope, 3), 7).max(axis=1)
+    return np.flatnonzero((envelope == neighbours) & (envelope > threshold))
+
+
+def beat_energy(samples: np.ndarray, beats: np.ndarray) -> np.ndarray:
+    # RMS of the audio from every beat to the next one
+    if len(beats) == 0:
+        return np.zeros(0)
+    starts = np.minimum(beats * HOP_SIZE, len(samples) - 1)
+    squared = np.add.reduceat(samples.astype(np.float64) ** 2, starts)
+    lengths = np.diff(np.append(starts, len(samples)))
+    rms = np.sqrt(squared / np.maximum(lengths, 1))
+    return rms / rms.max() if rms.max() > 0 else rms
+
+
+def analyze_samples(samples: np.ndarray, sample_rate: int = SAMPLE_RATE) -> BeatGrid:
+    frame_rate = sample_rate / HOP_SIZE
+    envelope = onset_envelope(samples)
+    if not envelope.any():
+        return BeatGrid(0.0, [], [], [])
+    period = estimate_period(envelope, frame_rate)
+    beats = track_beats(envelope, period)
+    # the log-magnitude flux of an attack peaks once it is about 70% into the
+    # frame (measured on synthetic drums), positions are moved to the attack
+    offset_ms = 0.7 * FRAME_SIZE / sample_rate * 1000
+    to_ms = 1000 / frame_rate
+    return BeatGrid(
+        tempo_bpm=round(frame_rate * 60 / period, 1),
+        beats=[int(beat * to_ms + offset_ms) for beat in beats],
+        energy=[round(float(energy), 3) for energy in beat_energy(samples, beats)],
+        onsets=[int(onset * to_ms + offset_ms) for onset in pick_onsets(envelope)],
+    )
+
+
+def analyze_beats(path: str, cache_directory: str, ffmpeg: str = "ffmpeg") -> str:
+    target = Path(cache_directory) / f"{content_key(path)}-v{ANALYSIS_VERSION}.beats.json"
+    if target.exists():
+        return str(target)
+    target.parent.mkdir(parents=True, exist_ok=True)
+    grid = analyze_samples(decode_audio(path, ffmpeg))
+    partial = target.with_suffix(".part")
+    with open(partial, "w", encoding="utf-8") as file:
+        json.dump(asdict(grid), file)
+    partial.replace(target)
+    return str(target)
@@ -0,0 +1,63 @@
+from dataclasses import replace
+from typing import Callable, List, Optional, Tuple
+
+from PyQt6.QtCore import pyqtSignal
+
+from .beat_analysis import BeatGrid, analyze_beats
+from .catalog import MediaCatalog
+from .catalog_jobs import CatalogJobs
+from .cue_sheet import Cue, CueSheet
+from .lighting import MAX_RATE, Light
+from .media_probe import MediaInfo
+
+
+class BeatGridLibrary(CatalogJobs[BeatGrid]):
+    # Beat grids of the catalog media with audio, analysed in worker processes
+    # once the catalog is scanned and cached on disk by content hash. get()
+    # hands out a grid only while the media keeps the size and mtime it was
+    # analysed from.
+
+    beat_grid_ready: pyqtSignal = pyqtSignal(str)
+    failure = "analyse the beats of"
+
+    def __init__(self, catalog: MediaCatalog, cache_directory: str, ffmpeg: str = "ffmpeg", jobs: int = 1):
+        super().__init__(catalog, jobs)
+        self._cache_directory = cache_directory
+        self._ffmpeg = ffmpeg
+
+    def get(self, path: str) -> Optional[BeatGrid]:
+        return self._result(path)
+
+    def _accepts(self, entry: MediaInfo) -> bool:
+        return entry.audio_tracks > 0
+
+    def _job(self, path: str) -> Tuple[Callable, ...]:
+        return analyze_beats, path, self._cache_directory, self._ffmpeg
+
+    def _load(self, output: str) -> BeatGrid:
+        return BeatGrid.load(output)
+
+    def _ready(self, path: str) -> None:
+        self.beat_grid_ready.emit(path)
+
+
+def beat_cue_sheet(grid: BeatGrid, light: Light, start_ms: int = 0, low: int = 10,
+                   max_rate: float = MAX_RATE) -> CueSheet:
+    # A pulse of the light on every beat from start_ms on: up to a brightness
+    # following the beat's energy on the beat, down to `low` halfway to the
+    # next one. Cues closer than the bulb keeps up with are left out, above
+    # 150 BPM that drops the way down first and then every other beat
+    spacing = 1000 / max_rate
+    cues: List[Cue] = []
+
+    def add(position: int, brightness: int) -> None:
+        if not cues or position - cues[-1].position >= spacing:
+            cues.append(Cue(position, replace(light, brightness=brightness)))
+
+    for beat, following, energy in zip(grid.beats, grid.beats[1:] + [None], grid.energy):
+        if beat < start_ms:
+            continue
+        add(beat, round(low + (light.brightness - low) * energy))
+        if following is not None:
+            add((beat + following) // 2, low)
+    return CueSheet(f"beats@{grid.tempo_bpm:g}bpm", cues)
@@ -0,0 +1,152 @@
+import asyncio
+import logging
+import os
+import sqlite3
+from dataclasses import astuple
+from pathlib import Path
+from typing import Iterable, List, Optional, Tuple
+
+from PyQt6.QtCore import QObject, pyqtSignal
+
+from system.misc.workers import process_pool
+from .media_probe import MediaInfo, probe
+
+_log = logging.getLogger(__name__)
+
+MEDIA_EXTENSIONS = {".mp4", ".mkv", ".mov", ".avi", ".webm", ".wav", ".mp3", ".ogg", ".flac"}
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS media (
+    path TEXT PRIMARY KEY,
+    size INTEGER NOT NULL,
+    mtime REAL NOT NULL,
+    duration_ms INTEGER,
+    width INTEGER,
+    height INTEGER,
+    video_codec TEXT,
+    audio_tracks INTEGER NOT NULL DEFAULT 0,
+    error TEXT
+)
+"""
+
+
+def normalize_path(path: str) -> str:
+    return os.path.normcase(os.path.normpath(path))
+
+
+def format_duration(ms: Optional[int]) -> str:
+    if ms is None:
+        return ""
+    minutes, seconds = divmod(ms // 1000, 60)
+    hours, minutes = divmod(minutes, 60)
+    if hours:
+        return f"{hours}:{minutes:02}:{seconds:02}"
+    return f"{minutes}:{seconds:02}"
+
+
+def _stat(path: str) -> Optional[Tuple[int, float]]:
+    try:
+        stat = os.stat(path)
+    except OSError as error:  # a broken symlink or a file removed meanwhile
+        _log.warning("Could not read %s: %s", path, error)
+        return None
+    return stat.st_size, stat.st_mtime
+
+
+def _list_files(directories: List[str], tracked: List[str]) -> dict[str, Tuple[int, float]]:
+    found = dict()
+    for directory in directories:
+        for root, _, files in os.walk(directory):
+            for name in files:
+                if Path(name).suffix.lower() in MEDIA_EXTENSIONS:
+                    path = os.path.join(root, name)
+                    stat = _stat(path)
+                    if stat is not None:
+                        found[normalize_path(path)] = stat
+    for path in tracked:
+        if path not in found and os.path.isfile(path):
+            stat = _stat(path)
+            if stat is not None:
+                found[path] = stat
+    return found
+
+
+class MediaCatalog(QObject):
+    # Media metadata indexed in SQLite by path, an entry stays valid while the
+    # file keeps its size and mtime. Startup reads the index only, scan() lists
+    # the library and probes new or changed files in worker processes.
+
+    entries_changed: pyqtSignal = pyqtSignal()
+
+    def __init__(self, index_path: str, directories: List[str], ffprobe: str = "ffprobe"):
+        super().__init__()
+        Path(index_path).parent.mkdir(parents=True, exist_ok=True)
+        self._db = sqlite3.connect(index_path)
+        self._db.execute(_SCHEMA)
+        self._directories = directories
+        self._tracked: List[str] = []
+        self._ffprobe = ffprobe
+        self._entries: dict[str, MediaInfo] = {
+            row[0]: MediaInfo(*row) for row in self._db.execute("SELECT * FROM media")}
+        self._scan_task: Optional[asyncio.Task] = None
+        self.scanned = False
+
+    def track(self, paths: Iterable[str]) -> None:
+        for path in paths:
+            path = normalize_path(path)
+            if path not in self._tracked:
+                self._tracked.append(path)
+
+    def get(self, path: str) -> Optional[MediaInfo]:
+        return self._entries.get(normalize_path(path))
+
+    def describe(self, path: str) -> str:
+        entry = self.get(path)
+        if entry is None:
+            return "нет файла" if self.scanned else ""
+        if entry.error is not None:
+            return "ошибка"
+        return format_duration(entry.duration_ms)
+
+    def query(self, directory: Optional[str] = None) -> List[MediaInfo]:
+        entries = self._entries.values()
+        if directory is not None:
+            prefix = os.path.join(normalize_path(directory), "")
+            entries = [entry for entry in entries if entry.path.startswith(prefix)]
+        return sorted(entries, key=lambda entry: entry.path)
+
+    def start_scan(self) -> asyncio.Task:
+        if self._scan_task is None or self._scan_task.done():
+            self._scan_task = asyncio.get_event_loop().create_task(self.scan())
+        return self._scan_task
+
+    async def scan(self) -> None:
+        loop = asyncio.get_event_loop()
+        found = await loop.run_in_executor(None, _list_files, self._directories, list(self._tracked))
+
+        removed = [path for path in self._entries if path not in found]
+        for path in removed:
+            del self._entries[path]
+        self._db.executemany("DELETE FROM media WHERE path = ?", [(path,) for path in removed])
+        self._db.commit()
+
+        stale = [path for path, (size, mtime) in found.items()
+                 if path not in self._entries or self._entries[path].transient
+                 or (self._entries[path].size, self._entries[path].mtime) != (size, mtime)]
+        pool = process_pool()
+        for probed in asyncio.as_completed([loop.run_in_executor(pool, probe, path, self._ffprobe) for path in stale]):
+            try:
+                info = await probed
+            except OSError:  # removed after listing
+                continue
+            self._entries[info.path] = info
+            if info.transient:
+                _log.warning("Could not probe %s: %s", info.path, info.error)
+            else:
+                # every column but transient
+                self._db.execute("INSERT OR REPLACE INTO media VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)", astuple(info)[:-1])
+                self._db.commit()
+            self.entries_changed.emit()
+
+        self.scanned = True
+        self.entries_changed.emit()
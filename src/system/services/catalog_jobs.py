@@ -0,0 +1,94 @@
+import asyncio
+import logging
+import subprocess
+from typing import Any, Callable, Dict, Generic, Optional, Tuple, TypeVar
+
+from PyQt6.QtCore import QObject
+
+from system.misc.workers import process_pool
+from .catalog import MediaCatalog
+from .media_probe import MediaInfo
+
+_log = logging.getLogger(__name__)
+
+# (path, size, mtime) of the catalog entry a result was computed from
+_Key = Tuple[str, int, float]
+T = TypeVar("T")
+
+
+class CatalogJobs(QObject, Generic[T]):
+    # Results computed from the catalog media in worker processes once the
+    # catalog is scanned, one job per entry that _accepts() and never twice
+    # for the same file. _result() hands out a result only while the media
+    # keeps the size and mtime it was computed from.
+    #
+    # Subclasses return the worker function and its arguments from _job(),
+    # turn its output into the result in _load() and announce it in _ready().
+
+    # completes "Could not ... <path>" when a job fails
+    failure: str = "process"
+
+    def __init__(self, catalog: MediaCatalog, jobs: int = 1):
+        super().__init__()
+        self._catalog = catalog
+        # the jobs are heavy, only a few run at once even on idle workers
+        self._jobs = asyncio.Semaphore(jobs)
+        self._results: Dict[_Key, T] = dict()
+        self._pending: set[_Key] = set()
+        self._failed: set[_Key] = set()
+
+    def start(self) -> None:
+        self._catalog.entries_changed.connect(self._schedule)
+        self._schedule()
+
+    def _result(self, path: str) -> Optional[T]:
+        entry = self._catalog.get(path)
+        if entry is None:
+            return None
+        return self._results.get(self._key(entry))
+
+    @staticmethod
+    def _key(entry: MediaInfo) -> _Key:
+        return entry.path, entry.size, entry.mtime
+
+    def _schedule(self) -> None:
+        if not self._catalog.scanned:
+            return
+        loop = asyncio.get_event_loop()
+        for entry in self._catalog.query():
+            key = self._key(entry)
+            if entry.error is not None or not self._accepts(entry):
+                continue
+            if key in self._results or key in self._pending or key in self._failed:
+                continue
+            self._pending.add(key)
+            loop.create_task(self._run(key))
+
+    async def _run(self, key: _Key) -> None:
+        loop = asyncio.get_event_loop()
+        try:
+            async with self._jobs:
+                output = await loop.run_in_executor(process_pool(), *self._job(key[0]))
+            result = self._load(output)
+        except (OSError, ValueError, subprocess.SubprocessError) as error:
+            _log.warning("Could not %s %s: %s", self.failure, key[0], error)
+            self._failed.add(key)
+            return
+        finally:
+            self._pending.discard(key)
+        self._results[key] = result
+        self._ready(key[0])
+
+    # ===== Subclass hooks =====
+
+    def _accepts(self, entry: MediaInfo) -> bool:
+        raise NotImplementedError
+
+    def _job(self, path: str) -> Tuple[Callable, ...]:
+        raise NotImplementedError
+
+    def _load(self, output: Any) -> T:
+        return output
+
+    def _ready(self, path: str) -> None:
+        raise NotImplementedError
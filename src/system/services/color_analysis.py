@@ -0,0 +1,133 @@
+import bisect
+import json
+import subprocess
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import List, Optional
+
+import numpy as np
+
+from .light import Light
+from .thumbnail_render import content_key
+
+DECODE_TIMEOUT = 600
+# Bump when the analysis changes, older cached tracks are recomputed
+ANALYSIS_VERSION = 1
+# Frames sampled per second of video, downscaled to this size
+SAMPLE_FPS = 4
+SAMPLE_WIDTH = 32
+SAMPLE_HEIGHT = 18
+HUE_BINS = 24
+# Two updates per second leave room in the bulb's budget for cues
+DEFAULT_STEP_MS = 500
+# Weight of the newest window when smoothing, lower is calmer
+SMOOTHING = 0.5
+HUE_STEP = 5
+LEVEL_STEP = 5
+MIN_BRIGHTNESS = 10
+
+
+@dataclass
+class ColorTrack:
+    step_ms: int
+    # media positions in ms where the color changes, and the color from there on
+    positions: List[int]
+    hue: List[int]
+    saturation: List[int]
+    brightness: List[int]
+
+    @staticmethod
+    def load(path: str) -> "ColorTrack":
+        with open(path, encoding="utf-8") as file:
+            return ColorTrack(**json.load(file))
+
+    def at(self, position: int) -> Optional[Light]:
+        index = bisect.bisect_right(self.positions, position) - 1
+        if index < 0:
+            return None
+        return Light(Light.Type.COLOR, hue=self.hue[index], saturation=self.saturation[index],
+                     brightness=self.brightness[index])
+
+    def next_position(self, position: int) -> Optional[int]:
+        index = bisect.bisect_right(self.positions, position)
+        return self.positions[index] if index < len(self.positions) else None
+
+
+def decode_frames(path: str, ffmpeg: str = "ffmpeg") -> np.ndarray:
+    # (frames, height, width, 3) RGB, SAMPLE_FPS frames per second of video
+    output = subprocess.run(
+        [ffmpeg, "-v", "error", "-an", "-sn", "-i", path,
+         "-vf", f"fps={SAMPLE_FPS},scale={SAMPLE_WIDTH}:{SAMPLE_HEIGHT}", "-f", "rawvideo", "-pix_fmt", "rgb24", "-"],
+        capture_output=True, check=True, timeout=DECODE_TIMEOUT).stdout
+    return np.frombuffer(output, dtype=np.uint8).reshape(-1, SAMPLE_HEIGHT, SAMPLE_WIDTH, 3)
+
+
+def frame_colors(frames: np.ndarray) -> np.ndarray:
+    # (frames, 4): dominant hue in degrees, its strength, saturation and
+    # brightness (0-1) of every frame. Vivid pixels decide the hue, dark and
+    # grey ones only count toward the brightness
+    pixels = frames.reshape(len(frames), -1, 3).astype(np.float32) / 255
+    value = pixels.max(axis=2)
+    chroma = value - pixels.min(axis=2)
+    saturation = np.where(value > 0, chroma / np.maximum(value, 1e-6), 0.0)
+    red, green, blue = pixels[..., 0], pixels[..., 1], pixels[..., 2]
+    safe = np.maximum(chroma, 1e-6)
+    hue = np.select([value == red, value == green],
+                    [((green - blue) / safe) % 6, (blue - red) / safe + 2], (red - green) / safe + 4) * 60
+    weight = saturation * value
+
+    bins = (hue / 360 * HUE_BINS).astype(int) % HUE_BINS
+    flat = bins + np.arange(len(frames))[:, None] * HUE_BINS
+    histogram = np.bincount(flat.ravel(), weight.ravel(), len(frames) * HUE_BINS).reshape(len(frames), HUE_BINS)
+    dominant = histogram.argmax(axis=1)
+    # the weighted mean hue of the pixels in the dominant bin and its neighbours
+    distance = (bins - dominant[:, None] + HUE_BINS // 2) % HUE_BINS - HUE_BINS // 2
+    near = np.where(np.abs(distance) <= 1, weight, 0.0)
+    angle = np.radians(hue)
+    dominant_hue = np.degrees(np.arctan2((near * np.sin(angle)).sum(axis=1), (near * np.cos(angle)).sum(axis=1))) % 360
+    strength = near.sum(axis=1) / np.maximum(weight.sum(axis=1), 1e-6)
+    dominant_saturation = (near * saturation).sum(axis=1) / np.maximum(near.sum(axis=1), 1e-6)
+    return np.stack([dominant_hue, strength, dominant_saturation, value.mean(axis=1)], axis=1)
+
+
+def build_track(colors: np.ndarray, fps: float = SAMPLE_FPS, step_ms: int = DEFAULT_STEP_MS) -> ColorTrack:
+    # Averages the frames of every step, smooths the steps and keeps only
+    # the steps where the quantized color changes
+    per_step = max(1, int(round(fps * step_ms / 1000)))
+    steps = len(colors) // per_step
+    if steps == 0:
+        return ColorTrack(step_ms, [], [], [], [])
+    windows = colors[:steps * per_step].reshape(steps, per_step, 4)
+    angle = np.radians(windows[..., 0])
+    # hue as a vector so that 350 and 10 degrees average to 0, not 180
+    vectors = np.stack([(windows[..., 1] * np.cos(angle)).mean(axis=1),
+                        (windows[..., 1] * np.sin(angle)).mean(axis=1)], axis=1)
+    levels = windows[..., 2:].mean(axis=1)
+
+    for step in range(1, steps):
+        vectors[step] = SMOOTHING * vectors[step] + (1 - SMOOTHING) * vectors[step - 1]
+        levels[step] = SMOOTHING * levels[step] + (1 - SMOOTHING) * levels[step - 1]
+
+    hue = (np.round(np.degrees(np.arctan2(vectors[:, 1], vectors[:, 0])) % 360 / HUE_STEP) * HUE_STEP).astype(int) % 360
+    saturation = (np.round(levels[:, 0] * 100 / LEVEL_STEP) * LEVEL_STEP).astype(int)
+    brightness = np.maximum(MIN_BRIGHTNESS, np.round(levels[:, 1] * 100 / LEVEL_STEP) * LEVEL_STEP).astype(int)
+
+    quantized = np.stack([hue, saturation, brightness], axis=1)
+    changed = np.ones(steps, dtype=bool)
+    changed[1:] = (quantized[1:] != quantized[:-1]).any(axis=1)
+    index = np.flatnonzero(changed)
+    return ColorTrack(step_ms, (index * step_ms).tolist(), hue[index].tolist(), saturation[index].tolist(),
+                      brightness[index].tolist())
+
+
+def analyze_colors(path: str, cache_directory: str, step_ms: int = DEFAULT_STEP_MS, ffmpeg: str = "ffmpeg") -> str:
+    target = Path(cache_directory) / f"{content_key(path)}-v{ANALYSIS_VERSION}-{step_ms}.colors.json"
+    if target.exists():
+        return str(target)
+    target.parent.mkdir(parents=True, exist_ok=True)
+    track = build_track(frame_colors(decode_frames(path, ffmpeg)), SAMPLE_FPS, step_ms)
+    partial = target.with_suffix(".part")
+    with open(partial, "w", encoding="utf-8") as file:
+        json.dump(asdict(track), file)
+    partial.replace(target)
+    return str(target)
@@ -0,0 +1,65 @@
+import asyncio
+from typing import Callable, Optional, Tuple
+
+from PyQt6.QtCore import pyqtSignal
+
+from .catalog import MediaCatalog
+from .catalog_jobs import CatalogJobs
+from .color_analysis import DEFAULT_STEP_MS, ColorTrack, analyze_colors
+from .cue_sheet import DEFAULT_LEAD_MS
+from .lighting_group import LightingGroup
+from .media_probe import MediaInfo
+from .projector import Projector
+
+# The position is re-read at least this often, to follow seeks and pauses
+FOLLOW_INTERVAL = 0.25
+MIN_FOLLOW_INTERVAL = 0.01
+
+
+class ColorTrackLibrary(CatalogJobs[ColorTrack]):
+    # Ambient color tracks of the catalog videos: the dominant color of the
+    # picture over time, analysed in worker processes once the catalog is
+    # scanned and cached on disk by content hash. get() hands out a track
+    # only while the video keeps the size and mtime it was analysed from.
+
+    color_track_ready: pyqtSignal = pyqtSignal(str)
+    failure = "analyse the colors of"
+
+    def __init__(self, catalog: MediaCatalog, cache_directory: str, step_ms: int = DEFAULT_STEP_MS,
+                 ffmpeg: str = "ffmpeg", jobs: int = 1):
+        super().__init__(catalog, jobs)
+        self._cache_directory = cache_directory
+        self._step_ms = step_ms
+        self._ffmpeg = ffmpeg
+
+    def get(self, path: str) -> Optional[ColorTrack]:
+        return self._result(path)
+
+    def _accepts(self, entry: MediaInfo) -> bool:
+        return entry.width is not None
+
+    def _job(self, path: str) -> Tuple[Callable, ...]:
+        return analyze_colors, path, self._cache_directory, self._step_ms, self._ffmpeg
+
+    def _load(self, output: str) -> ColorTrack:
+        return ColorTrack.load(output)
+
+    def _ready(self, path: str) -> None:
+        self.color_track_ready.emit(path)
+
+
+async def follow(track: ColorTrack, display: Projector, lighting: LightingGroup,
+                 lead_ms: int = DEFAULT_LEAD_MS) -> None:
+    # Replays the track against the projector position until cancelled,
+    # lead_ms ahead so the bulb has changed by the time the frame is shown.
+    # Between changes the loop only sleeps
+    shown = None
+    while True:
+        position = display.get_position() + lead_ms
+        light = track.at(position)
+        if light is not None and light != shown:
+            lighting.set(light)
+            shown = light
+        following = track.next_position(position)
+        delay = FOLLOW_INTERVAL if following is None else display.clock.until(following - lead_ms)
+        await asyncio.sleep(max(MIN_FOLLOW_INTERVAL, min(FOLLOW_INTERVAL, delay)))
@@ -0,0 +1,191 @@
+import asyncio
+import json
+import logging
+import os
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+try:
+    import tomllib
+except ImportError:  # before Python 3.11
+    import tomli as tomllib
+
+from system.services.lighting import Light
+from system.services.lighting_group import LightingGroup
+from system.services.projector import CueSheetRecord, Media, OutputGroup, PlaybackTelemetry, Projector
+
+_log = logging.getLogger(__name__)
+
+# Lighting commands are issued this much ahead of their cue by default, so
+# the bulb has changed by the time the frame is on screen
+DEFAULT_LEAD_MS = 150
+# Longer timelines (beat grids) are logged as a summary
+MAX_LOGGED_CUES = 20
+CUE_SHEET_SUFFIXES = [".cues.toml", ".cues.json"]
+BUNDLED_CUE_SHEETS = Path("assets") / "cues"
+
+
+@dataclass
+class Cue:
+    position: int
+    light: Optional[Light] = None
+    event: Optional[str] = None
+
+
+@dataclass
+class CueSheet:
+    # Timestamped lighting states and named events of one media, sorted by position
+    path: str
+    cues: List[Cue]
+    lead_ms: int = DEFAULT_LEAD_MS
+
+    def events(self) -> List[str]:
+        return [cue.event for cue in self.cues if cue.event is not None]
+
+
+@dataclass
+class CueJitter:
+    label: str
+    requested: int
+    issued: int
+    lead_ms: int = 0
+
+    def error(self) -> int:
+        # how far from its planned media position the cue was acted on
+        return self.issued - (self.requested - self.lead_ms)
+
+
+def _parse_light(spec: Dict[str, Any]) -> Light:
+    if "temperature" in spec:
+        return Light(Light.Type.TEMP, temperature=spec["temperature"], brightness=spec.get("brightness", 100))
+    if "hue" in spec:
+        return Light(Light.Type.COLOR, hue=spec["hue"], saturation=spec.get("saturation", 100),
+                     brightness=spec.get("brightness", 100))
+    raise RuntimeError(f"Light needs a 'temperature' or a 'hue': {spec}")
+
+
+def parse_cue_sheet(path: str, data: Dict[str, Any]) -> CueSheet:
+    cues = [Cue(position=int(entry["at"]),
+                light=_parse_light(entry["light"]) if "light" in entry else None,
+                event=entry.get("event"))
+            for entry in data.get("cues", [])]
+    cues.sort(key=lambda cue: cue.position)
+    return CueSheet(path, cues, int(data.get("lead_ms", DEFAULT_LEAD_MS)))
+
+
+def find_cue_sheet(media: Media) -> Optional[Path]:
+    # next to the media file first, then the sheets bundled with the app
+    source = Path(media.path)
+    for directory in [source.parent, Path.cwd() / BUNDLED_CUE_SHEETS]:
+        for suffix in CUE_SHEET_SUFFIXES:
+            candidate = directory / f"{source.stem}{suffix}"
+            if candidate.is_file():
+                return candidate
+    return None
+
+
+_compiled: Dict[str, Tuple[float, CueSheet]] = dict()
+
+
+def load_cue_sheet(media: Media) -> CueSheet:
+    # Sheets are compiled once and recompiled when the file changes, so they
+    # can be edited between games without restarting the app
+    path = find_cue_sheet(media)
+    if path is None:
+        raise RuntimeError(f"No cue sheet found for '{media.path}'")
+    mtime = os.path.getmtime(path)
+    cached = _compiled.get(str(path))
+    if cached is not None and cached[0] == mtime:
+        return cached[1]
+    if path.suffix == ".toml":
+        with open(path, "rb") as file:
+            data = tomllib.load(file)
+    else:
+        with open(path, encoding="utf-8") as file:
+            data = json.load(file)
+    sheet = parse_cue_sheet(str(path), data)
+    _compiled[str(path)] = (mtime, sheet)
+    return sheet
+
+
+class Timeline:
+    # Executes a cue sheet against the projector clock: lighting is issued
+    # lead_ms ahead of its cue, events fire on their position and can be
+    # awaited by the scene or handled by a callback. The cue errors are
+    # handed to the playback telemetry when the timeline is cancelled.
+
+    def __init__(self, sheet: CueSheet, display: Projector, lighting: LightingGroup,
+                 handlers: Optional[Dict[str, Callable[[], None]]] = None, lead_ms: Optional[int] = None,
+                 telemetry: Optional[PlaybackTelemetry] = None):
+        self.sheet = sheet
+        self._display = display
+        self._lighting = lighting
+        self._handlers = handlers if handlers is not None else dict()
+        self._telemetry = telemetry
+        self._lead_ms = sheet.lead_ms if lead_ms is None else lead_ms
+        self._futures: List[asyncio.Future] = []
+        self._events: Dict[str, asyncio.Future] = dict()
+        self.reports: List[CueJitter] = []
+
+    async def play(self, media: Media, start_ms: Optional[int] = None,
+                   outputs: Optional[OutputGroup] = None) -> asyncio.Task:
+        # Starts the media, on every output of the group if given, and arms
+        # the cues once play() has reset the clock
+        player = self._display if outputs is None else outputs
+        reset = self._display.clock.next_reset()
+        task = asyncio.get_event_loop().create_task(player.play(media, start_ms))
+        await asyncio.wait([reset, task], return_when=asyncio.FIRST_COMPLETED)
+        if reset.done():
+            self.start()
+        else:  # play() failed before opening the media
+            reset.cancel()
+        return task
+
+    def start(self) -> None:
+        for cue in self.sheet.cues:
+            if cue.light is not None:
+                self._arm(max(0, cue.position - self._lead_ms), self._fire_light, cue)
+            if cue.event is not None:
+                self._events.setdefault(cue.event, self._arm(cue.position, self._fire_event, cue))
+
+    def _arm(self, position: int, fire: Callable[[Cue], None], cue: Cue) -> asyncio.Future:
+        # a callback fires again after a seek back, the future resolves on
+        # the first firing and cancel() drops the cue through it
+        future = self._display.cues.add(position, lambda actual: fire(cue))
+        self._futures.append(future)
+        return future
+
+    def _fire_light(self, cue: Cue) -> None:
+        self._lighting.set(cue.light)
+        # the error is measured against the position the player reports, the
+        # clock that fired the cue would only be compared with itself
+        self.reports.append(CueJitter("light", cue.position, self._display.get_position(), self._lead_ms))
+
+    def _fire_event(self, cue: Cue) -> None:
+        self.reports.append(CueJitter(cue.event, cue.position, self._display.get_position()))
+        handler = self._handlers.get(cue.event)
+        if handler is not None:
+            handler()
+
+    async def wait(self, event: str) -> int:
+        if event not in self._events:
+            raise RuntimeError(f"Cue sheet '{self.sheet.path}' has no event '{event}'")
+        return await asyncio.shield(self._events[event])
+
+    def cancel(self) -> None:
+        for future in self._futures:
+            future.cancel()
+        self._futures.clear()
+        if not self.reports:
+            return
+        errors = [report.error() for report in self.reports]
+        if self._telemetry is not None:
+            self._telemetry.cue_sheet(CueSheetRecord(
+                self.sheet.path, len(errors), round(sum(errors) / len(errors), 1), max(errors, key=abs)))
+        if len(self.reports) > MAX_LOGGED_CUES:
+            _log.info("Cue sheet %s: %d cues, error mean %+.0f ms, max %+d ms", self.sheet.path, len(errors),
+                      sum(errors) / len(errors), max(errors, key=abs))
+        else:
+            _log.info("Cue sheet %s: %s", self.sheet.path,
+                      ", ".join(f"{report.label}@{report.requested} {report.error():+d} ms" for report in self.reports))
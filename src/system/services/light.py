@@ -0,0 +1,16 @@
+from dataclasses import dataclass
+from enum import Enum
+from typing import Optional
+
+
+@dataclass
+class Light:
+    class Type(Enum):
+        COLOR = 0,
+        TEMP = 1
+
+    type: Type
+    brightness: int
+    hue: Optional[int] = None
+    saturation: Optional[int] = None
+    temperature: Optional[int] = None
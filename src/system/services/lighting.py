@@ -1,45 +1,389 @@
+import asyncio
+import json
+import logging
+import math
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
-from enum import Enum
-from typing import Optional
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Protocol, Set
 
-from PyP100 import PyL530
+import requests
+
+from .light import Light
+from .tapo import TapoBulb, TapoError
+
+_log = logging.getLogger(__name__)
+
+# A single HTTP request to the bulb
+REQUEST_TIMEOUT = 2.0
+# A whole command, including the wait behind earlier commands
+COMMAND_TIMEOUT = 5.0
+# Commands per second the bulb keeps up with
+MAX_RATE = 5.0
+# Backoff between attempts to re-establish a lost session
+RECONNECT_DELAY = 0.5
+MAX_RECONNECT_DELAY = 30.0
+# The shadow state is re-read from the bulb when it is older than this, to
+# pick up changes made from the Tapo app or the wall switch
+POLL_INTERVAL = 30.0
+# Upper bounds of the round-trip latency buckets, the last bucket is unbounded
+LATENCY_BUCKETS_MS = [5, 10, 20, 50, 100, 200, 500, 1000, 2000]
+
+# Bulbs of a group share the session cache file and save from their own workers
+_session_cache_lock = threading.Lock()
+
+
+def _changes(known: Optional[Light], light: Light) -> Set[str]:
+    # bulb calls needed to get from the known state to the light
+    changes = set()
+    if light.type is Light.Type.TEMP:
+        if known is None or known.type is not Light.Type.TEMP or known.temperature != light.temperature:
+            changes.add("temperature")
+    elif known is None or known.type is not Light.Type.COLOR \
+            or (known.hue, known.saturation) != (light.hue, light.saturation):
+        changes.add("color")
+    if known is None or known.brightness != light.brightness:
+        changes.add("brightness")
+    return changes
+
+
+def _device_params(light: Light, changes: Set[str]) -> Dict[str, Any]:
+    params: Dict[str, Any] = dict()
+    if "temperature" in changes:
+        params["color_temp"] = light.temperature
+    if "color" in changes:
+        params.update(hue=light.hue, saturation=light.saturation, color_temp=0)
+    if "brightness" in changes:
+        params["brightness"] = light.brightness
+    return params
 
 
 @dataclass
-class Light:
-    class Type(Enum):
-        COLOR = 0,
-        TEMP = 1
+class ShadowState:
+    # Last known state of the bulb: None while it is unknown (never read, or a
+    # command failed halfway), updated_at is time.monotonic() of the update
+    light: Optional[Light] = None
+    updated_at: Optional[float] = None
+    # "command" when our own command set it, "poll" when read from the bulb
+    source: Optional[str] = None
+
+    def age(self) -> float:
+        return math.inf if self.updated_at is None else time.monotonic() - self.updated_at
+
+    def stale(self, max_age: float) -> bool:
+        return self.light is None or self.age() > max_age
+
+
+@dataclass
+class LightingStats:
+    requested: int = 0
+    # commands replaced by a newer one before they were sent
+    coalesced: int = 0
+    # commands that matched the known bulb state
+    skipped: int = 0
+    sent: int = 0
+    failed: int = 0
+    # round-trips to the bulb, one per command unless the firmware rejects
+    # combined fields
+    requests: int = 0
+
+
+class LatencyHistogram:
+    # Round-trip times of a bulb in fixed buckets, cheap enough to keep for
+    # every command of a session
+
+    def __init__(self, bounds: Optional[List[float]] = None):
+        self.bounds = list(LATENCY_BUCKETS_MS if bounds is None else bounds)
+        self.counts = [0] * (len(self.bounds) + 1)
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+
+    def add(self, latency_ms: float) -> None:
+        index = next((i for i, bound in enumerate(self.bounds) if latency_ms <= bound), len(self.bounds))
+        self.counts[index] += 1
+        self.total_ms += latency_ms
+        self.max_ms = max(self.max_ms, latency_ms)
+
+    def count(self) -> int:
+        return sum(self.counts)
+
+    def mean(self) -> float:
+        return self.total_ms / self.count() if self.count() else 0.0
+
+    def percentile(self, fraction: float) -> float:
+        # upper bound of the bucket the percentile falls into
+        rank, seen = fraction * self.count(), 0
+        for index, count in enumerate(self.counts):
+            seen += count
+            if count and seen >= rank:
+                return self.bounds[index] if index < len(self.bounds) else self.max_ms
+        return 0.0
+
+    def buckets(self) -> str:
+        labels = [f"<={bound:g}" for bound in self.bounds] + [f">{self.bounds[-1]:g}"]
+        return " ".join(f"{label}:{count}" for label, count in zip(labels, self.counts) if count)
+
+    def __str__(self) -> str:
+        return (f"n={self.count()} mean={self.mean():.1f} ms p50<={self.percentile(0.5):g} ms "
+                f"p95<={self.percentile(0.95):g} ms max={self.max_ms:.1f} ms")
+
+
+class LightingDevice(Protocol):
+    # What a LightingGroup drives: a Tapo bulb (Lighting) or the fixtures on
+    # an Art-Net node (ArtNetLighting)
+    max_rate: float
+    shadow: ShadowState
+    stats: LightingStats
+    latency: LatencyHistogram
+
+    def start(self) -> None: ...
+
+    def online(self) -> bool: ...
+
+    async def wait_online(self) -> None: ...
+
+    def set(self, light: Light) -> asyncio.Future: ...
+
+    def state(self) -> Optional[Light]: ...
+
+    async def refresh(self) -> Optional[Light]: ...
 
-    type: Type
-    brightness: int
-    hue: Optional[int] = None
-    saturation: Optional[int] = None
-    temperature: Optional[int] = None
+    def close(self) -> None: ...
 
 
 class Lighting:
-    _bulb: PyL530
-
-    def __init__(self, ip: str, login: str, password: str):
-        #self._bulb = PyL530.L530(ip, login, password)
-        #self._bulb.handshake()
-        #self._bulb.login()
-        #self.set(Light(Light.Type.COLOR, 100, hue=249, saturation=87))
-        pass
-
-    def set(self, light: Light):
-        # if light.type is Light.Type.TEMP:
-        #     self._bulb.setColorTemp(light.temperature)
-        # elif light.type is Light.Type.COLOR:
-        #     self._bulb.setColor(light.hue, light.saturation)
-        # self._bulb.setBrightness(light.brightness)
-        pass
-
-    def state(self):
-        info = self._bulb.getDeviceInfo()["result"]
-
-        if "hue" in info:
+    # Bulb I/O runs in order on a dedicated worker thread over a keep-alive
+    # session, so the event loop never waits on the network.
+    # The bulb state is shadowed: updated from our own successful commands
+    # and re-read in the background once it is older than poll_interval, so
+    # state() answers without I/O and refresh() forces a read.
+    # Commands are latest-wins: while one is being sent only the newest
+    # requested state waits, it is diffed against the shadow state and
+    # sent no faster than max_rate commands per second. Every set() resolves
+    # to whether the bulb reached the state requested last.
+    # The session is set up by start() in the background, reused from the
+    # session cache when the bulb still accepts it, and re-established with
+    # exponential backoff whenever it is lost. While offline set() resolves
+    # to False at once and the latest state waits for the reconnect.
+
+    _bulb: Optional[TapoBulb] = None
+
+    def __init__(self, ip: str, login: str, password: str, max_rate: float = MAX_RATE,
+                 request_timeout: float = REQUEST_TIMEOUT, command_timeout: float = COMMAND_TIMEOUT,
+                 session_cache: Optional[str] = None, poll_interval: float = POLL_INTERVAL):
+        self._loop = asyncio.get_event_loop()
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="lighting")
+        self._command_timeout = command_timeout
+        self._session_cache = session_cache
+        self.max_rate = max_rate
+        self._interval = 1 / max_rate
+        self._poll_interval = poll_interval
+        self._last_sent = 0.0
+        self.shadow = ShadowState()
+        self._pending: Optional[Light] = None
+        self._waiters: List[asyncio.Future] = []
+        self._sender: Optional[asyncio.Task] = None
+        self._connector: Optional[asyncio.Task] = None
+        self._poller: Optional[asyncio.Task] = None
+        self._online = asyncio.Event()
+        self._lost = asyncio.Event()
+        self.stats = LightingStats()
+        self.latency = LatencyHistogram()
+        self._device = (ip, login, password, request_timeout) if ip else None
+
+    def start(self) -> None:
+        if self._device is not None and self._connector is None:
+            self._connector = self._loop.create_task(self._keep_connected())
+            self._poller = self._loop.create_task(self._poll())
+
+    def online(self) -> bool:
+        return self._online.is_set()
+
+    async def wait_online(self) -> None:
+        await self._online.wait()
+
+    def set(self, light: Light) -> asyncio.Future:
+        self.stats.requested += 1
+        waiter = self._loop.create_future()
+        if self._device is None:
+            waiter.set_result(False)
+            return waiter
+        if self._pending is not None:
+            self.stats.coalesced += 1
+        self._pending = light
+        if self.online():
+            self._waiters.append(waiter)
+        else:
+            # the state is still sent once the session is back
+            waiter.set_result(False)
+        if self._sender is None or self._sender.done():
+            self._sender = self._loop.create_task(self._send_pending())
+        return waiter
+
+    def state(self) -> Optional[Light]:
+        return self.shadow.light
+
+    async def refresh(self) -> Optional[Light]:
+        # reads the bulb now, the shadow state is kept when it cannot be read
+        if not self.online():
+            return self.shadow.light
+        try:
+            light = await asyncio.wait_for(
+                self._loop.run_in_executor(self._executor, self._read_state), self._command_timeout)
+        except Exception as error:  # TapoError, requests and cipher errors alike
+            self._failed("state", error)
+        else:
+            self._update_shadow(light, "poll")
+        return self.shadow.light
+
+    def close(self) -> None:
+        _log.info("Lighting commands: %s, round-trips: %s", self.stats, self.latency)
+        for task in [self._sender, self._connector, self._poller]:
+            if task is not None:
+                task.cancel()
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    # ===== Connection =====
+
+    async def _keep_connected(self) -> None:
+        delay = RECONNECT_DELAY
+        while True:
+            if await self._complete("connect", self._connect):
+                delay = RECONNECT_DELAY
+                self._lost.clear()
+                self._online.set()
+                await self._lost.wait()
+            else:
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, MAX_RECONNECT_DELAY)
+
+    async def _poll(self) -> None:
+        while True:
+            await self._online.wait()
+            # commands keep the shadow fresh while they are being sent
+            if self._pending is None and self.shadow.stale(self._poll_interval):
+                await self.refresh()
+            # wake up when the shadow turns stale
+            remaining = self._poll_interval - self.shadow.age()
+            await asyncio.sleep(remaining if remaining > 0 else self._poll_interval)
+
+    def _update_shadow(self, light: Optional[Light], source: str) -> None:
+        self.shadow = ShadowState(light, time.monotonic(), source)
+
+    def _failed(self, name: str, error: Exception) -> None:
+        _log.warning("Lighting %s failed: %s", name, error)
+        if not isinstance(error, TapoError) or error.session_expired():
+            self._online.clear()
+            self._lost.set()
+
+    # ===== Commands =====
+
+    async def _send_pending(self) -> None:
+        while self._pending is not None:
+            if not self.online():
+                self._resolve(self._waiters, False)
+                self._waiters = []
+                await self._online.wait()
+                continue
+            delay = self._last_sent + self._interval - self._loop.time()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            light, waiters = self._pending, self._waiters
+            self._pending, self._waiters = None, []
+
+            changes = _changes(self.shadow.light, light)
+            if not changes:
+                self.stats.skipped += 1
+                done = True
+            else:
+                self._last_sent = self._loop.time()
+                done = await self._complete("set", self._apply, light, changes)
+                # a failed command may have changed some fields of the bulb
+                self._update_shadow(light if done else None, "command")
+                if done:
+                    self.stats.sent += 1
+                else:
+                    self.stats.failed += 1
+                    if not self.online() and self._pending is None:
+                        # resent once the session is back
+                        self._pending = light
+            self._resolve(waiters, done)
+
+    @staticmethod
+    def _resolve(waiters: List[asyncio.Future], done: bool) -> None:
+        for waiter in waiters:
+            if not waiter.done():
+                waiter.set_result(done)
+
+    async def _complete(self, name: str, command: Callable, *args) -> bool:
+        try:
+            await asyncio.wait_for(
+                self._loop.run_in_executor(self._executor, command, *args), self._command_timeout)
+        except Exception as error:  # timeouts, TapoError, requests and cipher errors alike
+            self._failed(name, error)
+            return False
+        return True
+
+    # ===== Device I/O (called on the worker thread) =====
+
+    def _connect(self) -> None:
+        if self._bulb is None:
+            # the RSA key pair is generated by the first handshake, also off the loop
+            self._bulb = TapoBulb(*self._device)
+        # combined fields are tried again on every session, a firmware update
+        # may have added them
+        self._bulb.composite = True
+        cached = self._load_session()
+        if cached is not None:
+            self._bulb.restore_session(cached)
+            try:
+                self._bulb.get_device_info()
+                return
+            except (TapoError, requests.RequestException):
+                _log.info("Cached lighting session was not accepted, handshaking")
+        self._bulb.handshake()
+        self._bulb.login()
+        self._save_session()
+
+    def _read_sessions(self) -> Dict[str, Dict[str, str]]:
+        if not os.path.exists(self._session_cache):
+            return dict()
+        try:
+            with open(self._session_cache, encoding="utf-8") as file:
+                return json.load(file)
+        except (OSError, ValueError):
+            return dict()
+
+    def _load_session(self) -> Optional[Dict[str, str]]:
+        if self._session_cache is None:
+            return None
+        with _session_cache_lock:
+            return self._read_sessions().get(self._bulb.ipAddress)
+
+    def _save_session(self) -> None:
+        if self._session_cache is None:
+            return
+        with _session_cache_lock:
+            sessions = self._read_sessions()
+            sessions[self._bulb.ipAddress] = self._bulb.export_session()
+            Path(self._session_cache).parent.mkdir(parents=True, exist_ok=True)
+            # the session keys let anyone on the network drive the bulb
+            descriptor = os.open(self._session_cache, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+            with open(descriptor, "w", encoding="utf-8") as file:
+                json.dump(sessions, file)
+
+    def _apply(self, light: Light, changes: Set[str]) -> None:
+        started = time.perf_counter()
+        self.stats.requests += self._bulb.set_state(_device_params(light, changes))
+        self.latency.add((time.perf_counter() - started) * 1000)
+
+    def _read_state(self) -> Light:
+        info = self._bulb.get_device_info()
+
+        if info.get("color_temp", 0) == 0 and "hue" in info:
             return Light(
                 type=Light.Type.COLOR,
                 hue=info["hue"],
@@ -51,4 +395,4 @@ class Lighting:
                 type=Light.Type.TEMP,
                 temperature=info["color_temp"],
                 brightness=info["brightness"]
-            )
\ No newline at end of file
+            )
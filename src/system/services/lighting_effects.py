@@ -0,0 +1,121 @@
+import asyncio
+from dataclasses import dataclass, replace
+from typing import List, Optional
+
+from .lighting import Light, LightingDevice
+
+
+@dataclass
+class Keyframe:
+    # seconds from the start of the effect
+    at: float
+    light: Light
+    # jump to the light at `at` instead of easing toward it
+    step: bool = False
+
+
+@dataclass
+class Effect:
+    # Keyframed lighting curve, the first keyframe is at 0 and the keyframes
+    # are played `repeat` times, forever when it is None
+    keyframes: List[Keyframe]
+    repeat: Optional[int] = 1
+
+    def period(self) -> float:
+        return self.keyframes[-1].at
+
+    def duration(self) -> Optional[float]:
+        return None if self.repeat is None else self.period() * self.repeat
+
+    def sample(self, elapsed: float) -> Light:
+        duration = self.duration()
+        if self.period() <= 0 or (duration is not None and elapsed >= duration):
+            return self.keyframes[-1].light
+        elapsed %= self.period()
+        for previous, following in zip(self.keyframes, self.keyframes[1:]):
+            if elapsed < following.at:
+                if following.step or previous.light.type is not following.light.type:
+                    return previous.light
+                return _blend(previous.light, following.light, (elapsed - previous.at) / (following.at - previous.at))
+        return self.keyframes[-1].light
+
+
+def _lerp(start: int, end: int, progress: float) -> int:
+    return round(start + (end - start) * progress)
+
+
+def _blend(start: Light, end: Light, progress: float) -> Light:
+    if start.type is Light.Type.TEMP:
+        return Light(Light.Type.TEMP, temperature=_lerp(start.temperature, end.temperature, progress),
+                     brightness=_lerp(start.brightness, end.brightness, progress))
+    # the shorter way around the color wheel
+    turn = (end.hue - start.hue + 180) % 360 - 180
+    return Light(Light.Type.COLOR, hue=round(start.hue + turn * progress) % 360,
+                 saturation=_lerp(start.saturation, end.saturation, progress),
+                 brightness=_lerp(start.brightness, end.brightness, progress))
+
+
+def fade(start: Light, end: Light, duration: float) -> Effect:
+    return Effect([Keyframe(0, start), Keyframe(duration, end)])
+
+
+def pulse(light: Light, period: float = 1.0, low: int = 10, count: Optional[int] = None) -> Effect:
+    dim = replace(light, brightness=low)
+    return Effect([Keyframe(0, light), Keyframe(period / 2, dim), Keyframe(period, light)], count)
+
+
+def strobe(light: Light, period: float = 0.4, low: int = 1, count: Optional[int] = None) -> Effect:
+    dim = replace(light, brightness=low)
+    return Effect([Keyframe(0, light), Keyframe(period / 2, dim, step=True), Keyframe(period, light, step=True)],
+                  count)
+
+
+def cycle(hues: List[int], period: float, saturation: int = 100, brightness: int = 100,
+          count: Optional[int] = None) -> Effect:
+    # through every hue and back to the first one
+    lights = [Light(Light.Type.COLOR, hue=hue, saturation=saturation, brightness=brightness)
+              for hue in hues + hues[:1]]
+    step = period / len(hues)
+    return Effect([Keyframe(i * step, light) for i, light in enumerate(lights)], count)
+
+
+@dataclass
+class EffectReport:
+    device: str
+    requested_rate: float
+    # frames the bulb was given, every other frame of the curve was dropped
+    frames: int = 0
+    failed: int = 0
+    elapsed: float = 0.0
+
+    def achieved_rate(self) -> float:
+        return self.frames / self.elapsed if self.elapsed > 0 else 0.0
+
+    def dropped(self) -> int:
+        return max(0, int(self.requested_rate * self.elapsed) - self.frames)
+
+    def __str__(self) -> str:
+        return (f"{self.device}: {self.achieved_rate():.1f}/{self.requested_rate:g} frames/s, "
+                f"frames={self.frames} dropped={self.dropped()} failed={self.failed} in {self.elapsed:.1f} s")
+
+
+async def render(device: LightingDevice, effect: Effect, report: EffectReport) -> None:
+    # A frame is sampled only once the bulb took the previous one, so a slow
+    # bulb skips frames of the curve instead of falling behind it
+    loop = asyncio.get_event_loop()
+    interval = 1 / report.requested_rate
+    duration = effect.duration()
+    started = loop.time()
+    try:
+        while True:
+            frame = loop.time()
+            finished = duration is not None and frame - started >= duration
+            done = await device.set(effect.sample(frame - started))
+            report.frames += 1
+            if not done:
+                report.failed += 1
+            if finished:
+                return
+            await asyncio.sleep(max(0.0, frame + interval - loop.time()))
+    finally:
+        report.elapsed = loop.time() - started
@@ -0,0 +1,142 @@
+import asyncio
+import logging
+import statistics
+from collections import Counter
+from functools import partial
+from typing import Dict, List, Optional
+
+from .lighting import LatencyHistogram, Light, LightingDevice, ShadowState
+from .lighting_effects import Effect, EffectReport, render
+
+_log = logging.getLogger(__name__)
+
+# A bulb finishing this much later than the rest of its group is visible as
+# a wave across the room and counted as a straggler
+STRAGGLER_MS = 100.0
+
+
+class LightingGroup:
+    # Named bulbs and Art-Net nodes showing one lighting state. Every bulb has
+    # its own worker thread and keep-alive session, so a state reaches all of
+    # them at once rather than one bulb after another. How far apart they finish is
+    # tracked per state, the bulb lagging behind the others is reported as a
+    # straggler next to its round-trip latency histogram.
+    # Effects are rendered for every bulb at its own pace. A static state set
+    # while an effect plays stops the effect.
+
+    def __init__(self, devices: Dict[str, LightingDevice], straggler_ms: float = STRAGGLER_MS):
+        self.devices = devices
+        self._loop = asyncio.get_event_loop()
+        self._straggler_ms = straggler_ms
+        # time between the first and the last bulb reaching a state
+        self.spread = LatencyHistogram()
+        self.stragglers: Counter = Counter()
+        # reports of the effect played last, by bulb name
+        self.effect_reports: Dict[str, EffectReport] = dict()
+        self._effect: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        for device in self.devices.values():
+            device.start()
+
+    def online(self) -> bool:
+        return any(device.online() for device in self.devices.values())
+
+    async def wait_online(self) -> None:
+        await asyncio.gather(*[device.wait_online() for device in self.devices.values()])
+
+    def set(self, light: Light) -> asyncio.Future:
+        # resolves to whether every bulb reached the state
+        self.stop_effect()
+        result = self._loop.create_future()
+        if not self.devices:
+            result.set_result(False)
+            return result
+        started = self._loop.time()
+        pending = {name: device.set(light) for name, device in self.devices.items()}
+        finished: Dict[str, Optional[float]] = dict()
+        for name, future in pending.items():
+            future.add_done_callback(partial(self._device_done, name, started, pending, finished, result))
+        return result
+
+    def _device_done(self, name: str, started: float, pending: Dict[str, asyncio.Future],
+                     finished: Dict[str, Optional[float]], result: asyncio.Future, future: asyncio.Future) -> None:
+        done = not future.cancelled() and future.result()
+        finished[name] = (self._loop.time() - started) * 1000 if done else None
+        if len(finished) < len(pending):
+            return
+        self._track_spread({name: elapsed for name, elapsed in finished.items() if elapsed is not None})
+        if not result.done():
+            result.set_result(all(elapsed is not None for elapsed in finished.values()))
+
+    def _track_spread(self, finished: Dict[str, float]) -> None:
+        if len(finished) < 2:
+            return
+        self.spread.add(max(finished.values()) - min(finished.values()))
+        slowest = max(finished, key=finished.get)
+        others = [elapsed for name, elapsed in finished.items() if name != slowest]
+        lag = finished[slowest] - statistics.median(others)
+        if lag > self._straggler_ms:
+            self.stragglers[slowest] += 1
+            _log.debug("Bulb '%s' reached the state %.0f ms after the rest of the group", slowest, lag)
+
+    def play(self, effect: Effect, rate: Optional[float] = None) -> asyncio.Task:
+        # Samples the effect at `rate` frames per second, by default as fast as
+        # each bulb takes commands. The task finishes with the effect, an action
+        # awaiting it stops the effect when the action is interrupted.
+        self.stop_effect()
+        self._effect = self._loop.create_task(self._play(effect, rate))
+        return self._effect
+
+    def stop_effect(self) -> None:
+        if self._effect is not None:
+            self._effect.cancel()
+            self._effect = None
+
+    async def _play(self, effect: Effect, rate: Optional[float]) -> Dict[str, EffectReport]:
+        reports = {name: EffectReport(name, rate if rate is not None else device.max_rate)
+                   for name, device in self.devices.items()}
+        self.effect_reports = reports
+        renderers = [self._loop.create_task(render(device, effect, reports[name]))
+                     for name, device in self.devices.items()]
+        try:
+            await asyncio.gather(*renderers)
+        finally:
+            for renderer in renderers:
+                renderer.cancel()
+            await asyncio.gather(*renderers, return_exceptions=True)
+            for report in reports.values():
+                _log.info("Lighting effect %s", report)
+        return reports
+
+    def state(self) -> Dict[str, Optional[Light]]:
+        # shadow states, no bulb is asked
+        return {name: device.state() for name, device in self.devices.items()}
+
+    def shadows(self) -> Dict[str, ShadowState]:
+        return {name: device.shadow for name, device in self.devices.items()}
+
+    async def refresh(self) -> Dict[str, Optional[Light]]:
+        states = await asyncio.gather(*[device.refresh() for device in self.devices.values()])
+        return dict(zip(self.devices, states))
+
+    def slowest(self) -> Optional[str]:
+        # the bulb that lagged behind most often, or the one with the slowest
+        # round-trips when none did
+        if self.stragglers:
+            return self.stragglers.most_common(1)[0][0]
+        measured = {name: device.latency.mean() for name, device in self.devices.items() if device.latency.count()}
+        return max(measured, key=measured.get) if measured else None
+
+    def report(self) -> List[str]:
+        lines = [f"{name}: {device.latency} [{device.latency.buckets()}], stragglers={self.stragglers[name]}"
+                 for name, device in self.devices.items()]
+        lines.append(f"group spread: {self.spread}, slowest: {self.slowest()}")
+        return lines
+
+    def close(self) -> None:
+        self.stop_effect()
+        for device in self.devices.values():
+            device.close()
+        for line in self.report():
+            _log.info("Lighting %s", line)
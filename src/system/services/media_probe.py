@@ -0,0 +1,56 @@
+import json
+import os
+import subprocess
+from dataclasses import dataclass
+from typing import Optional
+
+PROBE_TIMEOUT = 30
+
+
+@dataclass
+class MediaInfo:
+    path: str
+    size: int
+    mtime: float
+    duration_ms: Optional[int] = None
+    width: Optional[int] = None
+    height: Optional[int] = None
+    video_codec: Optional[str] = None
+    audio_tracks: int = 0
+    error: Optional[str] = None
+    # ffprobe could not run or did not finish: not stored, probed again on the next scan
+    transient: bool = False
+
+
+def probe(path: str, ffprobe: str = "ffprobe") -> MediaInfo:
+    stat = os.stat(path)
+    result = MediaInfo(path, stat.st_size, stat.st_mtime)
+    try:
+        output = subprocess.run(
+            [ffprobe, "-v", "error", "-print_format", "json", "-show_format", "-show_streams", path],
+            capture_output=True, check=True, timeout=PROBE_TIMEOUT).stdout
+    except subprocess.CalledProcessError as error:
+        result.error = str(error)
+        return result
+    except (OSError, subprocess.SubprocessError) as error:
+        result.error = str(error)
+        result.transient = True
+        return result
+
+    try:
+        info = json.loads(output)
+    except ValueError as error:
+        result.error = f"Unreadable ffprobe output: {error}"
+        return result
+    duration = info.get("format", {}).get("duration")
+    if duration is not None:
+        result.duration_ms = int(float(duration) * 1000)
+    for stream in info.get("streams", []):
+        kind = stream.get("codec_type")
+        if kind == "video" and result.video_codec is None:
+            result.video_codec = stream.get("codec_name")
+            result.width = stream.get("width")
+            result.height = stream.get("height")
+        elif kind == "audio":
+            result.audio_tracks += 1
+    return result
@@ -1,2 +1,8 @@
 from .vlc_projector import VlcProjector
 from .media import Media
+from .playback import PlaybackResult
+from .cues import CueDispatcher, CueReport, PlayerClock
+from .projector import Projector, create_projector
+from .null_projector import NullProjector, VirtualClock
+from .telemetry import CueSheetRecord, DecodeStats, FileTelemetry, PlaybackRecord, PlaybackTelemetry
+from .outputs import MAIN_OUTPUT, OutputGroup, SkewSample
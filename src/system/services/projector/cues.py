@@ -0,0 +1,211 @@
+import asyncio
+import heapq
+import itertools
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Callable, Deque, List, Optional, Tuple
+
+# A time update this far behind the interpolated clock is treated as a seek
+SEEK_THRESHOLD = 500
+
+
+class PlayerClock:
+    # Players report their time a few times per second only, in between the
+    # media time is extrapolated from `timebase`, seconds of a monotonic
+    # clock: perf_counter by default, the clock the player renders on if it
+    # exposes one.
+
+    running: bool = False
+    rate: float = 1.0
+
+    def __init__(self, timebase: Callable[[], float] = time.perf_counter):
+        self._timebase = timebase
+        self._time = 0
+        self._at = timebase()
+        self._resets: List[asyncio.Future] = []
+
+    def now(self, at: Optional[float] = None) -> float:
+        if not self.running:
+            return self._time
+        if at is None:
+            at = self._timebase()
+        return self._time + (at - self._at) * 1000 * self.rate
+
+    def update(self, position: int, at: Optional[float] = None) -> None:
+        self._time = position
+        self._at = self._timebase() if at is None else at
+
+    def set_running(self, running: bool, at: Optional[float] = None) -> None:
+        self.update(int(self.now(at)), at)
+        self.running = running
+
+    def reset(self, position: int = 0) -> None:
+        self.running = False
+        self.update(position)
+        self.announce_reset()
+
+    def next_reset(self) -> asyncio.Future:
+        # Resolves with the start position once play() has reset the clock
+        # for its media, cues armed from then on count from that media.
+        # Ask for it before calling play().
+        future = asyncio.get_event_loop().create_future()
+        self._resets.append(future)
+        return future
+
+    def announce_reset(self) -> None:
+        # called by reset(), and by a projector whose media took over
+        # without resetting the clock in play()
+        resets, self._resets = self._resets, []
+        for future in resets:
+            if not future.done():
+                future.set_result(self._time)
+
+    def set_rate(self, rate: float, at: Optional[float] = None) -> None:
+        self.update(int(self.now(at)), at)
+        self.rate = rate
+
+    def until(self, position: int) -> float:
+        # seconds of wall clock until the media reaches the position
+        return max(0.0, (position - self.now()) / 1000 / self.rate)
+
+
+@dataclass
+class CueReport:
+    requested: int
+    # the position the player itself reported when the cue fired
+    actual: int
+
+    def error(self) -> int:
+        return self.actual - self.requested
+
+
+class _Cue:
+    def __init__(self, position: int, future: asyncio.Future, callback: Optional[Callable[[int], None]]):
+        self.position = position
+        self.future = future
+        self.callback = callback
+        self._cancelled = False
+
+    def fire(self, actual: int) -> None:
+        if not self.future.done():
+            self.future.set_result(actual)
+        if self.callback is not None:
+            self.callback(actual)
+
+    def cancel(self) -> None:
+        self._cancelled = True
+        self.future.cancel()
+
+    def cancelled(self) -> bool:
+        # a fired future stays armed, one cancelled by whoever holds it is not
+        return self._cancelled or self.future.cancelled()
+
+
+class CueDispatcher:
+    # Cues are kept in a min-heap by position, so a clock update only peeks at
+    # the earliest one. A timer is armed for the earliest cue from the
+    # interpolated clock, so cues fire between the player's time updates too.
+    # Reports record the position read from player_time at the firing, so
+    # they measure the cue against the player, not against the clock that
+    # fired it.
+    # A cue with a callback fires again when the media is sought back before
+    # it, a plain wait resolves once. Cancelling the returned future drops
+    # the cue.
+
+    def __init__(self, clock: PlayerClock, loop: Optional[asyncio.AbstractEventLoop] = None,
+                 player_time: Optional[Callable[[], int]] = None):
+        self._clock = clock
+        self._loop = loop if loop is not None else asyncio.get_event_loop()
+        self._player_time = player_time
+        self._heap: List[Tuple[int, int, _Cue]] = []
+        self._fired: List[_Cue] = []
+        self._order = itertools.count()
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._purge_handle: Optional[asyncio.Handle] = None
+        self._last_update = 0
+        self.reports: Deque[CueReport] = deque(maxlen=100)
+
+    def add(self, position: int, callback: Optional[Callable[[int], None]] = None) -> asyncio.Future:
+        future = self._loop.create_future()
+        cue = _Cue(position, future, callback)
+        future.add_done_callback(self._cue_done)
+        heapq.heappush(self._heap, (position, next(self._order), cue))
+        self.update()
+        return future
+
+    async def wait(self, position: int) -> int:
+        return await self.add(position)
+
+    def next_position(self) -> Optional[int]:
+        return self._heap[0][0] if self._heap else None
+
+    def clear(self) -> None:
+        for _, _, cue in self._heap:
+            cue.cancel()
+        self._heap.clear()
+        self._fired.clear()
+        self._cancel_timer()
+        if self._purge_handle is not None:
+            self._purge_handle.cancel()
+            self._purge_handle = None
+
+    def seek(self, position: int) -> None:
+        self._clock.update(position)
+        self._rearm(position)
+        self._last_update = position
+        self.update()
+
+    def update(self) -> None:
+        now = int(self._clock.now())
+        if now < self._last_update - SEEK_THRESHOLD:
+            self._rearm(now)
+        self._last_update = now
+        self._dispatch(now)
+        self._schedule()
+
+    # ===== Internal methods =====
+
+    def _rearm(self, now: int) -> None:
+        rearmed = [cue for cue in self._fired if cue.position > now]
+        self._fired = [cue for cue in self._fired if cue.position <= now]
+        for cue in rearmed:
+            heapq.heappush(self._heap, (cue.position, next(self._order), cue))
+
+    def _dispatch(self, now: int) -> None:
+        while self._heap and self._heap[0][0] <= now:
+            position, _, cue = heapq.heappop(self._heap)
+            if cue.cancelled():
+                continue
+            actual = now if self._player_time is None else self._player_time()
+            self.reports.append(CueReport(position, actual))
+            cue.fire(now)
+            if cue.callback is not None:
+                self._fired.append(cue)
+
+    def _cue_done(self, future: asyncio.Future) -> None:
+        # cancelled cues are dropped in one pass once the canceller is done,
+        # a whole cue sheet is usually cancelled at once
+        if future.cancelled() and self._purge_handle is None:
+            self._purge_handle = self._loop.call_soon(self._purge)
+
+    def _purge(self) -> None:
+        self._purge_handle = None
+        self._heap = [entry for entry in self._heap if not entry[2].cancelled()]
+        heapq.heapify(self._heap)
+        self._fired = [cue for cue in self._fired if not cue.cancelled()]
+        self._schedule()
+
+    def _schedule(self) -> None:
+        self._cancel_timer()
+        if self._heap and self._clock.running:
+            self._timer = self._loop.call_later(self._clock.until(self._heap[0][0]), self._tick)
+
+    def _cancel_timer(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+    def _tick(self) -> None:
+        self._timer = None
+        self.update()
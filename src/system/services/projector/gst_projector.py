@@ -1,3 +1,351 @@
+import asyncio
+import time
+from collections import deque
+from pathlib import Path
+from typing import Callable, Deque, Optional, Tuple
 
-class GstProjector:
-    pass
\ No newline at end of file
+import gi
+
+gi.require_version("Gst", "1.0")
+gi.require_version("GstVideo", "1.0")
+from gi.repository import Gst, GstVideo
+
+from PyQt6 import QtGui
+from PyQt6.QtCore import Qt
+from PyQt6.QtWidgets import QDialog, QFrame, QStackedLayout
+
+from system.services.projector.projector_ui import Ui_MediaDisplay
+
+from .cues import CueDispatcher, PlayerClock
+from .media import Media
+from .placeholder import PlaceholderSurface
+from .playback import Playback, PlaybackResult
+from .telemetry import PlaybackTelemetry
+from .timing import PlaybackTiming
+
+Gst.init(None)
+
+# The player clock runs on the pipeline clock, the position is re-read this
+# often only to catch stalls
+POSITION_INTERVAL = 1.0
+
+
+class GstProjector(QDialog):
+    fullscreen: bool = False
+
+    def __init__(self):
+        QDialog.__init__(self)
+
+        self.ui = Ui_MediaDisplay()
+        self.ui.setupUi(self)
+
+        self._loop = asyncio.get_event_loop()
+
+        # The video sink renders into its own surface. While idle, or until a
+        # cold open starts playing, the placeholder surface painted by Qt is
+        # shown instead and the pipeline rests in READY.
+        self._surfaces = QStackedLayout(self.ui.videoframe)
+        self._placeholder = PlaceholderSurface(f"{Path.cwd()}/assets/placeholder.jpg", self.ui.videoframe)
+        self._surfaces.addWidget(self._placeholder)
+        self._surface = QFrame(self.ui.videoframe)
+        self._surfaces.addWidget(self._surface)
+        self._window = int(self._surface.winId())
+
+        self.setWindowFlags(Qt.WindowType.Window)
+
+        self._pipeline = Gst.ElementFactory.make("playbin3", "projector")
+        if self._pipeline is None:
+            raise RuntimeError("GStreamer element 'playbin3' is not available")
+        self._pipeline.connect("about-to-finish", self._about_to_finish)
+        self._pipeline.get_bus().set_sync_handler(self._bus_message)
+
+        # Bus messages are stamped with the generation they were posted in, a
+        # new media is only opened after the pipeline was flushed to READY.
+        self._generation = 0
+        self._media: Optional[Media] = None
+        self._playback: Optional[Playback] = None
+        self._queued: Optional[Media] = None
+        self._prerolled: Optional[Tuple[Media, int]] = None
+        self._switching: Optional[Media] = None
+        self._adoptable = False
+        self._async_done: Optional[asyncio.Future] = None
+        self._position_timer: Optional[asyncio.TimerHandle] = None
+        self._resolve_source: Callable[[str], str] = lambda path: path
+        self._telemetry: Optional[PlaybackTelemetry] = None
+
+        self.clock = PlayerClock(self._pipeline_time)
+        self.cues = CueDispatcher(self.clock, self._loop, self.get_position)
+        self.timings: Deque[PlaybackTiming] = deque(maxlen=100)
+
+    def mouseDoubleClickEvent(self, a0: QtGui.QMouseEvent) -> None:
+        if self.fullscreen:
+            self.showNormal()
+            self.fullscreen = False
+        else:
+            self.showFullScreen()
+            self.fullscreen = True
+        super().mouseDoubleClickEvent(a0)
+
+    def set_source_resolver(self, resolver: Callable[[str], str]) -> None:
+        self._resolve_source = resolver
+
+    def set_telemetry(self, telemetry: PlaybackTelemetry) -> None:
+        self._telemetry = telemetry
+
+    def _pipeline_time(self) -> float:
+        # seconds of the clock the sinks synchronize to
+        return self._pipeline.get_pipeline_clock().get_time() / Gst.SECOND
+
+    def placeholder(self):
+        self.show()
+        self._queued = None
+        self._surfaces.setCurrentWidget(self._placeholder)
+        self._placeholder.repaint()
+        self._close()
+        self.clock.reset()
+        self.cues.update()
+
+    # ===== Playback =====
+
+    def _close(self) -> None:
+        self._pipeline.set_state(Gst.State.READY)
+        self._generation += 1
+        self._fail_async_done()
+        self._prerolled = None
+        if self._playback is not None:
+            self._playback.finish(PlaybackResult.Stopped)
+        self._media = None
+        self._playback = None
+        self._switching = None
+        self._adoptable = False
+
+    def _open(self, path: str, media: Media, playback: Playback, start_ms: int = 0) -> None:
+        self._close()
+        self._media = media
+        self._playback = playback
+        playback.opened = True
+        self._pipeline.set_property("uri", Gst.filename_to_uri(path))
+        self.clock.reset(start_ms)
+        self.cues.update()
+
+    async def _wait_async_done(self) -> bool:
+        # False when the media fails or is replaced before the state change
+        self._async_done = self._loop.create_future()
+        return await self._async_done
+
+    def _fail_async_done(self) -> None:
+        if self._async_done is not None and not self._async_done.done():
+            self._async_done.set_result(False)
+
+    async def _seek_paused(self, start_ms: int) -> bool:
+        self._pipeline.set_state(Gst.State.PAUSED)
+        if not await self._wait_async_done():
+            return False
+        self._pipeline.seek_simple(
+            Gst.Format.TIME, Gst.SeekFlags.FLUSH | Gst.SeekFlags.ACCURATE, start_ms * Gst.MSECOND)
+        return await self._wait_async_done()
+
+    async def preroll(self, media: Media, start_ms: Optional[int] = None) -> bool:
+        # An idle pipeline opens the media paused on its first correct frame.
+        # While a media plays, playbin3 can only switch to a queued uri from
+        # about-to-finish without a gap, from the start of the next media;
+        # that is not a preroll for a cut, so it returns False.
+        start_ms = media.start_ms if start_ms is None else start_ms
+        if self._playback is not None and not self._playback.done.done():
+            self._queued = media if start_ms == 0 else None
+            return False
+        self._queued = None
+        timing = PlaybackTiming(media.path, prerolled=True, requested_at=time.perf_counter(), start_ms=start_ms)
+        timing.source = self._resolve_source(media.path)
+        playback = Playback(self._loop, timing)
+        self._open(timing.source, media, playback, start_ms)
+        if start_ms == 0:
+            self._pipeline.set_state(Gst.State.PAUSED)
+            ready = await self._wait_async_done()
+        else:
+            ready = await self._seek_paused(start_ms)
+        if not ready or self._playback is not playback:
+            return False
+        self._prerolled = (media, start_ms)
+        return True
+
+    async def play(self, media: Media, start_ms: Optional[int] = None) -> PlaybackResult:
+        start_ms = media.start_ms if start_ms is None else start_ms
+        timing = PlaybackTiming(media.path, prerolled=False, requested_at=time.perf_counter(), start_ms=start_ms)
+        if self._adoptable and self._media == media and start_ms == 0:
+            self._adoptable = False
+            timing.prerolled = True
+            timing.first_frame_at = timing.first_correct_frame_at = time.perf_counter()
+            playback = self._playback
+            playback.timing = timing
+            # the clock was reset when the stream switched
+            self.clock.announce_reset()
+        elif self._prerolled == (media, start_ms):
+            # paused on the first correct frame, the clock was reset by preroll()
+            self._prerolled = None
+            timing.prerolled = True
+            timing.source = self._playback.timing.source
+            timing.first_frame_at = timing.first_correct_frame_at = time.perf_counter()
+            playback = self._playback
+            playback.timing = timing
+            self.clock.announce_reset()
+            self._pipeline.set_state(Gst.State.PLAYING)
+        else:
+            if self._queued == media:
+                self._queued = None
+            timing.source = self._resolve_source(media.path)
+            playback = Playback(self._loop, timing)
+            self._open(timing.source, media, playback, start_ms)
+            if start_ms == 0:
+                self._pipeline.set_state(Gst.State.PLAYING)
+            elif await self._seek_paused(start_ms):
+                timing.first_correct_frame_at = time.perf_counter()
+                self._pipeline.set_state(Gst.State.PLAYING)
+        self.timings.append(timing)
+        if self._telemetry is not None:
+            self._telemetry.track(playback)
+        return await playback.wait()
+
+    def reset(self):
+        self.cues.clear()
+
+    async def wait_position(self, position: int) -> int:
+        return await self.cues.wait(position)
+
+    # ===== GStreamer callbacks (called from streaming threads) =====
+
+    def _about_to_finish(self, pipeline: Gst.Element) -> None:
+        queued = self._queued
+        if queued is not None:
+            self._switching = queued
+            pipeline.set_property("uri", Gst.filename_to_uri(self._resolve_source(queued.path)))
+
+    def _bus_message(self, bus: Gst.Bus, message: Gst.Message) -> Gst.BusSyncReply:
+        if GstVideo.is_video_overlay_prepare_window_handle_message(message):
+            message.src.set_window_handle(self._window)
+            return Gst.BusSyncReply.DROP
+
+        generation = self._generation
+        at = time.perf_counter()
+        kind = message.type
+        if kind == Gst.MessageType.EOS:
+            self._loop.call_soon_threadsafe(self._playback_finished, generation, PlaybackResult.Ended)
+        elif kind == Gst.MessageType.ERROR:
+            self._loop.call_soon_threadsafe(self._playback_finished, generation, PlaybackResult.Error)
+        elif kind == Gst.MessageType.ASYNC_DONE:
+            self._loop.call_soon_threadsafe(self._async_completed, generation, at)
+        elif kind == Gst.MessageType.STREAM_START:
+            self._loop.call_soon_threadsafe(self._stream_started, generation)
+        elif kind == Gst.MessageType.STATE_CHANGED and message.src == self._pipeline:
+            _, state, _ = message.parse_state_changed()
+            self._loop.call_soon_threadsafe(self._state_changed, generation, state)
+        return Gst.BusSyncReply.DROP
+
+    # ===== GStreamer callbacks (marshalled onto the event loop) =====
+
+    def _playback_finished(self, generation: int, result: PlaybackResult) -> None:
+        if generation != self._generation:
+            return
+        self._fail_async_done()
+        self._prerolled = None
+        if self._playback is not None:
+            self._playback.finish(result)
+            self.clock.set_running(False)
+            self.cues.update()
+
+    def _async_completed(self, generation: int, at: float) -> None:
+        if generation != self._generation:
+            return
+        if self._async_done is not None and not self._async_done.done():
+            self._async_done.set_result(True)
+        playback = self._playback
+        if playback is not None:
+            playback.set_ready(True)
+            timing = playback.timing
+            if timing is not None and timing.first_frame_at is None:
+                timing.first_frame_at = at
+                if timing.start_ms == 0:
+                    timing.first_correct_frame_at = at
+
+    def _stream_started(self, generation: int) -> None:
+        media = self._switching
+        if generation != self._generation or media is None:
+            return
+        # the queued media took over without leaving PLAYING
+        if self._playback is not None:
+            self._playback.finish(PlaybackResult.Ended)
+        self._queued = None
+        self._switching = None
+        self._media = media
+        self._playback = Playback(self._loop)
+        self._playback.opened = self._playback.started = True
+        self._playback.set_ready(True)
+        self._adoptable = True
+        self.clock.reset()
+        self.clock.set_running(True)
+        self.cues.update()
+
+    def _state_changed(self, generation: int, state: Gst.State) -> None:
+        if generation != self._generation:
+            return
+        running = state == Gst.State.PLAYING
+        if running:
+            # the sink holds the first frame once the pipeline reaches PLAYING
+            self._surfaces.setCurrentWidget(self._surface)
+        if running and self._playback is not None:
+            self._playback.started = True
+            timing = self._playback.timing
+            if timing is not None and timing.playing_at is None:
+                timing.playing_at = time.perf_counter()
+        self.clock.set_running(running)
+        self._sync_position()
+
+    def _sync_position(self) -> None:
+        if self._position_timer is not None:
+            self._position_timer.cancel()
+            self._position_timer = None
+        ok, position = self._pipeline.query_position(Gst.Format.TIME)
+        if ok:
+            self.clock.update(position // Gst.MSECOND)
+        self.cues.update()
+        if self.clock.running:
+            self._position_timer = self._loop.call_later(POSITION_INTERVAL, self._sync_position)
+
+    # ===== Controls =====
+
+    def pause(self) -> None:
+        _, state, _ = self._pipeline.get_state(0)
+        if state == Gst.State.PLAYING:
+            self._pipeline.set_state(Gst.State.PAUSED)
+        else:
+            self._pipeline.set_state(Gst.State.PLAYING)
+
+    def stop(self) -> None:
+        self.placeholder()
+
+    def set_fullscreen(self, fullscreen: bool) -> None:
+        if fullscreen:
+            self.showFullScreen()
+        else:
+            self.showNormal()
+        self.fullscreen = fullscreen
+
+    def set_position(self, position: int) -> None:
+        # a flushing seek plays at normal speed again
+        self._pipeline.seek_simple(
+            Gst.Format.TIME, Gst.SeekFlags.FLUSH | Gst.SeekFlags.ACCURATE, position * Gst.MSECOND)
+        self.clock.set_rate(1.0)
+        self.cues.seek(position)
+
+    def set_rate(self, rate: float) -> None:
+        # changes the rate in place without a flush, needs GStreamer 1.18
+        if rate == self.clock.rate:
+            return
+        if self._pipeline.seek(rate, Gst.Format.TIME, Gst.SeekFlags.INSTANT_RATE_CHANGE,
+                               Gst.SeekType.NONE, 0, Gst.SeekType.NONE, 0):
+            self.clock.set_rate(rate)
+            self.cues.update()
+
+    def get_position(self) -> int:
+        ok, position = self._pipeline.query_position(Gst.Format.TIME)
+        return position // Gst.MSECOND if ok else 0
@@ -4,3 +4,4 @@ from dataclasses import dataclass
 @dataclass
 class Media:
     path: str
+    start_ms: int = 0
@@ -0,0 +1,180 @@
+import asyncio
+import heapq
+import itertools
+import time
+from collections import deque
+from typing import Callable, Deque, List, Optional, Tuple
+
+from .cues import CueDispatcher, PlayerClock
+from .media import Media
+from .playback import Playback, PlaybackResult
+from .telemetry import PlaybackTelemetry
+from .timing import PlaybackTiming
+
+# Loop iterations given to woken coroutines before the virtual time moves on
+SETTLE_ROUNDS = 5
+
+
+class VirtualClock:
+    # Milliseconds of simulated time. Sleepers are woken in time order either
+    # by advance() or, with run(), as fast as the event loop allows.
+
+    def __init__(self):
+        self._now = 0
+        self._sleepers: List[Tuple[int, int, asyncio.Future]] = []
+        self._order = itertools.count()
+        self._changed = asyncio.Event()
+
+    def now(self) -> int:
+        return self._now
+
+    async def sleep(self, ms: int) -> None:
+        future = asyncio.get_event_loop().create_future()
+        heapq.heappush(self._sleepers, (self._now + ms, next(self._order), future))
+        self._changed.set()
+        await future
+
+    async def advance(self, ms: int) -> None:
+        target = self._now + ms
+        while self._sleepers and self._sleepers[0][0] <= target:
+            await self._wake_next()
+        self._now = target
+
+    async def run(self) -> None:
+        while True:
+            if not self._sleepers:
+                self._changed.clear()
+                await self._changed.wait()
+            await self._wake_next()
+
+    async def _wake_next(self) -> None:
+        wake_at, _, future = heapq.heappop(self._sleepers)
+        self._now = max(self._now, wake_at)
+        if not future.done():
+            future.set_result(None)
+        for _ in range(SETTLE_ROUNDS):
+            await asyncio.sleep(0)
+
+
+class NullProjector:
+    # Headless projector: media "play" for their simulated duration on a
+    # VirtualClock and report their time every `tick` ms like VLC does.
+    # The player clock is never marked running, so cues are dispatched from
+    # the simulated time updates only and never from real-time timers.
+
+    def __init__(self, clock: Optional[VirtualClock] = None, durations: Optional[dict[str, int]] = None,
+                 default_duration: int = 60000, tick: int = 250, autorun: bool = False):
+        self._loop = asyncio.get_event_loop()
+        self.virtual = clock if clock is not None else VirtualClock()
+        self.durations = durations if durations is not None else dict()
+        self.default_duration = default_duration
+        self.tick = tick
+
+        self._media: Optional[Media] = None
+        self._playback: Optional[Playback] = None
+        self._task: Optional[asyncio.Task] = None
+        self._position = 0
+        self._resumed = asyncio.Event()
+        self._resumed.set()
+        self._prerolled: Optional[Tuple[Media, int]] = None
+        self._resolve_source: Callable[[str], str] = lambda path: path
+        self._telemetry: Optional[PlaybackTelemetry] = None
+
+        self.clock = PlayerClock()
+        self.cues = CueDispatcher(self.clock, self._loop, self.get_position)
+        self.timings: Deque[PlaybackTiming] = deque(maxlen=100)
+
+        if autorun:
+            self._loop.create_task(self.virtual.run())
+
+    def duration(self, media: Media) -> int:
+        return self.durations.get(media.path, self.default_duration)
+
+    def set_source_resolver(self, resolver: Callable[[str], str]) -> None:
+        self._resolve_source = resolver
+
+    def set_telemetry(self, telemetry: PlaybackTelemetry) -> None:
+        self._telemetry = telemetry
+
+    def placeholder(self) -> None:
+        self._prerolled = None
+        self._close(PlaybackResult.Stopped)
+
+    async def preroll(self, media: Media, start_ms: Optional[int] = None) -> bool:
+        self._prerolled = (media, media.start_ms if start_ms is None else start_ms)
+        return True
+
+    async def play(self, media: Media, start_ms: Optional[int] = None) -> PlaybackResult:
+        start_ms = media.start_ms if start_ms is None else start_ms
+        now = time.perf_counter()
+        timing = PlaybackTiming(media.path, prerolled=self._prerolled == (media, start_ms),
+                                requested_at=now, start_ms=start_ms, first_frame_at=now, first_correct_frame_at=now)
+        timing.source = self._resolve_source(media.path)
+        self._prerolled = None
+        self._close(PlaybackResult.Stopped)
+
+        playback = Playback(self._loop, timing)
+        playback.opened = playback.started = True
+        playback.set_ready(True)
+        self._media = media
+        self._playback = playback
+        self._position = start_ms
+        self._resumed.set()
+        self.clock.reset(start_ms)
+        self.cues.seek(start_ms)
+        self._task = self._loop.create_task(self._run(playback, self.duration(media)))
+        self.timings.append(timing)
+        if self._telemetry is not None:
+            self._telemetry.track(playback)
+        return await playback.wait()
+
+    def _close(self, result: PlaybackResult) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+        if self._playback is not None:
+            self._playback.finish(result)
+            self._playback = None
+        self._media = None
+
+    async def _run(self, playback: Playback, duration: int) -> None:
+        while self._position < duration:
+            step = min(self.tick, duration - self._position)
+            next_cue = self.cues.next_position()
+            if next_cue is not None and self._position < next_cue < self._position + step:
+                step = next_cue - self._position
+            await self.virtual.sleep(max(1, round(step / self.clock.rate)))
+            await self._resumed.wait()
+            self._position += step
+            self.clock.update(self._position)
+            self.cues.update()
+        self._task = None
+        playback.finish(PlaybackResult.Ended)
+
+    def reset(self) -> None:
+        self.cues.clear()
+
+    async def wait_position(self, position: int) -> int:
+        return await self.cues.wait(position)
+
+    # ===== Controls =====
+
+    def pause(self) -> None:
+        if self._resumed.is_set():
+            self._resumed.clear()
+        else:
+            self._resumed.set()
+
+    def stop(self) -> None:
+        self.placeholder()
+
+    def set_position(self, position: int) -> None:
+        self._position = position
+        self.cues.seek(position)
+
+    def set_rate(self, rate: float) -> None:
+        # media time moves `rate` times as fast as the simulated time
+        self.clock.set_rate(rate)
+
+    def get_position(self) -> int:
+        return self._position
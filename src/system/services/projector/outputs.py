@@ -0,0 +1,136 @@
+import asyncio
+import logging
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Deque, Dict, Optional, Union
+
+from PyQt6.QtGui import QGuiApplication
+from PyQt6.QtWidgets import QWidget
+
+from .media import Media
+from .playback import PlaybackResult
+from .projector import Projector
+
+_log = logging.getLogger(__name__)
+
+MAIN_OUTPUT = "main"
+# Drift is measured this often once the outputs play
+SYNC_INTERVAL = 1.0
+# One frame at 25 fps, outputs further apart than half of it are corrected
+FRAME_MS = 40
+# Small drift is absorbed by playing a follower slightly faster or slower,
+# large drift (a stall, a dropped input) by seeking it to the main output
+MAX_RATE_CORRECTION = 0.05
+RESYNC_MS = 1000
+
+
+@dataclass
+class SkewSample:
+    at: float
+    output: str
+    skew_ms: float
+
+
+class OutputGroup:
+    # Named projectors playing in lockstep. The main output is the reference:
+    # all outputs preroll, cut together, then every follower is steered
+    # toward the position the main player reports. Followers that fail to
+    # preroll sit the media out, the others stop with the main output.
+
+    def __init__(self, outputs: Dict[str, Projector]):
+        if MAIN_OUTPUT not in outputs:
+            raise RuntimeError(f"Output group needs a '{MAIN_OUTPUT}' output")
+        self.outputs = outputs
+        self.skew: Deque[SkewSample] = deque(maxlen=10000)
+        self._sync_task: Optional[asyncio.Task] = None
+        # a play() replaced by a newer one leaves the outputs to the newer one
+        self._generation = 0
+
+    @property
+    def main(self) -> Projector:
+        return self.outputs[MAIN_OUTPUT]
+
+    def place(self, screens: Dict[str, int]) -> None:
+        # outputs with a window are moved to their screen, missing screens are skipped
+        available = QGuiApplication.screens()
+        for name, index in screens.items():
+            output = self.outputs.get(name)
+            if isinstance(output, QWidget) and index < len(available):
+                output.setGeometry(available[index].geometry())
+
+    def followers(self) -> Dict[str, Projector]:
+        return {name: output for name, output in self.outputs.items() if name != MAIN_OUTPUT}
+
+    def placeholder(self) -> None:
+        for output in self.outputs.values():
+            output.placeholder()
+
+    async def play(self, media: Union[Media, Dict[str, Media]],
+                   start_ms: Optional[int] = None) -> PlaybackResult:
+        # One media for every output or a media per output name, outputs
+        # without a media keep showing what they show
+        medias = dict(media) if isinstance(media, dict) else {name: media for name in self.outputs}
+        if MAIN_OUTPUT not in medias:
+            raise RuntimeError(f"Synchronized playback needs a media for '{MAIN_OUTPUT}'")
+        self._generation += 1
+        generation = self._generation
+        prerolled = await asyncio.gather(*[self.outputs[name].preroll(item, start_ms) for name, item in medias.items()])
+        for name, ready in zip(list(medias), prerolled):
+            if not ready and name != MAIN_OUTPUT:
+                _log.warning("Output '%s' could not preroll %s, it sits this media out", name, medias[name].path)
+                del medias[name]
+        if generation != self._generation:
+            return PlaybackResult.Stopped
+
+        # prerolled cuts do not suspend, all outputs are released within one loop iteration
+        loop = asyncio.get_event_loop()
+        playbacks = {name: loop.create_task(self.outputs[name].play(item, start_ms))
+                     for name, item in medias.items()}
+        followers = [name for name in medias if name != MAIN_OUTPUT]
+        self._stop_sync()
+        self._sync_task = loop.create_task(self._keep_in_sync(followers))
+        try:
+            return await asyncio.shield(playbacks[MAIN_OUTPUT])
+        finally:
+            if generation == self._generation:
+                self._stop_sync()
+                for name in followers:
+                    self.outputs[name].stop()
+
+    def _stop_sync(self) -> None:
+        if self._sync_task is not None:
+            self._sync_task.cancel()
+            self._sync_task = None
+        for output in self.followers().values():
+            output.set_rate(1.0)
+
+    async def _keep_in_sync(self, names: list[str]) -> None:
+        while True:
+            await asyncio.sleep(SYNC_INTERVAL)
+            if not self.main.clock.running:
+                continue
+            # the players' own positions, the clocks are what the correction
+            # changes and would only measure it against itself
+            at = time.perf_counter()
+            reference = self.main.get_position()
+            for name in names:
+                output = self.outputs[name]
+                skew = output.get_position() - reference
+                self.skew.append(SkewSample(at, name, skew))
+                if abs(skew) > RESYNC_MS:
+                    output.set_position(int(reference))
+                    output.set_rate(1.0)
+                elif abs(skew) > FRAME_MS / 2:
+                    # close the gap over the next interval
+                    correction = -skew / (SYNC_INTERVAL * 1000)
+                    correction = max(-MAX_RATE_CORRECTION, min(MAX_RATE_CORRECTION, correction))
+                    output.set_rate(1.0 + correction)
+                elif output.clock.rate != 1.0:
+                    output.set_rate(1.0)
+
+    def stop(self) -> None:
+        self._generation += 1
+        self._stop_sync()
+        for output in self.outputs.values():
+            output.stop()
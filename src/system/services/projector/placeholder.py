@@ -0,0 +1,34 @@
+from typing import Optional
+
+from PyQt6 import QtGui
+from PyQt6.QtCore import Qt
+from PyQt6.QtGui import QPainter, QPixmap
+from PyQt6.QtWidgets import QWidget
+
+
+class PlaceholderSurface(QWidget):
+    # Idle picture of the projector painted by Qt. The image is decoded once
+    # and rescaled only when the window is resized, an idle projector does
+    # not decode anything.
+
+    def __init__(self, image_path: str, parent: Optional[QWidget] = None):
+        super().__init__(parent)
+        self._pixmap = QPixmap(image_path)
+        self._scaled: Optional[QPixmap] = None
+        self.setAutoFillBackground(False)
+        self.setAttribute(Qt.WidgetAttribute.WA_OpaquePaintEvent)
+
+    def resizeEvent(self, a0: QtGui.QResizeEvent) -> None:
+        self._scaled = None
+        super().resizeEvent(a0)
+
+    def paintEvent(self, a0: QtGui.QPaintEvent) -> None:
+        if self._scaled is None and not self._pixmap.isNull():
+            self._scaled = self._pixmap.scaled(
+                self.size(), Qt.AspectRatioMode.KeepAspectRatio, Qt.TransformationMode.SmoothTransformation)
+        painter = QPainter(self)
+        painter.fillRect(self.rect(), Qt.GlobalColor.black)
+        if self._scaled is not None:
+            painter.drawPixmap((self.width() - self._scaled.width()) // 2,
+                               (self.height() - self._scaled.height()) // 2, self._scaled)
+        painter.end()
@@ -0,0 +1,36 @@
+import asyncio
+from enum import Enum
+from typing import Optional
+
+from .timing import PlaybackTiming
+
+
+class PlaybackResult(Enum):
+    Ended = 0
+    Stopped = 1
+    Error = 2
+
+
+# One media opened on a player, from set_media() until it ends, fails or is
+# replaced. Player events are only accepted after the player reported opening
+# this media, so late events of the previous media are ignored.
+class Playback:
+    opened: bool = False
+    started: bool = False
+
+    def __init__(self, loop: asyncio.AbstractEventLoop, timing: Optional[PlaybackTiming] = None):
+        self.timing = timing
+        self.ready = loop.create_future()
+        self.done = loop.create_future()
+
+    def set_ready(self, ready: bool) -> None:
+        if not self.ready.done():
+            self.ready.set_result(ready)
+
+    def finish(self, result: PlaybackResult) -> None:
+        self.set_ready(result != PlaybackResult.Error and self.started)
+        if not self.done.done():
+            self.done.set_result(result)
+
+    async def wait(self) -> PlaybackResult:
+        return await asyncio.shield(self.done)
@@ -0,0 +1,51 @@
+from typing import Callable, Deque, Optional, Protocol
+
+from .cues import CueDispatcher, PlayerClock
+from .media import Media
+from .playback import PlaybackResult
+from .telemetry import PlaybackTelemetry
+from .timing import PlaybackTiming
+
+
+class Projector(Protocol):
+    clock: PlayerClock
+    cues: CueDispatcher
+    timings: Deque[PlaybackTiming]
+
+    def set_source_resolver(self, resolver: Callable[[str], str]) -> None: ...
+
+    def set_telemetry(self, telemetry: PlaybackTelemetry) -> None: ...
+
+    def placeholder(self) -> None: ...
+
+    async def preroll(self, media: Media, start_ms: Optional[int] = None) -> bool: ...
+
+    async def play(self, media: Media, start_ms: Optional[int] = None) -> PlaybackResult: ...
+
+    def reset(self) -> None: ...
+
+    async def wait_position(self, position: int) -> int: ...
+
+    def pause(self) -> None: ...
+
+    def stop(self) -> None: ...
+
+    def set_position(self, position: int) -> None: ...
+
+    # playback speed, 1.0 is normal, OutputGroup nudges followers with it
+    def set_rate(self, rate: float) -> None: ...
+
+    def get_position(self) -> int: ...
+
+
+def create_projector(backend: str) -> Projector:
+    if backend == "vlc":
+        from .vlc_projector import VlcProjector
+        return VlcProjector()
+    if backend == "gst":
+        from .gst_projector import GstProjector
+        return GstProjector()
+    if backend == "null":
+        from .null_projector import NullProjector
+        return NullProjector(autorun=True)
+    raise RuntimeError(f"Unknown projector backend '{backend}'")
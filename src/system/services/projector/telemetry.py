@@ -0,0 +1,174 @@
+import json
+import logging
+import time
+from collections import deque
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Deque, Optional
+
+from PyQt6.QtCore import QObject, pyqtSignal
+
+from .playback import Playback, PlaybackResult
+from .timing import PlaybackTiming
+
+_log = logging.getLogger(__name__)
+
+
+def _ms_since(start: float, at: Optional[float]) -> Optional[float]:
+    return None if at is None else round((at - start) * 1000, 1)
+
+
+@dataclass
+class DecodeStats:
+    # Counters are cumulative since the media was opened, bitrates are kbit/s
+    decoded_video: int = 0
+    displayed_pictures: int = 0
+    lost_pictures: int = 0
+    decoded_audio: int = 0
+    lost_audio_buffers: int = 0
+    demux_corrupted: int = 0
+    demux_discontinuity: int = 0
+    input_kbps: float = 0.0
+    demux_kbps: float = 0.0
+
+
+@dataclass
+class PlaybackRecord:
+    path: str
+    source: Optional[str]
+    prerolled: bool
+    start_ms: int
+    started: float = field(default_factory=time.time)
+    open_ms: Optional[float] = None
+    playing_ms: Optional[float] = None
+    first_frame_ms: Optional[float] = None
+    correct_frame_ms: Optional[float] = None
+    played_s: float = 0.0
+    buffering: int = 0
+    peak_input_kbps: float = 0.0
+    peak_demux_kbps: float = 0.0
+    stats: DecodeStats = field(default_factory=DecodeStats)
+    result: Optional[str] = None
+
+    def lost_ratio(self) -> float:
+        shown = self.stats.displayed_pictures + self.stats.lost_pictures
+        return self.stats.lost_pictures / shown if shown else 0.0
+
+
+@dataclass
+class CueSheetRecord:
+    # how far from their planned media position the cues of one run fired
+    path: str
+    cues: int
+    mean_error_ms: float
+    max_error_ms: int
+    finished: float = field(default_factory=time.time)
+
+
+class FileTelemetry:
+    # Rolling aggregates over the last plays of one file
+
+    def __init__(self, path: str, history: int):
+        self.path = path
+        self.records: Deque[PlaybackRecord] = deque(maxlen=history)
+
+    def plays(self) -> int:
+        return len(self.records)
+
+    def errors(self) -> int:
+        return sum(record.result == PlaybackResult.Error.name for record in self.records)
+
+    def mean_first_frame_ms(self) -> Optional[float]:
+        samples = [record.first_frame_ms for record in self.records if record.first_frame_ms is not None]
+        return sum(samples) / len(samples) if samples else None
+
+    def max_first_frame_ms(self) -> Optional[float]:
+        samples = [record.first_frame_ms for record in self.records if record.first_frame_ms is not None]
+        return max(samples) if samples else None
+
+    def lost_ratio(self) -> float:
+        lost = sum(record.stats.lost_pictures for record in self.records)
+        shown = sum(record.stats.displayed_pictures for record in self.records) + lost
+        return lost / shown if shown else 0.0
+
+    def buffering(self) -> int:
+        return sum(record.buffering for record in self.records)
+
+    def peak_input_kbps(self) -> float:
+        return max((record.peak_input_kbps for record in self.records), default=0.0)
+
+
+class PlaybackTelemetry(QObject):
+    # Collects one PlaybackRecord per projector playback: open, playing and
+    # first frame latencies from its PlaybackTiming, decode counters sampled
+    # by the projector while it plays. Finished records are aggregated per
+    # file and appended to a JSON-lines log.
+
+    updated: pyqtSignal = pyqtSignal()
+
+    def __init__(self, log_path: Optional[str] = None, history: int = 20):
+        super().__init__()
+        self._log_path = log_path
+        if log_path is not None:
+            Path(log_path).parent.mkdir(parents=True, exist_ok=True)
+        self._history = history
+        self._active: dict[int, PlaybackRecord] = dict()
+        self.files: dict[str, FileTelemetry] = dict()
+        self.current: Optional[PlaybackRecord] = None
+        self.cue_sheets: Deque[CueSheetRecord] = deque(maxlen=history)
+
+    def track(self, playback: Playback) -> None:
+        timing = playback.timing
+        if timing is None or id(timing) in self._active:
+            return
+        record = PlaybackRecord(timing.path, timing.source, timing.prerolled, timing.start_ms)
+        self._active[id(timing)] = record
+        self.current = record
+        playback.done.add_done_callback(lambda done: self._finish(timing, done.result()))
+        self.updated.emit()
+
+    def sample(self, timing: PlaybackTiming, stats: DecodeStats) -> None:
+        record = self._active.get(id(timing))
+        if record is None:
+            return
+        record.stats = stats
+        record.peak_input_kbps = max(record.peak_input_kbps, stats.input_kbps)
+        record.peak_demux_kbps = max(record.peak_demux_kbps, stats.demux_kbps)
+        self.updated.emit()
+
+    def buffering(self, timing: PlaybackTiming) -> None:
+        record = self._active.get(id(timing))
+        if record is not None:
+            record.buffering += 1
+
+    def cue_sheet(self, record: CueSheetRecord) -> None:
+        self.cue_sheets.append(record)
+        self.updated.emit()
+
+    def _finish(self, timing: PlaybackTiming, result: PlaybackResult) -> None:
+        record = self._active.pop(id(timing), None)
+        if record is None:
+            return
+        start = timing.requested_at
+        record.open_ms = _ms_since(start, timing.opened_at)
+        record.playing_ms = _ms_since(start, timing.playing_at)
+        record.first_frame_ms = _ms_since(start, timing.first_frame_at)
+        record.correct_frame_ms = _ms_since(start, timing.first_correct_frame_at)
+        record.played_s = round(time.perf_counter() - start, 1)
+        record.result = result.name
+        if record.path not in self.files:
+            self.files[record.path] = FileTelemetry(record.path, self._history)
+        self.files[record.path].records.append(record)
+        if self.current is record:
+            self.current = None
+        self._write(record)
+        self.updated.emit()
+
+    def _write(self, record: PlaybackRecord) -> None:
+        if self._log_path is None:
+            return
+        try:
+            with open(self._log_path, "a", encoding="utf-8") as log:
+                log.write(json.dumps(asdict(record), ensure_ascii=False) + "\n")
+        except OSError as error:
+            _log.warning("Could not write playback telemetry: %s", error)
@@ -0,0 +1,26 @@
+from dataclasses import dataclass
+from typing import Optional
+
+
+@dataclass
+class PlaybackTiming:
+    path: str
+    prerolled: bool
+    requested_at: float
+    start_ms: int = 0
+    # file actually opened, a transcoded proxy of path when one was fresh
+    source: Optional[str] = None
+    opened_at: Optional[float] = None
+    playing_at: Optional[float] = None
+    first_frame_at: Optional[float] = None
+    first_correct_frame_at: Optional[float] = None
+
+    def time_to_first_frame(self) -> Optional[float]:
+        if self.first_frame_at is None:
+            return None
+        return (self.first_frame_at - self.requested_at) * 1000
+
+    def time_to_correct_frame(self) -> Optional[float]:
+        if self.first_correct_frame_at is None:
+            return None
+        return (self.first_correct_frame_at - self.requested_at) * 1000
@@ -1,15 +1,73 @@
 import asyncio
 import sys
+import time
+from collections import deque
 from pathlib import Path
+from typing import Callable, Deque, Optional
 
 from PyQt6 import QtGui
 from PyQt6.QtCore import Qt
-from PyQt6.QtWidgets import QDialog
-from vlc import Instance, EventType, Event
+from PyQt6.QtWidgets import QDialog, QFrame, QStackedLayout
+from vlc import Instance, EventType, Event, MediaStats
 
 from system.services.projector.projector_ui import Ui_MediaDisplay
 
+from .cues import CueDispatcher, PlayerClock
 from .media import Media
+from .placeholder import PlaceholderSurface
+from .playback import Playback, PlaybackResult
+from .telemetry import DecodeStats, PlaybackTelemetry
+from .timing import PlaybackTiming
+
+# How often decode statistics of the active media are sampled for telemetry
+STATS_INTERVAL = 1.0
+# VLC reports bitrates in bytes per microsecond
+_KBPS = 8000
+# A prerolled media that shows no frame by then (bad codec, audio only) is
+# given up and opened cold instead
+READY_TIMEOUT = 5.0
+
+
+class _Deck:
+    media: Optional[Media] = None
+    source: Optional[str] = None
+    start_ms: int = 0
+    playback: Optional[Playback] = None
+    buffering: bool = False
+
+    def __init__(self, vlc: Instance, surface: QFrame):
+        self.surface = surface
+        self.player = vlc.media_player_new()
+        self.events = self.player.event_manager()
+        self.bind_surface()
+
+    def bind_surface(self):
+        if sys.platform.startswith("linux"):  # for Linux using the X Server
+            self.player.set_xwindow(self.surface.winId())
+        elif sys.platform == "win32":  # for Windows
+            self.player.set_hwnd(self.surface.winId())
+        elif sys.platform == "darwin":  # for MacOS
+            self.player.set_nsobject(int(self.surface.winId()))
+
+    def load(self, vlc_media, media: Optional[Media], playback: Optional[Playback], start_ms: int = 0) -> None:
+        self.finish(PlaybackResult.Stopped)
+        self.media = media
+        self.source = vlc_media.get_mrl()
+        self.start_ms = start_ms
+        self.playback = playback
+        self.buffering = False
+        self.player.set_media(vlc_media)
+
+    def finish(self, result: PlaybackResult) -> None:
+        if self.playback is not None:
+            self.playback.finish(result)
+
+    def release(self):
+        self.player.stop()
+        self.finish(PlaybackResult.Stopped)
+        self.media = None
+        self.source = None
+        self.playback = None
 
 
 class VlcProjector(QDialog):
@@ -21,15 +79,45 @@ class VlcProjector(QDialog):
         self.ui = Ui_MediaDisplay()
         self.ui.setupUi(self)
 
-        self._vlc = Instance("--loop")
+        self._vlc = Instance()
         self._vlc.log_unset()
-        self._player = self._vlc.media_player_new()
+        self._loop = asyncio.get_event_loop()
 
         self.setWindowFlags(Qt.WindowType.Window)
 
-        self._vlc_event_manager = self._player.event_manager()
-        self._vlc_event_manager.event_attach(EventType.MediaPlayerTimeChanged, self._media_time_changed)
-        self._position_locks: dict[int, asyncio.Event] = dict()
+        # Two players render into two stacked surfaces: the active one is visible,
+        # the other one can open the next media in the background and wait on its
+        # first frame until the cut. While idle, or until the first frame of a
+        # cold open, the placeholder surface painted by Qt is shown instead.
+        self._surfaces = QStackedLayout(self.ui.videoframe)
+        self._placeholder = PlaceholderSurface(f"{Path.cwd()}/assets/placeholder.jpg", self.ui.videoframe)
+        self._surfaces.addWidget(self._placeholder)
+        self._decks = [self._create_deck(), self._create_deck()]
+        self._active = self._decks[0]
+        self._prerolled: Optional[_Deck] = None
+        self._resolve_source: Callable[[str], str] = lambda path: path
+        self._telemetry: Optional[PlaybackTelemetry] = None
+        self._stats_timer: Optional[asyncio.TimerHandle] = None
+
+        self.clock = PlayerClock()
+        self.cues = CueDispatcher(self.clock, self._loop, self.get_position)
+        self.timings: Deque[PlaybackTiming] = deque(maxlen=100)
+
+    def _create_deck(self) -> _Deck:
+        surface = QFrame(self.ui.videoframe)
+        self._surfaces.addWidget(surface)
+        deck = _Deck(self._vlc, surface)
+        attach = deck.events.event_attach
+        attach(EventType.MediaPlayerTimeChanged, self._media_time_changed, deck)
+        attach(EventType.MediaPlayerOpening, self._media_opening, deck)
+        attach(EventType.MediaPlayerPlaying, self._media_playing, deck)
+        attach(EventType.MediaPlayerVout, self._media_first_frame, deck)
+        attach(EventType.MediaPlayerPaused, self._media_paused, deck)
+        attach(EventType.MediaPlayerBuffering, self._media_buffering, deck)
+        attach(EventType.MediaPlayerEndReached, self._media_finished, deck, PlaybackResult.Ended)
+        attach(EventType.MediaPlayerStopped, self._media_finished, deck, PlaybackResult.Stopped)
+        attach(EventType.MediaPlayerEncounteredError, self._media_finished, deck, PlaybackResult.Error)
+        return deck
 
     def mouseDoubleClickEvent(self, a0: QtGui.QMouseEvent) -> None:
         if self.fullscreen:
@@ -40,60 +128,250 @@ class VlcProjector(QDialog):
             self.fullscreen = True
         super().mouseDoubleClickEvent(a0)
 
+    def set_source_resolver(self, resolver: Callable[[str], str]) -> None:
+        self._resolve_source = resolver
+
+    def set_telemetry(self, telemetry: PlaybackTelemetry) -> None:
+        self._telemetry = telemetry
+        if self._stats_timer is None:
+            self._stats_timer = self._loop.call_later(STATS_INTERVAL, self._sample_stats)
+
     def placeholder(self):
         self.show()
-        self._player.set_media(self._vlc.media_new(f"{Path.cwd()}/assets/placeholder.jpg"))
-        self.init_frame()
-        self._player.play()
+        self._surfaces.setCurrentWidget(self._placeholder)
+        self._placeholder.repaint()
+        self._discard_preroll()
+        self._active.release()
+        self._reset_clock()
 
-    def init_frame(self):
-        if sys.platform.startswith("linux"):  # for Linux using the X Server
-            self._player.set_xwindow(self.ui.videoframe.winId())
-        elif sys.platform == "win32":  # for Windows
-            self._player.set_hwnd(self.ui.videoframe.winId())
-        elif sys.platform == "darwin":  # for MacOS
-            self._player.set_nsobject(int(self.ui.videoframe.winId()))
+    # ===== Deck switching =====
+
+    def _idle_deck(self) -> _Deck:
+        return self._decks[1] if self._active is self._decks[0] else self._decks[0]
+
+    def _discard_preroll(self):
+        if self._prerolled is not None:
+            self._prerolled.playback.set_ready(False)
+            self._prerolled.release()
+            self._prerolled = None
+
+    def _take_preroll(self, media: Media, start_ms: int) -> Optional[_Deck]:
+        deck = self._prerolled
+        if deck is None or deck.media != media or deck.start_ms != start_ms:
+            return None
+        self._prerolled = None
+        return deck
+
+    def _cut_to(self, deck: _Deck):
+        previous = self._active
+        self._active = deck
+        self._surfaces.setCurrentWidget(deck.surface)
+        self._reset_clock(deck.start_ms)
+        deck.player.set_rate(self.clock.rate)
+        deck.player.set_pause(0)
+        previous.release()
+
+    # ===== Playback =====
+
+    def _open(self, media: Media, start_ms: int):
+        vlc_media = self._vlc.media_new(self._resolve_source(media.path))
+        if start_ms > 0:
+            # the input starts decoding at the offset, no seek after opening
+            vlc_media.add_option(f":start-time={start_ms / 1000:.3f}")
+        return vlc_media
 
-    async def play(self, media: Media) -> None:
-        self._player.set_media(self._vlc.media_new(media.path))
-        self.init_frame()
-        self._player.play()
+    async def preroll(self, media: Media, start_ms: Optional[int] = None) -> bool:
+        start_ms = media.start_ms if start_ms is None else start_ms
+        self._discard_preroll()
+        deck = self._idle_deck()
+        vlc_media = self._open(media, start_ms)
+        vlc_media.add_option(":start-paused")
+        playback = Playback(self._loop)
+        deck.load(vlc_media, media, playback, start_ms)
+        self._prerolled = deck
+        deck.player.play()
+        ready = await self._wait_ready(playback)
+        if not ready and self._prerolled is deck:
+            self._discard_preroll()
+        return ready
+
+    async def play(self, media: Media, start_ms: Optional[int] = None) -> PlaybackResult:
+        start_ms = media.start_ms if start_ms is None else start_ms
+        timing = PlaybackTiming(media.path, prerolled=False, requested_at=time.perf_counter(), start_ms=start_ms)
+        deck = self._take_preroll(media, start_ms)
+        if deck is not None and await self._wait_ready(deck.playback):
+            timing.prerolled = True
+            deck.playback.timing = timing
+            self._cut_to(deck)
+            timing.first_frame_at = timing.first_correct_frame_at = time.perf_counter()
+        else:
+            if deck is not None:
+                deck.release()
+            deck = self._active
+            deck.load(self._open(media, start_ms), media, Playback(self._loop, timing), start_ms)
+            self._reset_clock(start_ms)
+            deck.player.play()
+        timing.source = deck.source
+        self.timings.append(timing)
+        if self._telemetry is not None:
+            self._telemetry.track(deck.playback)
         # self.showFullScreen()
-        await asyncio.sleep(1)
-        while self._player.is_playing():
-            await asyncio.sleep(0.05)
+        return await deck.playback.wait()
+
+    @staticmethod
+    async def _wait_ready(playback: Playback) -> bool:
+        try:
+            return await asyncio.wait_for(asyncio.shield(playback.ready), READY_TIMEOUT)
+        except asyncio.TimeoutError:
+            return False
+        except asyncio.CancelledError:
+            if playback.ready.cancelled():
+                return False
+            raise
 
     def reset(self):
-        self._position_locks.clear()
+        self.cues.clear()
+
+    async def wait_position(self, position: int) -> int:
+        return await self.cues.wait(position)
+
+    # ===== VLC events (called from the VLC thread) =====
+
+    def _media_opening(self, event: Event, deck: _Deck) -> None:
+        self._loop.call_soon_threadsafe(self._playback_opened, deck, time.perf_counter())
+
+    def _media_playing(self, event: Event, deck: _Deck) -> None:
+        self._loop.call_soon_threadsafe(self._playback_started, deck, time.perf_counter())
+
+    def _media_first_frame(self, event: Event, deck: _Deck) -> None:
+        self._loop.call_soon_threadsafe(self._first_frame_shown, deck, time.perf_counter())
+
+    def _media_paused(self, event: Event, deck: _Deck) -> None:
+        self._loop.call_soon_threadsafe(self._playback_paused, deck)
+
+    def _media_buffering(self, event: Event, deck: _Deck) -> None:
+        self._loop.call_soon_threadsafe(self._playback_buffering, deck, event.u.new_cache)
+
+    def _media_finished(self, event: Event, deck: _Deck, result: PlaybackResult) -> None:
+        self._loop.call_soon_threadsafe(self._playback_finished, deck, result)
+
+    def _media_time_changed(self, event: Event, deck: _Deck) -> None:
+        self._loop.call_soon_threadsafe(self._time_changed, deck, event.u.new_time, time.perf_counter())
 
-    async def wait_position(self, position: int) -> None:
-        lock = asyncio.Event()
-        self._position_locks[position] = lock
-        await lock.wait()
+    # ===== VLC events (marshalled onto the event loop) =====
 
-    def _media_time_changed(self, event: Event) -> None:
-        curr_time = self._player.get_time()
-        released = []
-        for position in self._position_locks.keys():
-            if curr_time >= position:
-                lock = self._position_locks[position]
-                lock._loop.call_soon_threadsafe(lock.set)
-                released.append(position)
+    def _playback_opened(self, deck: _Deck, at: float) -> None:
+        if deck.playback is not None:
+            deck.playback.opened = True
+            if deck.playback.timing is not None:
+                deck.playback.timing.opened_at = at
 
-        for lock in released:
-            del self._position_locks[lock]
+    def _playback_started(self, deck: _Deck, at: float) -> None:
+        if deck.playback is not None and deck.playback.opened:
+            deck.playback.started = True
+            if deck.playback.timing is not None and deck.playback.timing.playing_at is None:
+                deck.playback.timing.playing_at = at
+            self._set_clock_running(deck, True)
+
+    def _playback_buffering(self, deck: _Deck, cache: float) -> None:
+        # VLC fills its cache before every start, only stalls after the
+        # playback started are counted
+        playback = deck.playback
+        if playback is None or not playback.started:
+            return
+        if cache < 100 and not deck.buffering:
+            deck.buffering = True
+            if self._telemetry is not None and playback.timing is not None:
+                self._telemetry.buffering(playback.timing)
+        elif cache >= 100:
+            deck.buffering = False
+
+    def _playback_paused(self, deck: _Deck) -> None:
+        if deck.playback is not None and deck.playback.opened:
+            deck.playback.started = True
+            deck.playback.set_ready(True)
+            self._set_clock_running(deck, False)
+
+    def _reset_clock(self, position: int = 0) -> None:
+        self.clock.reset(position)
+        self.cues.update()
+
+    def _set_clock_running(self, deck: _Deck, running: bool) -> None:
+        if deck is self._active:
+            self.clock.set_running(running)
+            self.cues.update()
+
+    def _time_changed(self, deck: _Deck, position: int, at: float) -> None:
+        playback = deck.playback
+        if deck is self._active and playback is not None and playback.opened:
+            self.clock.update(position, at)
+            self.cues.update()
+            timing = playback.timing
+            if timing is not None and timing.first_correct_frame_at is None and position >= timing.start_ms:
+                timing.first_correct_frame_at = at
+
+    def _first_frame_shown(self, deck: _Deck, shown_at: float) -> None:
+        playback = deck.playback
+        if playback is None or not playback.opened:
+            return
+        playback.set_ready(True)
+        if deck is self._active:
+            self._surfaces.setCurrentWidget(deck.surface)
+        timing = playback.timing
+        if deck is self._active and timing is not None and timing.first_frame_at is None:
+            timing.first_frame_at = shown_at
+
+    def _playback_finished(self, deck: _Deck, result: PlaybackResult) -> None:
+        if deck.playback is not None and deck.playback.opened:
+            self._read_stats(deck)
+            deck.finish(result)
+            self._set_clock_running(deck, False)
+
+    # ===== Telemetry =====
+
+    def _sample_stats(self) -> None:
+        self._stats_timer = self._loop.call_later(STATS_INTERVAL, self._sample_stats)
+        self._read_stats(self._active)
+
+    def _read_stats(self, deck: _Deck) -> None:
+        playback = deck.playback
+        media = deck.player.get_media()
+        if self._telemetry is None or playback is None or playback.timing is None or media is None:
+            return
+        stats = MediaStats()
+        if not media.get_stats(stats):
+            return
+        self._telemetry.sample(playback.timing, DecodeStats(
+            decoded_video=stats.decoded_video,
+            displayed_pictures=stats.displayed_pictures,
+            lost_pictures=stats.lost_pictures,
+            decoded_audio=stats.decoded_audio,
+            lost_audio_buffers=stats.lost_abuffers,
+            demux_corrupted=stats.demux_corrupted,
+            demux_discontinuity=stats.demux_discontinuity,
+            input_kbps=round(stats.input_bitrate * _KBPS, 1),
+            demux_kbps=round(stats.demux_bitrate * _KBPS, 1),
+        ))
+
+    # ===== Controls =====
 
     def pause(self) -> None:
-        self._player.pause()
+        self._active.player.pause()
 
     def stop(self) -> None:
         self.placeholder()
 
     def set_fullscreen(self, fullscreen: bool) -> None:
-        self._player.set_fullscreen(fullscreen)
+        self._active.player.set_fullscreen(fullscreen)
 
     def set_position(self, position: int) -> None:
-        self._player.set_time(position)
+        self._active.player.set_time(position)
+        self.cues.seek(position)
+
+    def set_rate(self, rate: float) -> None:
+        self._active.player.set_rate(rate)
+        self.clock.set_rate(rate)
+        self.cues.update()
 
     def get_position(self) -> int:
-        return self._player.get_time()
+        return self._active.player.get_time()
@@ -0,0 +1,37 @@
+from typing import Callable, Tuple
+
+from PyQt6.QtCore import pyqtSignal
+
+from .catalog import MediaCatalog
+from .catalog_jobs import CatalogJobs
+from .media_probe import MediaInfo
+from .transcode import ProxyProfile, transcode
+
+
+class ProxyLibrary(CatalogJobs[str]):
+    # Projector-ready copies of the catalog videos, transcoded in worker
+    # processes once the catalog is scanned. resolve() hands out a proxy only
+    # while the original keeps the size and mtime it was transcoded from.
+
+    proxy_ready: pyqtSignal = pyqtSignal(str)
+    failure = "transcode"
+
+    def __init__(self, catalog: MediaCatalog, cache_directory: str, profile: ProxyProfile = ProxyProfile(),
+                 ffmpeg: str = "ffmpeg", jobs: int = 1):
+        super().__init__(catalog, jobs)
+        self._cache_directory = cache_directory
+        self._profile = profile
+        self._ffmpeg = ffmpeg
+
+    def resolve(self, path: str) -> str:
+        proxy = self._result(path)
+        return path if proxy is None else proxy
+
+    def _accepts(self, entry: MediaInfo) -> bool:
+        return entry.width is not None
+
+    def _job(self, path: str) -> Tuple[Callable, ...]:
+        return transcode, path, self._cache_directory, self._profile, self._ffmpeg
+
+    def _ready(self, path: str) -> None:
+        self.proxy_ready.emit(path)
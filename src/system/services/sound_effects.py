@@ -0,0 +1,204 @@
+import asyncio
+import logging
+import time
+import wave
+from collections import OrderedDict
+from dataclasses import dataclass
+from types import ModuleType
+from typing import Iterable, Optional, Tuple
+
+from PyQt6.QtCore import QBuffer, QByteArray, QIODevice
+
+from system.services.projector import Media
+
+_log = logging.getLogger(__name__)
+
+# QAudioFormat.SampleFormat by sample width
+_SAMPLE_FORMATS = {1: "UInt8", 2: "Int16", 4: "Int32"}
+
+# (sample rate, channels, sample width)
+FormatKey = Tuple[int, int, int]
+
+
+@dataclass
+class SoundEffectsStats:
+    active_voices: int = 0
+    played: int = 0
+    stolen: int = 0
+    cache_hits: int = 0
+    cache_misses: int = 0
+    evictions: int = 0
+    cached_bytes: int = 0
+    last_trigger_latency: Optional[float] = None
+
+
+def _load_multimedia() -> Optional[ModuleType]:
+    # QtMultimedia links against the system audio stack (libpulse on Linux),
+    # without it the app runs with silent sound effects
+    try:
+        from PyQt6 import QtMultimedia
+    except ImportError as error:
+        _log.warning("Sound effects are disabled: %s", error)
+        return None
+    return QtMultimedia
+
+
+class _Sound:
+    def __init__(self, path: str):
+        with wave.open(path, "rb") as file:
+            self.format: FormatKey = (file.getframerate(), file.getnchannels(), file.getsampwidth())
+            self.pcm = QByteArray(file.readframes(file.getnframes()))
+
+    def size(self) -> int:
+        return self.pcm.size()
+
+
+class _Voice:
+    sink = None
+    format: Optional[FormatKey] = None
+    done: Optional[asyncio.Future] = None
+    started_at: float = 0
+
+    def __init__(self, multimedia: ModuleType, on_state_changed):
+        self._multimedia = multimedia
+        self.buffer = QBuffer()
+        self._on_state_changed = on_state_changed
+
+    def busy(self) -> bool:
+        return self.done is not None and not self.done.done()
+
+    def prepare(self, sound_format: FormatKey) -> None:
+        if self.sink is not None and self.format == sound_format:
+            return
+        if self.sink is not None:
+            self.sink.stop()
+            self.sink.deleteLater()
+        rate, channels, width = sound_format
+        audio_format = self._multimedia.QAudioFormat()
+        audio_format.setSampleRate(rate)
+        audio_format.setChannelCount(channels)
+        audio_format.setSampleFormat(getattr(self._multimedia.QAudioFormat.SampleFormat, _SAMPLE_FORMATS[width]))
+        self.sink = self._multimedia.QAudioSink(self._multimedia.QMediaDevices.defaultAudioOutput(), audio_format)
+        # ~20 ms of device buffer keeps the trigger latency low
+        self.sink.setBufferSize(rate * channels * width // 50)
+        self.sink.stateChanged.connect(lambda state: self._on_state_changed(self, state))
+        self.format = sound_format
+
+    def start(self, sound: _Sound, done: asyncio.Future) -> None:
+        self.prepare(sound.format)
+        self.sink.stop()
+        self.buffer.close()
+        self.buffer.setData(sound.pcm)
+        self.buffer.open(QIODevice.OpenModeFlag.ReadOnly)
+        self.done = done
+        self.started_at = time.perf_counter()
+        self.sink.start(self.buffer)
+
+    def finish(self) -> None:
+        if self.done is not None and not self.done.done():
+            self.done.set_result(None)
+
+    def stop(self) -> None:
+        if self.sink is not None:
+            self.sink.stop()
+        self.finish()
+
+
+class SoundEffects:
+    # Short .wav cues decoded once into memory and played on a fixed pool of
+    # audio sinks. Decoded buffers are evicted least recently used first when
+    # the cache grows over memory_limit bytes. Without QtMultimedia, or for a
+    # sound that cannot be read, play() logs and resolves right away.
+
+    def __init__(self, voices: int = 8, memory_limit: int = 64 * 1024 * 1024):
+        self._loop = asyncio.get_event_loop()
+        self._sounds: OrderedDict[str, _Sound] = OrderedDict()
+        self._multimedia = _load_multimedia()
+        if self._multimedia is None:
+            voices = 0
+        self._voices = [_Voice(self._multimedia, self._voice_state_changed) for _ in range(voices)]
+        self._memory_limit = memory_limit
+        self.stats = SoundEffectsStats()
+
+    def preload(self, sounds: Iterable[Media]) -> None:
+        # decodes the sounds and opens the sinks for their formats, shared
+        # out over the voices, so the first triggers do not wait for either
+        formats = []
+        for media in sounds:
+            try:
+                sound = self._get(media.path)
+            except (OSError, wave.Error) as error:
+                _log.warning("Could not preload sound effect %s: %s", media.path, error)
+                continue
+            if sound.format not in formats:
+                formats.append(sound.format)
+        if not formats:
+            return
+        for index, voice in enumerate(self._voices):
+            if not voice.busy():
+                voice.prepare(formats[index % len(formats)])
+
+    def play(self, media: Media) -> asyncio.Future:
+        done = self._loop.create_future()
+        if not self._voices:
+            done.set_result(None)
+            return done
+        try:
+            sound = self._get(media.path)
+        except (OSError, wave.Error) as error:
+            _log.warning("Could not play sound effect %s: %s", media.path, error)
+            done.set_result(None)
+            return done
+        self._acquire_voice(sound.format).start(sound, done)
+        self.stats.played += 1
+        self._update_active()
+        return done
+
+    def stop_all(self) -> None:
+        for voice in self._voices:
+            voice.stop()
+        self._update_active()
+
+    # ===== Internal methods =====
+
+    def _get(self, path: str) -> _Sound:
+        sound = self._sounds.get(path)
+        if sound is not None:
+            self._sounds.move_to_end(path)
+            self.stats.cache_hits += 1
+            return sound
+
+        self.stats.cache_misses += 1
+        sound = _Sound(path)
+        self._sounds[path] = sound
+        self.stats.cached_bytes += sound.size()
+        while self.stats.cached_bytes > self._memory_limit and len(self._sounds) > 1:
+            _, evicted = self._sounds.popitem(last=False)
+            self.stats.cached_bytes -= evicted.size()
+            self.stats.evictions += 1
+        return sound
+
+    def _acquire_voice(self, sound_format: FormatKey) -> _Voice:
+        # an idle voice already open in the format keeps its sink, any other
+        # has to open a new one
+        idle = [voice for voice in self._voices if not voice.busy()]
+        for voice in idle:
+            if voice.format == sound_format:
+                return voice
+        if idle:
+            return idle[0]
+        oldest = min(self._voices, key=lambda v: v.started_at)
+        oldest.stop()
+        self.stats.stolen += 1
+        return oldest
+
+    def _update_active(self) -> None:
+        self.stats.active_voices = sum(1 for voice in self._voices if voice.busy())
+
+    def _voice_state_changed(self, voice: _Voice, state) -> None:
+        states = self._multimedia.QAudio.State
+        if state == states.ActiveState and voice.busy():
+            self.stats.last_trigger_latency = (time.perf_counter() - voice.started_at) * 1000
+        elif state in (states.IdleState, states.StoppedState):
+            voice.finish()
+        self._update_active()
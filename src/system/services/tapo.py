@@ -0,0 +1,152 @@
+import json
+import time
+from base64 import b64decode, b64encode
+from typing import Any, Dict, List, Optional
+
+import requests
+from PyP100 import PyL530, tp_link_cipher
+
+# The bulb answers these when the token or the session cookie expired
+SESSION_EXPIRED = {9999, -1012}
+# ...and these to parameters it does not take, like fields it cannot combine
+INVALID_PARAMS = {-1008, 1002}
+COOKIE_NAME = "TP_SESSIONID"
+
+
+class TapoError(Exception):
+
+    def __init__(self, code: int, method: str):
+        super().__init__(f"Tapo '{method}' failed with error code {code}")
+        self.code = code
+        self.method = method
+
+    def session_expired(self) -> bool:
+        return self.code in SESSION_EXPIRED
+
+    def invalid_params(self) -> bool:
+        return self.code in INVALID_PARAMS
+
+
+def _now_ms() -> int:
+    return int(time.time() * 1000)
+
+
+class TapoBulb(PyL530.L530):
+    # PyL530 provides the key pair, credential encoding and the session
+    # cipher; requests are sent here over one keep-alive session with a
+    # timeout. set_state() changes all fields of a state in a single
+    # set_device_info round-trip, firmware that rejects combined fields as
+    # invalid parameters gets them one request per field like PyL530 does.
+
+    keys: Optional[Any] = None
+    token: Optional[str] = None
+    cookie: Optional[str] = None
+    composite: bool = True
+    # last known power state, None until read or set
+    device_on: Optional[bool] = None
+
+    def __init__(self, ip: str, login: str, password: str, timeout: float = 2.0):
+        super().__init__(ip, login, password)
+        self.session = requests.Session()
+        self.timeout = timeout
+
+    def createKeyPair(self) -> None:
+        # P100.__init__ generates the RSA key pair, that is left to the first
+        # handshake() so a restored session never pays for it
+        self.keys = None
+
+    def _url(self, token: bool) -> str:
+        url = f"http://{self.ipAddress}/app"
+        return f"{url}?token={self.token}" if token else url
+
+    def handshake(self) -> None:
+        if self.keys is None:
+            super().createKeyPair()
+        # a fresh TCP session for every handshake, like PyL530
+        self.session.close()
+        self.session = requests.Session()
+        response = self.session.post(self._url(token=False), timeout=self.timeout, json={
+            "method": "handshake",
+            "params": {"key": self.publicKey.decode("utf-8"), "requestTimeMils": _now_ms()},
+        })
+        body = response.json()
+        if body["error_code"] != 0:
+            raise TapoError(body["error_code"], "handshake")
+        self.tpLinkCipher = self.decode_handshake_key(body["result"]["key"])
+        self.cookie = f"{COOKIE_NAME}={response.cookies[COOKIE_NAME]}"
+        self.token = None
+
+    def login(self) -> None:
+        result = self.request("login_device", {"username": self.encodedEmail, "password": self.encodedPassword},
+                              token=False)
+        self.token = result["token"]
+
+    def export_session(self) -> Dict[str, str]:
+        return {
+            "cookie": self.cookie,
+            "token": self.token,
+            "key": b64encode(bytes(self.tpLinkCipher.key)).decode(),
+            "iv": b64encode(bytes(self.tpLinkCipher.iv)).decode(),
+            "terminal_uuid": self.terminalUUID,
+        }
+
+    def restore_session(self, session: Dict[str, str]) -> None:
+        # the bulb keeps a session for a day, a restored one skips the
+        # RSA handshake and the login
+        self.tpLinkCipher = tp_link_cipher.TpLinkCipher(
+            bytearray(b64decode(session["key"])), bytearray(b64decode(session["iv"])))
+        self.cookie = session["cookie"]
+        self.token = session["token"]
+        self.terminalUUID = session["terminal_uuid"]
+
+    def request(self, method: str, params: Optional[Dict[str, Any]] = None, token: bool = True) -> Any:
+        payload = {"method": method, "requestTimeMils": _now_ms(), "terminalUUID": self.terminalUUID}
+        if params is not None:
+            payload["params"] = params
+        response = self.session.post(self._url(token), headers={"Cookie": self.cookie}, timeout=self.timeout, json={
+            "method": "securePassthrough",
+            "params": {"request": self.tpLinkCipher.encrypt(json.dumps(payload))},
+        })
+        body = response.json()
+        if body["error_code"] != 0:
+            raise TapoError(body["error_code"], method)
+        result = json.loads(self.tpLinkCipher.decrypt(body["result"]["response"]))
+        if result["error_code"] != 0:
+            raise TapoError(result["error_code"], method)
+        return result.get("result")
+
+    def get_device_info(self) -> Dict[str, Any]:
+        info = self.request("get_device_info")
+        self.device_on = info.get("device_on")
+        return info
+
+    def set_state(self, params: Dict[str, Any]) -> int:
+        # returns the number of round-trips it took
+        if self.composite:
+            try:
+                self.request("set_device_info", {"device_on": True, **params})
+                self.device_on = True
+                return 1
+            except TapoError as error:
+                # any other error may be transient, the next state tries again
+                if not error.invalid_params():
+                    raise
+                self.composite = False
+        steps = self._single_field_steps(params, power=self.device_on is not True)
+        for step in steps:
+            self.request("set_device_info", step)
+            if "device_on" in step:
+                self.device_on = True
+        return len(steps)
+
+    @staticmethod
+    def _single_field_steps(params: Dict[str, Any], power: bool) -> List[Dict[str, Any]]:
+        # the bulb is only switched on when it is not known to be on
+        steps: List[Dict[str, Any]] = [{"device_on": True}] if power else []
+        if "hue" in params:
+            steps.append({"hue": params["hue"], "saturation": params["saturation"], "color_temp": 0})
+        elif "color_temp" in params:
+            steps.append({"color_temp": params["color_temp"]})
+        if "brightness" in params:
+            steps.append({"brightness": params["brightness"]})
+        return steps
@@ -0,0 +1,46 @@
+import hashlib
+import os
+import subprocess
+from pathlib import Path
+from typing import Optional
+
+RENDER_TIMEOUT = 60
+# Hashing whole multi-gigabyte clips is slower than rendering the thumbnail,
+# the key is computed from the size and the first and last chunks instead.
+HASH_CHUNK = 1024 * 1024
+
+
+def content_key(path: str) -> str:
+    digest = hashlib.sha1()
+    size = os.path.getsize(path)
+    digest.update(str(size).encode())
+    with open(path, "rb") as file:
+        digest.update(file.read(HASH_CHUNK))
+        if size > 2 * HASH_CHUNK:
+            file.seek(-HASH_CHUNK, os.SEEK_END)
+            digest.update(file.read(HASH_CHUNK))
+    return digest.hexdigest()
+
+
+def render_thumbnail(path: str, cache_directory: str, duration_ms: Optional[int],
+                     width: int, strip_frames: int = 0, ffmpeg: str = "ffmpeg") -> str:
+    suffix = f"strip{strip_frames}" if strip_frames else "poster"
+    target = Path(cache_directory) / f"{content_key(path)}-{width}-{suffix}.jpg"
+    if target.exists():
+        return str(target)
+    target.parent.mkdir(parents=True, exist_ok=True)
+
+    seconds = (duration_ms or 10000) / 1000
+    if strip_frames:
+        # frames spread evenly over the clip, tiled into one row
+        interval = max(seconds / strip_frames, 0.1)
+        arguments = ["-i", path, "-vf", f"fps=1/{interval:.3f},scale={width}:-2,tile={strip_frames}x1",
+                     "-frames:v", "1"]
+    else:
+        arguments = ["-ss", f"{seconds * 0.1:.3f}", "-i", path, "-vf", f"scale={width}:-2", "-frames:v", "1"]
+
+    partial = target.with_suffix(".part.jpg")
+    subprocess.run([ffmpeg, "-v", "error", "-y", *arguments, str(partial)],
+                   capture_output=True, check=True, timeout=RENDER_TIMEOUT)
+    partial.replace(target)
+    return str(target)
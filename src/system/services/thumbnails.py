@@ -0,0 +1,62 @@
+import asyncio
+import logging
+import subprocess
+from typing import Optional, Tuple
+
+from PyQt6.QtCore import QObject, pyqtSignal
+from PyQt6.QtGui import QPixmap
+
+from system.misc.workers import process_pool
+from .catalog import MediaCatalog
+from .thumbnail_render import render_thumbnail
+
+_log = logging.getLogger(__name__)
+
+# (path, size, mtime) of the catalog entry a thumbnail was rendered from
+_Key = Tuple[str, int, float]
+
+
+class ThumbnailCache(QObject):
+    # Poster frames rendered on demand in worker processes and cached on disk
+    # by content hash. get() never blocks: a missing thumbnail is scheduled
+    # and thumbnail_ready(path) is emitted once it can be shown.
+
+    thumbnail_ready: pyqtSignal = pyqtSignal(str)
+
+    def __init__(self, catalog: MediaCatalog, cache_directory: str, width: int = 96,
+                 strip_frames: int = 0, ffmpeg: str = "ffmpeg"):
+        super().__init__()
+        self._catalog = catalog
+        self._cache_directory = cache_directory
+        self._width = width
+        self._strip_frames = strip_frames
+        self._ffmpeg = ffmpeg
+        self._pixmaps: dict[_Key, QPixmap] = dict()
+        self._pending: set[_Key] = set()
+        self._failed: set[_Key] = set()
+
+    def get(self, path: str) -> Optional[QPixmap]:
+        entry = self._catalog.get(path)
+        if entry is None or entry.error is not None or entry.width is None:
+            return None
+        key = (entry.path, entry.size, entry.mtime)
+        pixmap = self._pixmaps.get(key)
+        if pixmap is None and key not in self._pending and key not in self._failed:
+            self._pending.add(key)
+            asyncio.get_event_loop().create_task(self._render(path, key, entry.duration_ms))
+        return pixmap
+
+    async def _render(self, path: str, key: _Key, duration_ms: Optional[int]) -> None:
+        loop = asyncio.get_event_loop()
+        try:
+            thumbnail = await loop.run_in_executor(
+                process_pool(), render_thumbnail, key[0], self._cache_directory, duration_ms,
+                self._width, self._strip_frames, self._ffmpeg)
+        except (OSError, subprocess.SubprocessError) as error:
+            _log.warning("Could not render thumbnail of %s: %s", path, error)
+            self._failed.add(key)
+            return
+        finally:
+            self._pending.discard(key)
+        self._pixmaps[key] = QPixmap(thumbnail)
+        self.thumbnail_ready.emit(path)
@@ -0,0 +1,47 @@
+import subprocess
+from dataclasses import dataclass
+from pathlib import Path
+
+from .thumbnail_render import content_key
+
+TRANSCODE_TIMEOUT = 3 * 60 * 60
+
+
+@dataclass(frozen=True)
+class ProxyProfile:
+    # One cheap format for every clip: H.264 at a capped height with a
+    # keyframe every keyframe_interval seconds so that start offsets and
+    # seeks decode at most that much video before the first correct frame.
+    max_height: int = 720
+    keyframe_interval: float = 0.5
+    crf: int = 20
+    preset: str = "veryfast"
+    audio_bitrate: str = "192k"
+
+    def tag(self) -> str:
+        return f"{self.max_height}p-k{self.keyframe_interval:g}-crf{self.crf}"
+
+
+def proxy_path(path: str, cache_directory: str, profile: ProxyProfile) -> Path:
+    return Path(cache_directory) / f"{content_key(path)}-{profile.tag()}.mp4"
+
+
+def transcode(path: str, cache_directory: str, profile: ProxyProfile, ffmpeg: str = "ffmpeg") -> str:
+    target = proxy_path(path, cache_directory, profile)
+    if target.exists():
+        return str(target)
+    target.parent.mkdir(parents=True, exist_ok=True)
+
+    partial = target.with_suffix(".part.mp4")
+    subprocess.run([
+        ffmpeg, "-v", "error", "-y", "-i", path,
+        "-map", "0:v:0", "-map", "0:a?",
+        "-c:v", "libx264", "-preset", profile.preset, "-crf", str(profile.crf), "-pix_fmt", "yuv420p",
+        "-vf", f"scale=-2:'min({profile.max_height},ih)'",
+        "-force_key_frames", f"expr:gte(t,n_forced*{profile.keyframe_interval})", "-sc_threshold", "0",
+        "-c:a", "aac", "-b:a", profile.audio_bitrate,
+        "-movflags", "+faststart",
+        str(partial),
+    ], capture_output=True, check=True, timeout=TRANSCODE_TIMEOUT)
+    partial.replace(target)
+    return str(target)
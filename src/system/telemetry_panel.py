@@ -0,0 +1,94 @@
+from pathlib import Path
+from typing import Any, Optional
+
+from PyQt6 import QtGui
+from PyQt6.QtCore import pyqtSlot
+from PyQt6.QtWidgets import QDialog, QHeaderView, QLabel, QTableView, QVBoxLayout
+
+from system.qt import AnyDictTableModel, SimpleColumn
+from system.services.projector import CueSheetRecord, FileTelemetry, PlaybackRecord, PlaybackTelemetry
+
+
+def _ms(value: Optional[float]) -> str:
+    return "" if value is None else f"{value:.0f} мс"
+
+
+class TelemetryPanel(QDialog):
+    # Per-file playback aggregates, worst stutter first, the live decode
+    # counters of the media currently on the projector and the cue timing
+    # of the last cue sheet run
+
+    def __init__(self, telemetry: PlaybackTelemetry):
+        super().__init__()
+        self.setWindowTitle("Телеметрия проектора")
+        self.resize(900, 400)
+
+        self.telemetry = telemetry
+        self.lbl_current = QLabel(self)
+        self.lbl_cues = QLabel(self)
+        self.tbl_files = QTableView(self)
+        layout = QVBoxLayout(self)
+        layout.addWidget(self.lbl_current)
+        layout.addWidget(self.lbl_cues)
+        layout.addWidget(self.tbl_files)
+
+        self.model = AnyDictTableModel()
+        self.model.registerColumn(SimpleColumn("name", "Файл"))
+        self.model.registerColumn(SimpleColumn("plays", "Запусков"))
+        self.model.registerColumn(SimpleColumn("errors", "Ошибок"))
+        self.model.registerColumn(SimpleColumn("ttff", "Первый кадр"))
+        self.model.registerColumn(SimpleColumn("ttff_max", "Первый кадр (макс.)"))
+        self.model.registerColumn(SimpleColumn("lost", "Потеряно кадров"))
+        self.model.registerColumn(SimpleColumn("buffering", "Буферизаций"))
+        self.model.registerColumn(SimpleColumn("bitrate", "Пиковый битрейт"))
+        self.model.setIdColumn("path")
+        self.tbl_files.setModel(self.model)
+
+        headerView = self.tbl_files.horizontalHeader()
+        headerView.setSectionResizeMode(0, QHeaderView.ResizeMode.Stretch)
+        headerView.setMinimumSectionSize(80)
+
+        self.telemetry.updated.connect(self.on_telemetry_updated)
+
+    @staticmethod
+    def _row(file: FileTelemetry) -> dict[str, Any]:
+        return {
+            "path": file.path,
+            "name": Path(file.path).name,
+            "plays": file.plays(),
+            "errors": file.errors(),
+            "ttff": _ms(file.mean_first_frame_ms()),
+            "ttff_max": _ms(file.max_first_frame_ms()),
+            "lost": f"{file.lost_ratio():.1%}",
+            "buffering": file.buffering(),
+            "bitrate": f"{file.peak_input_kbps():.0f} кбит/с",
+        }
+
+    @staticmethod
+    def _describe(record: Optional[PlaybackRecord]) -> str:
+        if record is None:
+            return "Сейчас ничего не воспроизводится"
+        stats = record.stats
+        return (f"Сейчас: {Path(record.path).name} — показано {stats.displayed_pictures}, "
+                f"потеряно {stats.lost_pictures} кадров, {stats.input_kbps:.0f} кбит/с, "
+                f"буферизаций {record.buffering}")
+
+    @staticmethod
+    def _describe_cues(record: Optional[CueSheetRecord]) -> str:
+        if record is None:
+            return "Кью-листы еще не запускались"
+        return (f"Кью-лист {Path(record.path).name}: {record.cues} кью, ошибка в среднем "
+                f"{record.mean_error_ms:+.0f} мс, максимум {record.max_error_ms:+d} мс")
+
+    @pyqtSlot()
+    def on_telemetry_updated(self) -> None:
+        if not self.isVisible():
+            return
+        self.lbl_current.setText(self._describe(self.telemetry.current))
+        self.lbl_cues.setText(self._describe_cues(self.telemetry.cue_sheets[-1] if self.telemetry.cue_sheets else None))
+        files = sorted(self.telemetry.files.values(), key=lambda file: file.lost_ratio(), reverse=True)
+        self.model.replaceRows([self._row(file) for file in files])
+
+    def showEvent(self, a0: QtGui.QShowEvent) -> None:
+        super().showEvent(a0)
+        self.on_telemetry_updated()
@@ -0,0 +1,82 @@
+import unittest
+
+import numpy as np
+
+from system.services.beat_analysis import SAMPLE_RATE, BeatGrid, analyze_samples
+from system.services.beat_grids import beat_cue_sheet
+from system.services.color_analysis import SAMPLE_FPS, ColorTrack, build_track
+from system.services.lighting import MAX_RATE, Light
+
+LIGHT = Light(Light.Type.COLOR, hue=280, saturation=100, brightness=100)
+
+
+def click_track(bpm: float, seconds: float) -> np.ndarray:
+    # a short decaying noise burst on every beat
+    samples = np.zeros(int(seconds * SAMPLE_RATE), dtype=np.float32)
+    burst = np.random.default_rng(0).uniform(-1, 1, 441).astype(np.float32) * np.linspace(1, 0, 441)
+    for beat in np.arange(0, seconds, 60 / bpm):
+        start = int(beat * SAMPLE_RATE)
+        samples[start:start + len(burst)] += burst[:len(samples) - start]
+    return samples
+
+
+def even_grid(bpm: float, beats: int) -> BeatGrid:
+    period = 60000 / bpm
+    return BeatGrid(bpm, [round(index * period) for index in range(beats)], [1.0] * beats, [])
+
+
+class BeatGridTest(unittest.TestCase):
+
+    def test_tempo_and_beats_of_a_click_track(self):
+        grid = analyze_samples(click_track(120, 20))
+        self.assertAlmostEqual(grid.tempo_bpm, 120, delta=1)
+        intervals = np.diff(grid.beats)
+        self.assertLess(abs(np.median(intervals) - 500), 15)
+        self.assertEqual(len(grid.energy), len(grid.beats))
+
+    def test_silence_has_no_beats(self):
+        grid = analyze_samples(np.zeros(SAMPLE_RATE * 5, dtype=np.float32))
+        self.assertEqual(grid.beats, [])
+
+    def test_cue_sheet_pulses_twice_per_beat(self):
+        sheet = beat_cue_sheet(even_grid(120, 4), LIGHT, low=10)
+        self.assertEqual([cue.position for cue in sheet.cues], [0, 250, 500, 750, 1000, 1250, 1500])
+        self.assertEqual([cue.light.brightness for cue in sheet.cues[:2]], [100, 10])
+
+    def test_cue_sheet_starts_at_start_ms(self):
+        sheet = beat_cue_sheet(even_grid(120, 4), LIGHT, start_ms=600)
+        self.assertEqual(sheet.cues[0].position, 1000)
+
+    def test_cue_sheet_keeps_within_the_bulb_rate(self):
+        spacing = 1000 / MAX_RATE
+        for bpm in [150, 160, 240, 400]:
+            positions = [cue.position for cue in beat_cue_sheet(even_grid(bpm, 32), LIGHT).cues]
+            self.assertTrue(all(b - a >= spacing for a, b in zip(positions, positions[1:])), bpm)
+
+
+class ColorTrackTest(unittest.TestCase):
+
+    def test_steady_color_is_one_change(self):
+        # pure red at full brightness for 4 s
+        colors = np.tile([0.0, 1.0, 1.0, 1.0], (SAMPLE_FPS * 4, 1))
+        track = build_track(colors, step_ms=500)
+        self.assertEqual(track.positions, [0])
+        self.assertEqual((track.hue, track.saturation, track.brightness), ([0], [100], [100]))
+
+    def test_hue_wraps_around(self):
+        # 350 and 10 degrees average to red, not cyan
+        colors = np.tile([[350.0, 1.0, 1.0, 1.0], [10.0, 1.0, 1.0, 1.0]], (SAMPLE_FPS, 1))
+        track = build_track(colors, step_ms=500)
+        self.assertIn(track.hue[0], (0, 355, 5))
+
+    def test_lookup(self):
+        track = ColorTrack(500, [0, 1000], [0, 120], [100, 100], [100, 50])
+        self.assertIsNone(track.at(-1))
+        self.assertEqual(track.at(999).hue, 0)
+        self.assertEqual(track.at(1000).brightness, 50)
+        self.assertEqual(track.next_position(0), 1000)
+        self.assertIsNone(track.next_position(1000))
+
+
+if __name__ == "__main__":
+    unittest.main()
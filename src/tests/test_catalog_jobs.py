@@ -0,0 +1,102 @@
+import asyncio
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, List, Optional, Tuple
+from unittest import mock
+
+from PyQt6.QtCore import QObject, pyqtSignal
+
+from system.services.catalog_jobs import CatalogJobs
+from system.services.media_probe import MediaInfo
+
+
+class StandInCatalog(QObject):
+    entries_changed: pyqtSignal = pyqtSignal()
+    scanned: bool = True
+
+    def __init__(self, entries: List[MediaInfo]):
+        super().__init__()
+        self.entries = {entry.path: entry for entry in entries}
+
+    def get(self, path: str) -> Optional[MediaInfo]:
+        return self.entries.get(path)
+
+    def query(self) -> List[MediaInfo]:
+        return sorted(self.entries.values(), key=lambda entry: entry.path)
+
+
+def upper(path: str) -> str:
+    if path.endswith("broken.mp4"):
+        raise OSError("cannot decode")
+    return path.upper()
+
+
+class UpperLibrary(CatalogJobs[str]):
+    def __init__(self, catalog: StandInCatalog):
+        super().__init__(catalog)
+        self.runs: List[str] = []
+        self.ready: List[str] = []
+
+    def _accepts(self, entry: MediaInfo) -> bool:
+        return entry.width is not None
+
+    def _job(self, path: str) -> Tuple[Callable, ...]:
+        self.runs.append(path)
+        return upper, path
+
+    def _ready(self, path: str) -> None:
+        self.ready.append(path)
+
+
+def video(path: str, mtime: float = 1.0) -> MediaInfo:
+    return MediaInfo(path, 1, mtime, width=640)
+
+
+class CatalogJobsTest(unittest.IsolatedAsyncioTestCase):
+
+    async def asyncSetUp(self):
+        # threads instead of worker processes, the jobs are trivial
+        executor = ThreadPoolExecutor(2)
+        self.addCleanup(executor.shutdown)
+        patcher = mock.patch("system.services.catalog_jobs.process_pool", return_value=executor)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.catalog = StandInCatalog([video("/a.mp4"), video("/broken.mp4"), MediaInfo("/b.wav", 1, 1.0)])
+        self.library = UpperLibrary(self.catalog)
+
+    async def settle(self) -> None:
+        for _ in range(20):
+            await asyncio.sleep(0.01)
+
+    async def test_every_accepted_entry_runs_once(self):
+        self.library.start()
+        self.catalog.entries_changed.emit()
+        self.catalog.entries_changed.emit()
+        await self.settle()
+        self.catalog.entries_changed.emit()
+        await self.settle()
+        self.assertEqual(sorted(self.library.runs), ["/a.mp4", "/broken.mp4"])
+        self.assertEqual(self.library.ready, ["/a.mp4"])
+        self.assertEqual(self.library._result("/a.mp4"), "/A.MP4")
+        self.assertIsNone(self.library._result("/broken.mp4"))
+        self.assertIsNone(self.library._result("/b.wav"))
+
+    async def test_changed_file_runs_again(self):
+        self.library.start()
+        await self.settle()
+        self.catalog.entries["/a.mp4"] = video("/a.mp4", mtime=2.0)
+        self.assertIsNone(self.library._result("/a.mp4"))
+        self.catalog.entries_changed.emit()
+        await self.settle()
+        self.assertEqual(self.library.runs.count("/a.mp4"), 2)
+        self.assertEqual(self.library._result("/a.mp4"), "/A.MP4")
+
+    async def test_nothing_runs_before_the_scan(self):
+        self.catalog.scanned = False
+        self.library.start()
+        await self.settle()
+        self.assertEqual(self.library.runs, [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,78 @@
+import asyncio
+import unittest
+
+from system.services.projector.cues import CueDispatcher, PlayerClock
+
+
+class CueDispatcherTest(unittest.IsolatedAsyncioTestCase):
+
+    async def asyncSetUp(self):
+        self.clock = PlayerClock()
+        self.player_time = 0
+        self.cues = CueDispatcher(self.clock, player_time=lambda: self.player_time)
+        self.fired = []
+
+    def add(self, position: int) -> asyncio.Future:
+        return self.cues.add(position, lambda actual: self.fired.append(position))
+
+    def advance(self, position: int) -> None:
+        self.player_time = position
+        self.clock.update(position)
+        self.cues.update()
+
+    async def settle(self) -> None:
+        # done callbacks and the purge of cancelled cues run on the next iterations
+        for _ in range(3):
+            await asyncio.sleep(0)
+
+    async def test_fires_in_position_order(self):
+        for position in [300, 100, 200]:
+            self.add(position)
+        self.advance(250)
+        self.assertEqual(self.fired, [100, 200])
+        self.advance(300)
+        self.assertEqual(self.fired, [100, 200, 300])
+
+    async def test_waiters_at_the_same_position(self):
+        first = self.cues.add(100)
+        second = self.cues.add(100)
+        self.advance(120)
+        self.assertEqual((first.result(), second.result()), (120, 120))
+
+    async def test_seek_back_rearms_callback_cues(self):
+        self.add(100)
+        waiter = self.cues.add(150)
+        self.advance(200)
+        self.cues.seek(50)
+        self.advance(200)
+        self.assertEqual(self.fired, [100, 100])
+        self.assertEqual(waiter.result(), 200)
+
+    async def test_cancelled_cues_are_dropped(self):
+        cancelled = [self.add(1000 + position) for position in range(100)]
+        kept = self.add(5000)
+        for future in cancelled:
+            future.cancel()
+        await self.settle()
+        self.assertEqual(self.cues.next_position(), 5000)
+        self.advance(6000)
+        self.assertEqual(self.fired, [5000])
+        self.assertTrue(kept.done())
+
+    async def test_clear_cancels_pending_waiters(self):
+        waiter = self.cues.add(100)
+        self.cues.clear()
+        self.assertTrue(waiter.cancelled())
+        self.assertIsNone(self.cues.next_position())
+
+    async def test_reports_the_player_time(self):
+        self.add(100)
+        self.clock.update(110)
+        self.player_time = 90
+        self.cues.update()
+        report = self.cues.reports[-1]
+        self.assertEqual((report.requested, report.actual, report.error()), (100, 90, -10))
+
+
+if __name__ == "__main__":
+    unittest.main()
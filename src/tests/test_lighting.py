@@ -0,0 +1,74 @@
+import asyncio
+import threading
+import unittest
+
+from system.services.lighting import Light, Lighting
+
+RED = Light(Light.Type.COLOR, hue=0, saturation=100, brightness=100)
+GREEN = Light(Light.Type.COLOR, hue=120, saturation=100, brightness=100)
+BLUE = Light(Light.Type.COLOR, hue=240, saturation=100, brightness=100)
+
+
+class RecordingBulb:
+    # answers set_state() like a TapoBulb that takes combined fields
+
+    def __init__(self):
+        self.states = []
+        self.release = threading.Event()
+        self.release.set()
+
+    def set_state(self, params):
+        self.release.wait(5)
+        self.states.append(params)
+        return 1
+
+
+class LightingTest(unittest.IsolatedAsyncioTestCase):
+
+    async def asyncSetUp(self):
+        # never started, the tests drive the session state themselves
+        self.lighting = Lighting("192.0.2.1", "login", "password", max_rate=1000)
+        self.bulb = RecordingBulb()
+        self.lighting._bulb = self.bulb
+
+    async def asyncTearDown(self):
+        self.bulb.release.set()
+        self.lighting.close()
+
+    async def test_offline_set_resolves_false_at_once(self):
+        first = await asyncio.wait_for(self.lighting.set(RED), 1)
+        second = await asyncio.wait_for(self.lighting.set(GREEN), 1)
+        self.assertEqual((first, second), (False, False))
+        self.assertEqual(self.bulb.states, [])
+
+    async def test_offline_state_is_sent_after_the_reconnect(self):
+        self.lighting.set(RED)
+        self.lighting.set(GREEN)
+        self.lighting._online.set()
+        done = await asyncio.wait_for(self.lighting.set(BLUE), 1)
+        self.assertTrue(done)
+        self.assertEqual(len(self.bulb.states), 1)
+        self.assertEqual(self.bulb.states[0]["hue"], 240)
+
+    async def test_latest_state_wins_while_a_command_is_sent(self):
+        self.lighting._online.set()
+        self.bulb.release.clear()
+        first = self.lighting.set(RED)
+        await asyncio.sleep(0.05)
+        waiters = [self.lighting.set(light) for light in [GREEN, BLUE]]
+        self.bulb.release.set()
+        results = await asyncio.wait_for(asyncio.gather(first, *waiters), 1)
+        self.assertEqual(results, [True, True, True])
+        self.assertEqual([state["hue"] for state in self.bulb.states], [0, 240])
+        self.assertEqual(self.lighting.stats.coalesced, 1)
+
+    async def test_known_state_is_not_sent_again(self):
+        self.lighting._online.set()
+        self.assertTrue(await asyncio.wait_for(self.lighting.set(RED), 1))
+        self.assertTrue(await asyncio.wait_for(self.lighting.set(RED), 1))
+        self.assertEqual(len(self.bulb.states), 1)
+        self.assertEqual(self.lighting.stats.skipped, 1)
+
+
+if __name__ == "__main__":
+    unittest.main()